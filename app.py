@@ -10,20 +10,26 @@ from frontend.estrategia_page import Pagina_estrategia
 from frontend.grafico_page import Pagina_grafico
 from frontend.Pagina_inicio import Pagina_inicio
 from frontend.documentacao_page import Pagina_documentacao
+from log_config.tempo import medir_tempo
+from frontend.componentes import painel_diagnostico
+from log_config.perfilamento import perfilar
 
-# Configurar o estado inicial
-if "pagina_atual" not in st.session_state:
-    st.session_state.pagina_atual = "INÍCIO"
-    logger.debug("Estado inicial 'pagina_atual' definido para 'INÍCIO'.")
-if "estrategia_preenchida" not in st.session_state:
-    st.session_state.estrategia_preenchida = False
-    logger.debug("Estado inicial 'estrategia_preenchida' definido para False.")
-if "acoes_carteira" not in st.session_state:
-    st.session_state.acoes_carteira = None
-    logger.debug("Estado inicial 'acoes_carteira' definido para None.")
+def inicializar_estado():
+    """
+    Configura o estado inicial da sessão.
+    """
+    if "pagina_atual" not in st.session_state:
+        st.session_state.pagina_atual = "INÍCIO"
+        logger.debug("Estado inicial 'pagina_atual' definido para 'INÍCIO'.")
+    if "estrategia_preenchida" not in st.session_state:
+        st.session_state.estrategia_preenchida = False
+        logger.debug("Estado inicial 'estrategia_preenchida' definido para False.")
+    if "acoes_carteira" not in st.session_state:
+        st.session_state.acoes_carteira = None
+        logger.debug("Estado inicial 'acoes_carteira' definido para None.")
 
 # Estilizar os botões com CSS para ficarem vermelhos
-st.markdown("""
+ESTILO_BOTOES = """
 <style>
 /* Estilo base para o botão */
 div.stButton > button:first-child {
@@ -62,31 +68,37 @@ div.stButton > button:focus {
     outline: none !important;
 }
 </style>
-""", unsafe_allow_html=True)
+"""
 
-# Conteúdo dos botões no corpo principal
-with st.container():
-    col1, col2, col3, col4, col5 = st.columns(5)
-    with col1:
-        if st.button("🏠 Início"):
-            logger.info("Botão 'Início' clicado.")
-            st.session_state.pagina_atual = "INÍCIO"
-    with col2:
-        if st.button("📋 Planilhão"):
-            logger.info("Botão 'Planilhão' clicado.")
-            st.session_state.pagina_atual = "PLANILHÃO"
-    with col3:
-        if st.button("🔍 Estratégia"):
-            logger.info("Botão 'Estratégia' clicado.")
-            st.session_state.pagina_atual = "ESTRATÉGIA"
-    with col4:
-        if st.button("📊 Gráfico"):
-            logger.info("Botão 'Gráfico' clicado.")
-            st.session_state.pagina_atual = "GRÁFICO"
-    with col5:
-        if st.button("📚 Documentação"):
-            logger.info("Botão 'Documentação' clicado.")
-            st.session_state.pagina_atual = "DOCUMENTAÇÃO"
+def renderizar_navegacao():
+    """
+    Renderiza os botões de navegação no corpo principal.
+
+    Fica fora dos fragmentos das páginas: só é reexecutada quando o app inteiro é
+    reexecutado, como ao trocar de página.
+    """
+    with st.container():
+        col1, col2, col3, col4, col5 = st.columns(5)
+        with col1:
+            if st.button("🏠 Início"):
+                logger.info("Botão 'Início' clicado.")
+                st.session_state.pagina_atual = "INÍCIO"
+        with col2:
+            if st.button("📋 Planilhão"):
+                logger.info("Botão 'Planilhão' clicado.")
+                st.session_state.pagina_atual = "PLANILHÃO"
+        with col3:
+            if st.button("🔍 Estratégia"):
+                logger.info("Botão 'Estratégia' clicado.")
+                st.session_state.pagina_atual = "ESTRATÉGIA"
+        with col4:
+            if st.button("📊 Gráfico"):
+                logger.info("Botão 'Gráfico' clicado.")
+                st.session_state.pagina_atual = "GRÁFICO"
+        with col5:
+            if st.button("📚 Documentação"):
+                logger.info("Botão 'Documentação' clicado.")
+                st.session_state.pagina_atual = "DOCUMENTAÇÃO"
 
 def renderizar_pagina():
     """
@@ -116,5 +128,16 @@ def renderizar_pagina():
         logger.error(f"Página desconhecida: {st.session_state.pagina_atual}")
         st.error("Página não encontrada.")
 
-# Renderizar a página
-renderizar_pagina()
+# Renderizar o app. Interações dentro das páginas reexecutam apenas o fragmento da página;
+# o tempo abaixo (registrado apenas com `PERFIL=1`) mede somente as execuções completas
+# (carga inicial e navegação).
+# Com o perfilamento ativado (`PERFIL=1`, ou `?perfil=1` com `PERFIL_URL=1`), a renderização da página é perfilada
+# e o painel de diagnóstico aparece ao final; reexecuções de fragmentos são perfiladas pelas páginas.
+with medir_tempo("Execução completa do app"):
+    inicializar_estado()
+    st.markdown(ESTILO_BOTOES, unsafe_allow_html=True)
+    renderizar_navegacao()
+    with perfilar(f"Página {st.session_state.pagina_atual}") as perfilamento:
+        renderizar_pagina()
+    if perfilamento.resultado is not None:
+        painel_diagnostico(perfilamento.resultado)
@@ -1,6 +1,9 @@
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from dotenv import load_dotenv
+from backend.resiliencia import CacheRespostas, DisjuntorCircuito
 from log_config.logging_config import logger  # Importa o logger centralizado
 
 # Carregar o token do arquivo .env
@@ -14,33 +17,153 @@ if not token:
 headers = {'Authorization': f'JWT {token}'}
 logger.info("Token carregado com sucesso.")
 
-def pegar_planilhao(data_base):
+# Endereço base da API (pode ser trocado, por exemplo, por um servidor local em testes de carga)
+API_BASE_URL = os.getenv('API_BASE_URL', 'https://laboratoriodefinancas.com/api/v1')
+
+# Tempo máximo de conexão e de leitura de cada requisição, em segundos
+TIMEOUT = (float(os.getenv('API_TIMEOUT_CONEXAO', '3.05')), float(os.getenv('API_TIMEOUT_LEITURA', '20')))
+
+# Idade até a qual uma resposta guardada é servida sem atualização, e idade máxima
+# (orçamento de obsolescência) até a qual ela ainda é servida enquanto é atualizada em segundo plano
+PRAZO_FRESCO = float(os.getenv('API_PRAZO_FRESCO_S', '900'))
+PRAZO_OBSOLETO = float(os.getenv('API_PRAZO_OBSOLETO_S', '86400'))
+
+# Últimas respostas válidas, disjuntor da API e threads de atualização em segundo plano
+_cache = CacheRespostas(max_entradas=int(os.getenv('API_CACHE_MAX_ENTRADAS', '2048')))
+_disjuntor = DisjuntorCircuito(
+    limite_falhas=int(os.getenv('API_DISJUNTOR_FALHAS', '5')),
+    tempo_aberto=float(os.getenv('API_DISJUNTOR_ABERTO_S', '30')),
+)
+_atualizador = ThreadPoolExecutor(max_workers=4, thread_name_prefix='atualizacao-api')
+_em_atualizacao = set()
+_lock_atualizacao = threading.Lock()
+
+
+class ErroServidor(Exception):
+    """Resposta 5xx da API, tratada como falha técnica pelo disjuntor."""
+
+
+def _requisitar(endpoint, params):
+    """
+    Faz a requisição HTTP a um endpoint da API.
+
+    Returns:
+        dict or None: JSON da resposta, ou None se a API responder com erro de cliente (4xx).
+
+    Raises:
+        requests.RequestException: Em falhas de rede ou de tempo limite.
+        ErroServidor: Se a API responder com erro de servidor (5xx).
+    """
+    r = requests.get(f'{API_BASE_URL}/{endpoint}', params=params, headers=headers, timeout=TIMEOUT)
+    if r.status_code == 200:
+        return r.json()
+    if r.status_code >= 500:
+        raise ErroServidor(f"Status Code: {r.status_code} | Response: {r.text}")
+    logger.warning(f"Resposta inválida de {endpoint}: {params} | Status Code: {r.status_code} | Response: {r.text}")
+    return None
+
+
+def _requisitar_com_disjuntor(endpoint, params, chave):
+    """
+    Faz a requisição passando pelo disjuntor e guarda a resposta válida no cache.
+
+    Returns:
+        dict or None: JSON da resposta, ou None em caso de erro ou de circuito aberto.
+    """
+    if not _disjuntor.permite():
+        logger.warning(f"Disjuntor aberto: consulta a {endpoint} não realizada | {params}")
+        return None
+    try:
+        dados = _requisitar(endpoint, params)
+    except (requests.RequestException, ErroServidor) as e:
+        _disjuntor.registrar_falha()
+        logger.error(f"Erro técnico ao consultar {endpoint}: {params} | {e}")
+        return None
+    _disjuntor.registrar_sucesso()
+    if dados is not None:
+        _cache.guardar(chave, dados)
+    return dados
+
+
+def _atualizar_em_segundo_plano(endpoint, params, chave):
+    """Agenda a atualização de uma resposta guardada, no máximo uma por consulta ao mesmo tempo."""
+    with _lock_atualizacao:
+        if chave in _em_atualizacao:
+            return
+        _em_atualizacao.add(chave)
+
+    def atualizar():
+        try:
+            _requisitar_com_disjuntor(endpoint, params, chave)
+        finally:
+            with _lock_atualizacao:
+                _em_atualizacao.discard(chave)
+
+    logger.info(f"Atualizando em segundo plano a consulta a {endpoint} | {params}")
+    _atualizador.submit(atualizar)
+
+
+def _consultar(endpoint, params):
+    """
+    Consulta um endpoint da API servindo a última resposta válida enquanto ela estiver no orçamento de obsolescência.
+
+    - Resposta guardada há menos de `PRAZO_FRESCO`: servida sem consultar a API.
+    - Resposta guardada há menos de `PRAZO_OBSOLETO`: servida imediatamente e atualizada em segundo plano.
+    - Sem resposta guardada dentro do orçamento: a API é consultada agora, passando pelo disjuntor.
+      Se a consulta falhar, uma resposta antiga, se existir, é servida como último recurso.
+
+    A resposta é acompanhada de um indicador de novidade: True apenas na primeira vez que uma
+    resposta obtida da API (agora ou por uma atualização em segundo plano) é entregue, para que
+    quem a grava localmente não regrave a cada entrega do cache.
+
+    Args:
+        endpoint (str): Caminho do endpoint, relativo a `API_BASE_URL`.
+        params (dict): Parâmetros da consulta.
+
+    Returns:
+        Tuple[dict or None, bool]: Dados retornados pela API em formato JSON (ou None em caso de erro)
+        e se a resposta é nova.
+    """
+    chave = (endpoint, tuple(sorted((k, str(v)) for k, v in params.items())))
+    guardado = _cache.obter(chave)
+    if guardado is not None:
+        dados, idade = guardado
+        if idade <= PRAZO_FRESCO:
+            return dados, _cache.retirar_novidade(chave)
+        if idade <= PRAZO_OBSOLETO:
+            _atualizar_em_segundo_plano(endpoint, params, chave)
+            return dados, _cache.retirar_novidade(chave)
+
+    dados = _requisitar_com_disjuntor(endpoint, params, chave)
+    if dados is None and guardado is not None:
+        logger.warning(f"Servindo resposta fora do orçamento de obsolescência para {endpoint} | {params}")
+        return guardado[0], False
+    return dados, dados is not None and _cache.retirar_novidade(chave)
+
+
+def pegar_planilhao(data_base, indicar_nova=False):
     """
     Consulta o endpoint do planilhão para obter dados com base em uma data específica.
 
     Args:
         data_base (str): Data base para a consulta ao planilhão no formato 'YYYY-MM-DD'.
+        indicar_nova (bool, opcional): Se True, retorna também se a resposta é nova (ver `_consultar`). Padrão: False.
 
     Returns:
         dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+        Com `indicar_nova`, tupla (dados, nova).
     """
     logger.info(f"Iniciando consulta ao planilhão para a data base: {data_base}")
     params = {'data_base': data_base}
-    try:
-        r = requests.get('https://laboratoriodefinancas.com/api/v1/planilhao', params=params, headers=headers)
-        if r.status_code == 200:
-            dados = r.json()
-            logger.info(f"Consulta ao planilhão bem-sucedida para a data base: {data_base}")
-            return dados
-        else:
-            logger.warning(f"Erro ao consultar o planilhão: {data_base} | Status Code: {r.status_code} | Response: {r.text}")
-            return None
-    except requests.RequestException as e:
-        logger.error(f"Erro técnico ao consultar o planilhão: {data_base} | {e}")
-        return None
+    dados, nova = _consultar('planilhao', params)
+    if dados is not None:
+        logger.info(f"Consulta ao planilhão bem-sucedida para a data base: {data_base}")
+    else:
+        logger.warning(f"Erro ao consultar o planilhão: {data_base}")
+    return (dados, nova) if indicar_nova else dados
 
 
-def get_preco_corrigido(ticker, data_ini, data_fim):
+def get_preco_corrigido(ticker, data_ini, data_fim, indicar_nova=False):
     """
     Consulta o endpoint para obter os preços corrigidos de uma ação em um período especificado.
 
@@ -48,27 +171,23 @@ def get_preco_corrigido(ticker, data_ini, data_fim):
         ticker (str): Ticker da ação a ser consultada.
         data_ini (str): Data inicial do período no formato 'YYYY-MM-DD'.
         data_fim (str): Data final do período no formato 'YYYY-MM-DD'.
+        indicar_nova (bool, opcional): Se True, retorna também se a resposta é nova (ver `_consultar`). Padrão: False.
 
     Returns:
         dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+        Com `indicar_nova`, tupla (dados, nova).
     """
     logger.info(f"Iniciando consulta de preço corrigido para {ticker} de {data_ini} a {data_fim}.")
     params = {'ticker': ticker, 'data_ini': data_ini, 'data_fim': data_fim}
-    try:
-        r = requests.get('https://laboratoriodefinancas.com/api/v1/preco-corrigido', params=params, headers=headers)
-        if r.status_code == 200:
-            preco_corrigido = r.json()
-            logger.info(f"Consulta de preço corrigido bem-sucedida para {ticker}.")
-            return preco_corrigido
-        else:
-            logger.warning(f"Falha na consulta de preço corrigido para {ticker} | Status Code: {r.status_code} | Response: {r.text}")
-            return None
-    except requests.RequestException as e:
-        logger.error(f"Erro técnico ao consultar preço corrigido para {ticker}: {e}")
-        return None
+    preco_corrigido, nova = _consultar('preco-corrigido', params)
+    if preco_corrigido is not None:
+        logger.info(f"Consulta de preço corrigido bem-sucedida para {ticker}.")
+    else:
+        logger.warning(f"Falha na consulta de preço corrigido para {ticker}.")
+    return (preco_corrigido, nova) if indicar_nova else preco_corrigido
 
 
-def get_preco_diversos(data_ini, data_fim, ticker):
+def get_preco_diversos(data_ini, data_fim, ticker, indicar_nova=False):
     """
     Consulta o endpoint para obter os preços diversos de uma ação em um período especificado.
 
@@ -76,21 +195,17 @@ def get_preco_diversos(data_ini, data_fim, ticker):
         data_ini (str): Data inicial do período no formato 'YYYY-MM-DD'.
         data_fim (str): Data final do período no formato 'YYYY-MM-DD'.
         ticker (str): Ticker da ação a ser consultada.
+        indicar_nova (bool, opcional): Se True, retorna também se a resposta é nova (ver `_consultar`). Padrão: False.
 
     Returns:
         dict or None: Dados retornados pela API em formato JSON, ou None em caso de erro.
+        Com `indicar_nova`, tupla (dados, nova).
     """
     logger.info(f"Iniciando consulta de preços diversos para {ticker} de {data_ini} a {data_fim}.")
     params_ibov = {'ticker': ticker, 'data_ini': data_ini, 'data_fim': data_fim}
-    try:
-        r = requests.get('https://laboratoriodefinancas.com/api/v1/preco-diversos', params=params_ibov, headers=headers)
-        if r.status_code == 200:
-            response_ibov = r.json()
-            logger.info(f"Consulta de preços diversos bem-sucedida para {ticker}.")
-            return response_ibov
-        else:
-            logger.warning(f"Falha na consulta de preços diversos para {ticker} | Status Code: {r.status_code} | Response: {r.text}")
-            return None
-    except requests.RequestException as e:
-        logger.error(f"Erro técnico ao consultar preços diversos para {ticker}: {e}")
-        return None
+    response_ibov, nova = _consultar('preco-diversos', params_ibov)
+    if response_ibov is not None:
+        logger.info(f"Consulta de preços diversos bem-sucedida para {ticker}.")
+    else:
+        logger.warning(f"Falha na consulta de preços diversos para {ticker}.")
+    return (response_ibov, nova) if indicar_nova else response_ibov
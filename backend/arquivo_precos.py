@@ -0,0 +1,245 @@
+"""
+Arquivo local de preços corrigidos de todo o universo, para análises sem acesso à rede.
+
+Os fechamentos ficam em uma matriz data x ticker de float64 gravada em disco na ordem de
+colunas (a série de cada ticker é contígua) e aberta com `np.memmap`; um índice JSON ao
+lado guarda as datas, os tickers e o nome do arquivo da matriz. Recortes de qualquer
+conjunto de tickers e período leem só as páginas necessárias, sem rede e quase sem cópia.
+
+Ingestão (todos os tickers vistos nos snapshots do planilhão em disco):
+    python -m backend.arquivo_precos --inicio 2015-01-01 --fim 2024-12-31 --threads 8
+"""
+import argparse
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+import streamlit as st
+from backend.config import ARQUIVO_PRECOS_DIR
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Nome do índice do arquivo dentro de `ARQUIVO_PRECOS_DIR`.
+ARQUIVO_INDICE = "indice.json"
+
+
+class ArquivoPrecos:
+    """
+    Arquivo de preços aberto para leitura.
+
+    Attributes:
+        inicio (pd.Timestamp): Data inicial do período ingerido.
+        fim (pd.Timestamp): Data final do período ingerido.
+        datas (pd.DatetimeIndex): Pregões das linhas da matriz, em ordem.
+        tickers (pd.Index): Tickers das colunas da matriz.
+        fechamentos (np.memmap): Matriz data x ticker de fechamentos corrigidos (NaN onde não há cotação).
+    """
+
+    def __init__(self, inicio, fim, datas: pd.DatetimeIndex, tickers: pd.Index, fechamentos: np.ndarray):
+        self.inicio = pd.Timestamp(inicio)
+        self.fim = pd.Timestamp(fim)
+        self.datas = datas
+        self.tickers = tickers
+        self.fechamentos = fechamentos
+
+    def __contains__(self, ticker) -> bool:
+        return ticker in self.tickers
+
+    def cobre(self, data_ini, data_fim) -> bool:
+        """
+        Indica se o período está inteiro dentro do período ingerido.
+
+        Args:
+            data_ini (date): Data inicial.
+            data_fim (date): Data final.
+
+        Returns:
+            bool: True se o arquivo contém todos os pregões do período.
+        """
+        return self.inicio <= pd.Timestamp(data_ini) and pd.Timestamp(data_fim) <= self.fim
+
+    def matriz(self, tickers, data_ini, data_fim) -> pd.DataFrame:
+        """
+        Recorta a matriz de fechamentos de alguns tickers em um período.
+
+        As linhas do período são contíguas, e cada coluna escolhida é uma fatia contígua da
+        série do ticker em disco: só essas páginas são lidas.
+
+        Args:
+            tickers (list): Tickers presentes no arquivo.
+            data_ini (date): Data inicial.
+            data_fim (date): Data final.
+
+        Returns:
+            pd.DataFrame: Fechamentos indexados por data, uma coluna por ticker.
+        """
+        ini = self.datas.searchsorted(pd.Timestamp(data_ini))
+        fim = self.datas.searchsorted(pd.Timestamp(data_fim), side="right")
+        colunas = self.tickers.get_indexer(tickers)
+        return pd.DataFrame(self.fechamentos[ini:fim, colunas], index=self.datas[ini:fim], columns=list(tickers))
+
+    def precos_longos(self, tickers, data_ini, data_fim) -> pd.DataFrame:
+        """
+        Recorta os preços no mesmo formato longo de `pegar_df_preco_corrigido`.
+
+        Args:
+            tickers (list): Tickers presentes no arquivo.
+            data_ini (date): Data inicial.
+            data_fim (date): Data final.
+
+        Returns:
+            pd.DataFrame: Colunas 'data', 'fechamento', 'ticker' e 'retorno_diario', ticker a ticker.
+        """
+        matriz = self.matriz(tickers, data_ini, data_fim)
+        valores = matriz.to_numpy().T.ravel()
+        datas = np.tile(matriz.index.strftime("%Y-%m-%d").to_numpy(), len(tickers))
+        nomes = np.repeat(np.asarray(tickers, dtype=object), len(matriz))
+        validos = ~np.isnan(valores)
+        df = pd.DataFrame({"data": datas[validos], "fechamento": valores[validos], "ticker": nomes[validos]})
+        # Retorno entre cotações consecutivas de cada ticker, como o `pct_change` feito por ticker.
+        novo_ticker = np.r_[True, df["ticker"].to_numpy()[1:] != df["ticker"].to_numpy()[:-1]]
+        df["retorno_diario"] = df["fechamento"].pct_change(fill_method=None).mask(novo_ticker)
+        return df
+
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def _abrir(caminho_indice: str, versao: float) -> ArquivoPrecos:
+    """Abre o arquivo descrito pelo índice; `versao` (data de modificação do índice) renova o cache após uma ingestão."""
+    with open(caminho_indice) as f:
+        indice = json.load(f)
+    datas = pd.DatetimeIndex(pd.to_datetime(indice["datas"]))
+    tickers = pd.Index(indice["tickers"])
+    fechamentos = np.memmap(
+        os.path.join(os.path.dirname(caminho_indice), indice["arquivo"]),
+        dtype=np.float64, mode="r", shape=(len(datas), len(tickers)), order="F",
+    )
+    logger.info(f"Arquivo de preços aberto | Pregões: {len(datas)}, Tickers: {len(tickers)}")
+    return ArquivoPrecos(indice["inicio"], indice["fim"], datas, tickers, fechamentos)
+
+
+def abrir_arquivo_precos():
+    """
+    Abre o arquivo local de preços, se ele já tiver sido ingerido.
+
+    Returns:
+        ArquivoPrecos or None: Arquivo aberto (compartilhado entre as sessões), ou None se não existir.
+    """
+    caminho_indice = os.path.join(ARQUIVO_PRECOS_DIR, ARQUIVO_INDICE)
+    try:
+        return _abrir(caminho_indice, os.path.getmtime(caminho_indice))
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.error(f"Erro ao abrir o arquivo de preços: {e}")
+        return None
+
+
+def tickers_dos_snapshots() -> list:
+    """
+    Reúne os tickers de todos os snapshots do planilhão persistidos em disco.
+
+    Returns:
+        list: Tickers distintos, em ordem alfabética.
+    """
+    from backend.snapshots import ler_snapshot, listar_snapshots
+
+    tickers = set()
+    for data_base in listar_snapshots():
+        snapshot = ler_snapshot(data_base)
+        if snapshot is not None:
+            tickers.update(snapshot.df["ticker"])
+    return sorted(tickers)
+
+
+def _baixar_serie(ticker, data_ini, data_fim):
+    """Consulta a série de fechamentos corrigidos de um ticker na API."""
+    from backend.apis import get_preco_corrigido
+
+    dados = get_preco_corrigido(ticker, str(data_ini), str(data_fim))
+    if not dados or not dados.get("dados"):
+        return None
+    df = pd.DataFrame.from_dict(dados["dados"])
+    return pd.Series(df["fechamento"].to_numpy(dtype=float), index=pd.to_datetime(df["data"])).groupby(level=0).last()
+
+
+def construir_arquivo(data_ini, data_fim, tickers=None, threads: int = 8) -> dict:
+    """
+    Ingere os preços corrigidos de todos os tickers e grava o arquivo local.
+
+    As séries são baixadas em paralelo e gravadas direto na matriz mapeada em disco. A
+    matriz nova recebe um nome único e o índice é trocado por último, de forma atômica:
+    leitores com o arquivo anterior aberto continuam funcionando até reabri-lo.
+
+    Args:
+        data_ini (date): Data inicial do período ingerido.
+        data_fim (date): Data final do período ingerido.
+        tickers (list, opcional): Tickers a ingerir. Padrão: todos os vistos nos snapshots em disco.
+        threads (int, opcional): Consultas simultâneas à API. Padrão: 8.
+
+    Returns:
+        dict: Resumo da ingestão (pregões, tickers gravados e tickers sem dados).
+
+    Raises:
+        ValueError: Se não houver tickers ou nenhum preço for retornado.
+    """
+    tickers = sorted(set(tickers)) if tickers is not None else tickers_dos_snapshots()
+    if not tickers:
+        raise ValueError("Nenhum ticker para ingerir. Carregue snapshots do planilhão antes.")
+    logger.info(f"Ingerindo preços de {len(tickers)} tickers de {data_ini} a {data_fim} com {threads} threads.")
+
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="ingestao-precos") as pool:
+        series = dict(zip(tickers, pool.map(lambda t: _baixar_serie(t, data_ini, data_fim), tickers)))
+    sem_dados = [t for t, serie in series.items() if serie is None]
+    series = {t: serie for t, serie in series.items() if serie is not None}
+    if not series:
+        raise ValueError("Nenhum preço retornado pela API no período.")
+
+    datas = pd.DatetimeIndex(sorted(set().union(*(serie.index for serie in series.values()))))
+    nomes = list(series)
+
+    os.makedirs(ARQUIVO_PRECOS_DIR, exist_ok=True)
+    arquivo = f"fechamentos-{uuid.uuid4().hex[:12]}.f8"
+    fechamentos = np.memmap(
+        os.path.join(ARQUIVO_PRECOS_DIR, arquivo),
+        dtype=np.float64, mode="w+", shape=(len(datas), len(nomes)), order="F",
+    )
+    fechamentos[:] = np.nan
+    for j, ticker in enumerate(nomes):
+        serie = series[ticker]
+        fechamentos[datas.get_indexer(serie.index), j] = serie.to_numpy()
+    fechamentos.flush()
+    del fechamentos
+
+    caminho_indice = os.path.join(ARQUIVO_PRECOS_DIR, ARQUIVO_INDICE)
+    with open(caminho_indice + ".tmp", "w") as f:
+        json.dump({
+            "arquivo": arquivo,
+            "inicio": str(data_ini),
+            "fim": str(data_fim),
+            "datas": datas.strftime("%Y-%m-%d").tolist(),
+            "tickers": nomes,
+        }, f)
+    os.replace(caminho_indice + ".tmp", caminho_indice)
+
+    # Remove as matrizes de ingestões anteriores (leitores abertos mantêm o acesso até fechá-las).
+    for nome in os.listdir(ARQUIVO_PRECOS_DIR):
+        if nome.startswith("fechamentos-") and nome != arquivo:
+            os.remove(os.path.join(ARQUIVO_PRECOS_DIR, nome))
+
+    resumo = {"pregoes": len(datas), "tickers": len(nomes), "sem_dados": sem_dados}
+    logger.info(f"Arquivo de preços gravado em {ARQUIVO_PRECOS_DIR} | Pregões: {len(datas)}, "
+                f"Tickers: {len(nomes)}, Sem dados: {len(sem_dados)}")
+    return resumo
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingere os preços corrigidos do universo no arquivo local.")
+    parser.add_argument("--inicio", required=True, help="Data inicial (YYYY-MM-DD).")
+    parser.add_argument("--fim", required=True, help="Data final (YYYY-MM-DD).")
+    parser.add_argument("--threads", type=int, default=8, help="Consultas simultâneas à API.")
+    parser.add_argument("--tickers", nargs="*", help="Tickers a ingerir. Padrão: todos os dos snapshots em disco.")
+    args = parser.parse_args()
+
+    resumo = construir_arquivo(args.inicio, args.fim, args.tickers, args.threads)
+    print(f"Pregões: {resumo['pregoes']} | Tickers: {resumo['tickers']} | Sem dados: {len(resumo['sem_dados'])}")
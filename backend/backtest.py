@@ -0,0 +1,288 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import pandas as pd
+from backend.metricas import METRICAS, calcular_metricas
+from backend.ranking import selecionar_por_ranks
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Frequências de rebalanceamento, em número de meses entre dois rebalanceamentos.
+FREQUENCIAS = {"mensal": 1, "trimestral": 3, "semestral": 6, "anual": 12}
+
+# Dias úteis tentados a partir de cada data base mensal quando não há planilhão nela (por exemplo, em feriados).
+TENTATIVAS_DATA_BASE = 5
+
+# Visões NumPy dos blocos compartilhados, preenchidas em cada processo do pool por `_iniciar_processo`.
+_COMPARTILHADO = {}
+
+
+@dataclass
+class DadosBacktest:
+    """
+    Dados alinhados de um backtest, prontos para serem colocados em memória compartilhada.
+
+    Attributes:
+        precos (np.ndarray): Matriz data x ticker de fechamentos, com o Ibovespa na última coluna.
+        datas (pd.DatetimeIndex): Datas das linhas de `precos`.
+        ranks (np.ndarray): Índices de rankings de todos os snapshots, empilhados.
+        colunas (np.ndarray): Coluna de `precos` de cada linha de `ranks` (-1 se o ticker não tem preços).
+        inicios (np.ndarray): Linha de `ranks` onde começa cada snapshot (com o total ao final).
+        posicoes (np.ndarray): Linha de `precos` do primeiro pregão de cada data base.
+        meses (np.ndarray): Mês de calendário de cada data base (ano * 12 + mês).
+        datas_base (list): Datas base dos snapshots, em ordem.
+    """
+    precos: np.ndarray
+    datas: pd.DatetimeIndex
+    ranks: np.ndarray
+    colunas: np.ndarray
+    inicios: np.ndarray
+    posicoes: np.ndarray
+    meses: np.ndarray
+    datas_base: list
+
+
+def datas_mensais(data_ini, data_fim) -> list:
+    """
+    Gera as datas base mensais (primeiro dia útil de cada mês) de um período.
+
+    Args:
+        data_ini (date): Data inicial.
+        data_fim (date): Data final.
+
+    Returns:
+        list: Datas no formato 'YYYY-MM-DD'.
+    """
+    return [d.strftime("%Y-%m-%d") for d in pd.bdate_range(data_ini, data_fim, freq="BMS")]
+
+
+def carregar_snapshot_do_mes(data_base):
+    """
+    Carrega o snapshot da data base mensal ou, se não houver planilhão nela, do próximo dia útil do mesmo mês.
+
+    `datas_mensais` usa um calendário de segunda a sexta, sem feriados: em meses que começam
+    em feriado (como janeiro) a primeira data não tem planilhão. São tentados até
+    `TENTATIVAS_DATA_BASE` dias úteis, sem sair do mês.
+
+    Args:
+        data_base (str): Data base mensal no formato 'YYYY-MM-DD'.
+
+    Returns:
+        Snapshot: Snapshot do primeiro dia útil com planilhão.
+
+    Raises:
+        ValueError: Se nenhum dos dias tentados tiver planilhão.
+    """
+    from backend.snapshots import carregar_snapshot
+
+    inicio = pd.Timestamp(data_base)
+    for dia in pd.bdate_range(inicio, periods=TENTATIVAS_DATA_BASE):
+        if dia.month != inicio.month:
+            break
+        try:
+            return carregar_snapshot(dia.strftime("%Y-%m-%d"))
+        except ValueError:
+            logger.info(f"Sem planilhão em {dia.date()}; tentando o próximo dia útil.")
+    raise ValueError(f"Nenhum planilhão disponível nos primeiros dias úteis a partir de {data_base}.")
+
+
+def indices_rebalanceamento(meses: np.ndarray, frequencia: str) -> np.ndarray:
+    """
+    Posições das datas base em que a carteira é rebalanceada.
+
+    O calendário é contado em meses a partir da primeira data base, e não em snapshots
+    carregados: um mês sem snapshot não desloca os rebalanceamentos seguintes (a carteira
+    anterior é mantida até o próximo mês do calendário com snapshot).
+
+    Args:
+        meses (np.ndarray): Mês de calendário de cada data base (ano * 12 + mês), em ordem.
+        frequencia (str): Uma das frequências de `FREQUENCIAS`.
+
+    Returns:
+        np.ndarray: Posições em `meses` dos rebalanceamentos.
+    """
+    return np.flatnonzero((meses - meses[0]) % FREQUENCIAS[frequencia] == 0)
+
+
+def preparar_backtest(data_ini, data_fim, variantes) -> DadosBacktest:
+    """
+    Carrega os snapshots mensais do período e os preços de todos os tickers que alguma variante seleciona.
+
+    Args:
+        data_ini (date): Data inicial do backtest.
+        data_fim (date): Data final do backtest.
+        variantes (list): Tuplas (indicador_rent, indicador_desc, num, frequencia).
+
+    Returns:
+        DadosBacktest: Dados alinhados do backtest.
+
+    Raises:
+        ValueError: Se não houver snapshots ou preços no período.
+    """
+    # Importação tardia: os processos do pool importam este módulo e só precisam de NumPy.
+    from backend.views import pegar_df_preco_corrigido, pegar_df_preco_diversos
+    from backend.metricas import montar_matriz_precos
+
+    logger.info(f"Preparando backtest de {data_ini} a {data_fim} com {len(variantes)} variantes.")
+    snapshots = []
+    for data_base in datas_mensais(data_ini, data_fim):
+        try:
+            snapshots.append(carregar_snapshot_do_mes(data_base))
+        except ValueError:
+            logger.warning(f"Snapshot indisponível para a data base {data_base}. Data ignorada.")
+    if not snapshots:
+        raise ValueError("Nenhum snapshot disponível no período do backtest.")
+
+    # Só os tickers que alguma variante escolhe em alguma data precisam de preços.
+    tickers = set()
+    for snapshot in snapshots:
+        for indicador_rent, indicador_desc, num, _ in variantes:
+            linhas, _, _ = selecionar_por_ranks(snapshot.ranks, indicador_rent, indicador_desc, num)
+            tickers.update(snapshot.df["ticker"].iloc[linhas])
+    logger.info(f"Tickers distintos selecionados pelas variantes: {len(tickers)}")
+
+    matriz = montar_matriz_precos(
+        pegar_df_preco_corrigido(data_ini, data_fim, sorted(tickers)),
+        pegar_df_preco_diversos(data_ini, data_fim),
+    )
+    if matriz.empty:
+        raise ValueError("Nenhum preço disponível no período do backtest.")
+
+    coluna_por_ticker = {ticker: i for i, ticker in enumerate(matriz.columns[:-1])}
+    colunas = np.concatenate([
+        snapshot.df["ticker"].map(coluna_por_ticker).fillna(-1).to_numpy(dtype=np.int32)
+        for snapshot in snapshots
+    ])
+    inicios = np.cumsum([0] + [len(snapshot.df) for snapshot in snapshots])
+    datas_base = pd.to_datetime([snapshot.data_base for snapshot in snapshots])
+    posicoes = matriz.index.searchsorted(datas_base)
+
+    return DadosBacktest(
+        precos=matriz.to_numpy(dtype=np.float64),
+        datas=matriz.index,
+        ranks=np.concatenate([snapshot.ranks.astype(np.int32) for snapshot in snapshots]),
+        colunas=colunas,
+        inicios=inicios,
+        posicoes=posicoes,
+        meses=(datas_base.year * 12 + datas_base.month).to_numpy(),
+        datas_base=[snapshot.data_base for snapshot in snapshots],
+    )
+
+
+def _iniciar_processo(descritores, inicios, posicoes, meses, datas):
+    """Anexa os blocos de memória compartilhada e calcula os retornos diários uma vez por processo."""
+    blocos = {}
+    for nome, (nome_shm, forma, tipo) in descritores.items():
+        shm = SharedMemory(name=nome_shm)
+        blocos[nome] = shm  # Mantém a referência viva enquanto o processo existir.
+        _COMPARTILHADO[nome] = np.ndarray(forma, dtype=tipo, buffer=shm.buf)
+    _COMPARTILHADO["_blocos"] = blocos
+    precos = _COMPARTILHADO["precos"]
+    _COMPARTILHADO["retornos"] = precos[1:] / precos[:-1] - 1
+    _COMPARTILHADO["inicios"] = inicios
+    _COMPARTILHADO["posicoes"] = posicoes
+    _COMPARTILHADO["meses"] = meses
+    _COMPARTILHADO["datas"] = datas
+
+
+def _avaliar_variante(variante):
+    """Avalia uma variante da estratégia sobre os dados compartilhados e retorna uma linha do resumo."""
+    indicador_rent, indicador_desc, num, frequencia = variante
+    retornos = _COMPARTILHADO["retornos"]
+    ranks = _COMPARTILHADO["ranks"]
+    colunas = _COMPARTILHADO["colunas"]
+    inicios = _COMPARTILHADO["inicios"]
+    posicoes = _COMPARTILHADO["posicoes"]
+
+    rebalanceamentos = indices_rebalanceamento(_COMPARTILHADO["meses"], frequencia)
+    retorno_carteira = np.full(len(retornos), np.nan)
+    for i, s in enumerate(rebalanceamentos):
+        ini = posicoes[s]
+        fim = posicoes[rebalanceamentos[i + 1]] if i + 1 < len(rebalanceamentos) else len(retornos)
+        linhas, _, _ = selecionar_por_ranks(ranks[inicios[s]:inicios[s + 1]], indicador_rent, indicador_desc, num)
+        cols = colunas[inicios[s] + linhas]
+        cols = cols[cols >= 0]
+        if len(cols) == 0 or fim <= ini:
+            continue
+
+        # Carteira igualmente ponderada, como em `retornos_comparativo`.
+        bloco = retornos[ini:fim, cols]
+        validos = ~np.isnan(bloco)
+        contagem = validos.sum(axis=1)
+        soma = np.where(validos, bloco, 0.0).sum(axis=1)
+        retorno_carteira[ini:fim] = np.divide(soma, contagem, out=np.full(len(soma), np.nan), where=contagem > 0)
+
+    inicio = posicoes[0]
+    serie = pd.DataFrame(
+        {"Carteira": retorno_carteira[inicio:], "Ibovespa": retornos[inicio:, -1]},
+        index=_COMPARTILHADO["datas"][inicio + 1:],
+    )
+    linha = {
+        "indicador_rent": indicador_rent,
+        "indicador_desc": indicador_desc,
+        "num": num,
+        "frequencia": frequencia,
+        "Retorno total": np.nanprod(1 + serie["Carteira"].to_numpy()) - 1,
+    }
+    try:
+        linha.update(calcular_metricas(serie)["Carteira"].to_dict())
+    except ValueError:
+        linha.update({metrica: np.nan for metrica in METRICAS})
+    return linha
+
+
+def _compartilhar(arrays):
+    """Copia cada array para um bloco de memória compartilhada e retorna os blocos e seus descritores."""
+    blocos, descritores = [], {}
+    for nome, array in arrays.items():
+        shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+        blocos.append(shm)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+        descritores[nome] = (shm.name, array.shape, array.dtype.str)
+    return blocos, descritores
+
+
+def executar_backtest(dados: DadosBacktest, variantes, processos=None) -> pd.DataFrame:
+    """
+    Avalia variantes da estratégia `carteira` em paralelo, em um pool de processos.
+
+    A matriz de preços e os índices de rankings são copiados uma única vez para memória
+    compartilhada; cada processo apenas se anexa a eles, sem receber cópias por tarefa.
+
+    Args:
+        dados (DadosBacktest): Dados gerados por `preparar_backtest`.
+        variantes (list): Tuplas (indicador_rent, indicador_desc, num, frequencia).
+        processos (int, opcional): Tamanho do pool. Padrão: número de CPUs disponíveis.
+
+    Returns:
+        pd.DataFrame: Uma linha por variante com retorno total e métricas, ordenada pelo Sharpe.
+    """
+    processos = processos or os.cpu_count() or 1
+    logger.info(f"Executando backtest de {len(variantes)} variantes em {processos} processos.")
+    blocos, descritores = _compartilhar({
+        "precos": dados.precos,
+        "ranks": dados.ranks,
+        "colunas": dados.colunas,
+    })
+    try:
+        # "spawn" evita herdar as threads do servidor do Streamlit em um fork.
+        with ProcessPoolExecutor(
+            max_workers=processos,
+            mp_context=get_context("spawn"),
+            initializer=_iniciar_processo,
+            initargs=(descritores, dados.inicios, dados.posicoes, dados.meses, dados.datas),
+        ) as pool:
+            linhas = list(pool.map(_avaliar_variante, variantes, chunksize=max(1, len(variantes) // (4 * processos))))
+        resumo = pd.DataFrame(linhas).sort_values("Sharpe", ascending=False).reset_index(drop=True)
+        resumo.index = resumo.index + 1
+        logger.info(f"Backtest concluído. Variantes avaliadas: {len(resumo)}")
+        return resumo
+    except Exception as e:
+        logger.error(f"Erro ao executar backtest: {e}")
+        raise
+    finally:
+        for shm in blocos:
+            shm.close()
+            shm.unlink()
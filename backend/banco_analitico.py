@@ -0,0 +1,386 @@
+"""
+Banco analítico local (DuckDB) com os snapshots do planilhão e as séries de preços.
+
+Os dados são gravados à medida que `backend/views.py` os obtém da API, e ficam
+disponíveis para consultas SQL sobre muitas datas de uma vez, com varreduras colunares,
+sem carregar cada snapshot no pandas. As gravações entram em uma fila e são feitas por uma
+thread em segundo plano, fora do caminho das requisições.
+
+Importação dos snapshots já persistidos em disco (com o app parado, pois o DuckDB só
+permite um processo escrevendo no arquivo):
+    python -m backend.banco_analitico --importar-snapshots
+
+Consulta avulsa, que pode ser feita com o app em execução (lê uma cópia do banco):
+    python -m backend.banco_analitico --sql "SELECT COUNT(*) FROM precos"
+"""
+import argparse
+import atexit
+import os
+import queue
+import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
+import duckdb
+import pandas as pd
+from backend.config import BANCO_ANALITICO
+from backend.ranking import INDICADORES
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Colunas do planilhão guardadas no banco, na ordem da tabela.
+COLUNAS_PLANILHAO = ["data_base", "ticker", "empresa", "setor"] + INDICADORES + ["volume"]
+
+_ESQUEMA = f"""
+CREATE TABLE IF NOT EXISTS planilhao (
+    data_base DATE NOT NULL,
+    ticker VARCHAR NOT NULL,
+    empresa VARCHAR,
+    setor VARCHAR,
+    {", ".join(f"{coluna} DOUBLE" for coluna in INDICADORES)},
+    volume DOUBLE,
+    PRIMARY KEY (data_base, ticker)
+);
+CREATE TABLE IF NOT EXISTS precos (
+    ticker VARCHAR NOT NULL,
+    data DATE NOT NULL,
+    fechamento DOUBLE,
+    PRIMARY KEY (ticker, data)
+);
+"""
+
+# Conexão única do processo (o DuckDB permite um único processo escrevendo no arquivo).
+# Todo acesso (registro de DataFrames, gravações e consultas) passa pelo lock, pois a conexão
+# é compartilhada pelas sessões e pelas threads que carregam preços em paralelo.
+_conexao = None
+_lock = threading.Lock()
+
+# Gravações pendentes (tabela, dados), consumidas em lotes por uma única thread escritora.
+_fila = queue.Queue()
+_escritor = None
+_lock_escritor = threading.Lock()
+
+
+@contextmanager
+def _cursor():
+    """Abre (na primeira chamada) a conexão com o banco e fornece um cursor com acesso exclusivo ao banco."""
+    global _conexao
+    with _lock:
+        if _conexao is None:
+            logger.info(f"Abrindo banco analítico em {BANCO_ANALITICO}")
+            os.makedirs(os.path.dirname(os.path.abspath(BANCO_ANALITICO)), exist_ok=True)
+            conexao = duckdb.connect(BANCO_ANALITICO)
+            conexao.execute(_ESQUEMA)
+            _conexao = conexao
+        cursor = _conexao.cursor()
+        try:
+            yield cursor
+        finally:
+            cursor.close()
+
+
+def _gravar_planilhao(df: pd.DataFrame) -> bool:
+    """
+    Grava (ou substitui) o planilhão de uma ou mais datas base no banco.
+
+    As linhas são gravadas com `INSERT OR REPLACE` e, na mesma transação, os tickers que não
+    estão mais no planilhão de cada data base são apagados. Falhas de gravação desfazem a
+    transação e são registradas no log.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado, com a coluna 'data_base'.
+
+    Returns:
+        bool: True se o planilhão foi gravado.
+    """
+    if df.empty:
+        return False
+    try:
+        dados = df.reindex(columns=COLUNAS_PLANILHAO)
+        dados["data_base"] = pd.to_datetime(dados["data_base"]).dt.date
+        dados = dados.drop_duplicates(["data_base", "ticker"], keep="last")
+        with _cursor() as cursor:
+            cursor.register("dados", dados)
+            cursor.execute("BEGIN TRANSACTION")
+            try:
+                cursor.execute("INSERT OR REPLACE INTO planilhao SELECT * FROM dados")
+                cursor.execute("""
+                    DELETE FROM planilhao
+                    WHERE data_base IN (SELECT DISTINCT data_base FROM dados)
+                      AND NOT EXISTS (
+                          SELECT 1 FROM dados
+                          WHERE dados.data_base = planilhao.data_base AND dados.ticker = planilhao.ticker
+                      )
+                """)
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+        logger.info(f"Planilhão gravado no banco analítico | Linhas: {len(dados)}")
+        return True
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar o planilhão no banco analítico: {e}")
+        return False
+
+
+def _gravar_precos(df: pd.DataFrame):
+    """
+    Grava (ou substitui) fechamentos no banco, registrando no log as falhas de gravação.
+
+    Args:
+        df (pd.DataFrame): Colunas 'ticker', 'data' e 'fechamento'; em linhas repetidas vale a última.
+    """
+    try:
+        dados = pd.DataFrame({
+            "ticker": df["ticker"],
+            "data": pd.to_datetime(df["data"]).dt.date,
+            "fechamento": df["fechamento"].astype(float),
+        }).drop_duplicates(["ticker", "data"], keep="last")
+        with _cursor() as cursor:
+            cursor.register("dados", dados)
+            cursor.execute("INSERT OR REPLACE INTO precos SELECT ticker, data, fechamento FROM dados")
+        logger.info(f"Preços gravados no banco analítico | Linhas: {len(dados)}")
+    except Exception as e:
+        logger.warning(f"Não foi possível gravar os preços no banco analítico: {e}")
+
+
+def _gravar_pendentes():
+    """
+    Laço da thread escritora: grava as pendências da fila em lotes.
+
+    Os preços acumulados na fila são gravados em um único `INSERT`; os planilhões, um a um, na ordem de chegada.
+    """
+    while True:
+        lote = [_fila.get()]
+        while True:
+            try:
+                lote.append(_fila.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            for tabela, dados in lote:
+                if tabela == "planilhao":
+                    _gravar_planilhao(dados)
+            precos = [dados for tabela, dados in lote if tabela == "precos"]
+            if precos:
+                _gravar_precos(pd.concat(precos, ignore_index=True))
+        finally:
+            for _ in lote:
+                _fila.task_done()
+
+
+def _enfileirar(tabela: str, dados: pd.DataFrame):
+    """Coloca uma gravação na fila, iniciando a thread escritora na primeira chamada."""
+    global _escritor
+    with _lock_escritor:
+        if _escritor is None:
+            _escritor = threading.Thread(target=_gravar_pendentes, name="escritor-banco-analitico", daemon=True)
+            _escritor.start()
+            atexit.register(aguardar_gravacoes)
+    _fila.put((tabela, dados))
+
+
+def aguardar_gravacoes():
+    """Bloqueia até que todas as gravações enfileiradas tenham sido feitas (ou tenham falhado)."""
+    _fila.join()
+
+
+def guardar_planilhao(df: pd.DataFrame):
+    """
+    Agenda a gravação (ou substituição) do planilhão de uma ou mais datas base no banco.
+
+    A gravação é feita em segundo plano por `_gravar_planilhao`; falhas são registradas no
+    log e não interrompem quem obteve os dados.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado, com a coluna 'data_base'. Não deve ser alterado depois.
+    """
+    if not df.empty:
+        _enfileirar("planilhao", df)
+
+
+def guardar_precos(df: pd.DataFrame, ticker: str = None):
+    """
+    Agenda a gravação (ou substituição) de fechamentos no banco.
+
+    A gravação é feita em segundo plano, junto com as demais pendentes; falhas são
+    registradas no log e não interrompem quem obteve os dados.
+
+    Args:
+        df (pd.DataFrame): Preços no formato longo (colunas 'data', 'fechamento' e, se `ticker` não for dado, 'ticker').
+        ticker (str, opcional): Ticker de todas as linhas (por exemplo, 'ibov'). Padrão: coluna 'ticker' de `df`.
+    """
+    if df.empty:
+        return
+    if ticker is None:
+        dados = df[["ticker", "data", "fechamento"]]
+    else:
+        dados = df[["data", "fechamento"]].assign(ticker=ticker)
+    _enfileirar("precos", dados)
+
+
+def consultar(sql: str, parametros: list = None) -> pd.DataFrame:
+    """
+    Executa uma consulta SQL no banco analítico.
+
+    Args:
+        sql (str): Consulta sobre as tabelas `planilhao` e `precos`.
+        parametros (list, opcional): Valores dos marcadores `?` da consulta.
+
+    Returns:
+        pd.DataFrame: Resultado da consulta.
+    """
+    logger.info(f"Consultando banco analítico: {' '.join(sql.split())[:200]}")
+    try:
+        with _cursor() as cursor:
+            return cursor.execute(sql, parametros or []).df()
+    except Exception as e:
+        logger.error(f"Erro ao consultar o banco analítico: {e}")
+        raise
+
+
+def _validar_indicador(indicador: str):
+    """Garante que o indicador é uma coluna conhecida, já que nomes de colunas não podem ser parâmetros SQL."""
+    if indicador not in INDICADORES + ["volume"]:
+        raise ValueError(f"Indicador desconhecido: {indicador}")
+
+
+def datas_disponiveis() -> list:
+    """
+    Lista as datas base com planilhão no banco.
+
+    Returns:
+        list: Datas base no formato 'YYYY-MM-DD', em ordem cronológica.
+    """
+    datas = consultar("SELECT DISTINCT data_base FROM planilhao ORDER BY data_base")
+    return [d.strftime("%Y-%m-%d") for d in pd.to_datetime(datas["data_base"])]
+
+
+def ranking_historico(indicador: str, data_ini, data_fim, top: int = 10, maior_melhor: bool = True) -> pd.DataFrame:
+    """
+    Ranqueia as ações por um indicador em todas as datas base de um período, em uma única consulta.
+
+    Args:
+        indicador (str): Coluna do planilhão usada no ranking.
+        data_ini (date): Data base inicial.
+        data_fim (date): Data base final.
+        top (int, opcional): Quantidade de ações por data base. Padrão: 10.
+        maior_melhor (bool, opcional): Se True, maiores valores ficam nas primeiras posições. Padrão: True.
+
+    Returns:
+        pd.DataFrame: Colunas 'data_base', 'posicao', 'ticker', 'setor' e o indicador.
+    """
+    _validar_indicador(indicador)
+    ordem = "DESC" if maior_melhor else "ASC"
+    return consultar(f"""
+        SELECT data_base, posicao, ticker, setor, {indicador}
+        FROM (
+            SELECT data_base, ticker, setor, {indicador},
+                   ROW_NUMBER() OVER (PARTITION BY data_base ORDER BY {indicador} {ordem} NULLS LAST, ticker) AS posicao
+            FROM planilhao
+            WHERE data_base BETWEEN ? AND ?
+        )
+        WHERE posicao <= ?
+        ORDER BY data_base, posicao
+    """, [pd.Timestamp(data_ini).date(), pd.Timestamp(data_fim).date(), top])
+
+
+def resumo_setorial(indicador: str, data_ini, data_fim) -> pd.DataFrame:
+    """
+    Calcula a mediana de um indicador por setor em cada data base de um período.
+
+    Args:
+        indicador (str): Coluna do planilhão resumida.
+        data_ini (date): Data base inicial.
+        data_fim (date): Data base final.
+
+    Returns:
+        pd.DataFrame: Medianas indexadas por data base, uma coluna por setor.
+    """
+    _validar_indicador(indicador)
+    resumo = consultar(f"""
+        SELECT data_base, setor, MEDIAN({indicador}) AS mediana
+        FROM planilhao
+        WHERE data_base BETWEEN ? AND ?
+        GROUP BY data_base, setor
+    """, [pd.Timestamp(data_ini).date(), pd.Timestamp(data_fim).date()])
+    return resumo.pivot(index="data_base", columns="setor", values="mediana").sort_index()
+
+
+def retornos_periodo(data_ini, data_fim, tickers: list = None) -> pd.DataFrame:
+    """
+    Calcula o retorno de cada ticker entre o primeiro e o último fechamento guardados no período.
+
+    Args:
+        data_ini (date): Data inicial.
+        data_fim (date): Data final.
+        tickers (list, opcional): Tickers considerados. Padrão: todos os do banco.
+
+    Returns:
+        pd.DataFrame: Colunas 'ticker', 'primeira_data', 'ultima_data' e 'retorno', do maior retorno ao menor.
+    """
+    filtro = "AND ticker IN (SELECT UNNEST(?::VARCHAR[]))" if tickers else ""
+    parametros = [pd.Timestamp(data_ini).date(), pd.Timestamp(data_fim).date()] + ([list(tickers)] if tickers else [])
+    return consultar(f"""
+        SELECT ticker, MIN(data) AS primeira_data, MAX(data) AS ultima_data,
+               ARG_MAX(fechamento, data) / ARG_MIN(fechamento, data) - 1 AS retorno
+        FROM precos
+        WHERE data BETWEEN ? AND ? {filtro}
+        GROUP BY ticker
+        ORDER BY retorno DESC NULLS LAST
+    """, parametros)
+
+
+def consultar_copia(sql: str) -> pd.DataFrame:
+    """
+    Executa uma consulta SQL em uma cópia somente leitura do banco analítico.
+
+    O app em execução mantém o arquivo aberto para escrita, e o DuckDB não permite que outro
+    processo o abra ao mesmo tempo; a cópia (com o log de escrita pendente, se houver) evita o conflito.
+
+    Args:
+        sql (str): Consulta sobre as tabelas `planilhao` e `precos`.
+
+    Returns:
+        pd.DataFrame: Resultado da consulta.
+    """
+    with tempfile.TemporaryDirectory() as pasta:
+        copia = os.path.join(pasta, os.path.basename(BANCO_ANALITICO))
+        shutil.copyfile(BANCO_ANALITICO, copia)
+        if os.path.exists(BANCO_ANALITICO + ".wal"):
+            shutil.copyfile(BANCO_ANALITICO + ".wal", copia + ".wal")
+        conexao = duckdb.connect(copia, read_only=True)
+        try:
+            return conexao.execute(sql).df()
+        finally:
+            conexao.close()
+
+
+def importar_snapshots() -> int:
+    """
+    Grava no banco todos os snapshots do planilhão persistidos em disco.
+
+    Returns:
+        int: Quantidade de snapshots gravados com sucesso.
+    """
+    from backend.snapshots import ler_snapshot, listar_snapshots
+
+    importados = 0
+    for data_base in listar_snapshots():
+        snapshot = ler_snapshot(data_base)
+        if snapshot is not None and _gravar_planilhao(snapshot.df):
+            importados += 1
+    logger.info(f"Snapshots importados no banco analítico: {importados}")
+    return importados
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Banco analítico local com snapshots e preços.")
+    parser.add_argument("--importar-snapshots", action="store_true",
+                        help="Importa os snapshots persistidos em disco (com o app parado).")
+    parser.add_argument("--sql", help="Executa uma consulta SQL em uma cópia do banco e imprime o resultado.")
+    args = parser.parse_args()
+
+    if args.importar_snapshots:
+        print(f"Snapshots importados: {importar_snapshots()}")
+    if args.sql:
+        print(consultar_copia(args.sql).to_string())
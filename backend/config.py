@@ -11,6 +11,18 @@ FRONT_DIR = str(BASE_DIR / "frontend")
 # Diretório para os logs
 LOG_DIR = str(BASE_DIR / "logs")
 
+# Diretório para os snapshots do planilhão persistidos localmente
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", str(BASE_DIR / "dados" / "snapshots"))
+
+# Diretório do arquivo local de preços corrigidos de todo o universo
+ARQUIVO_PRECOS_DIR = os.getenv("ARQUIVO_PRECOS_DIR", str(BASE_DIR / "dados" / "precos"))
+
+# Arquivo do banco analítico local (DuckDB) com snapshots e preços
+BANCO_ANALITICO = os.getenv("BANCO_ANALITICO", str(BASE_DIR / "dados" / "analitico.duckdb"))
+
+# Consultas simultâneas à API ao carregar os preços de uma carteira
+CONSULTAS_SIMULTANEAS = int(os.getenv("CONSULTAS_SIMULTANEAS", "8"))
+
 # Criação da pasta de logs (caso não exista)
 os.makedirs(LOG_DIR, exist_ok=True)
 
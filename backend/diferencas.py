@@ -0,0 +1,148 @@
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from backend.ranking import INDICADORES, selecionar_por_ranks
+from backend.snapshots import Snapshot
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Situação de cada ticker entre as duas carteiras comparadas, na ordem em que são listadas.
+SITUACOES = np.array(["Entrada", "Saída", "Mantida"])
+
+
+@dataclass(frozen=True)
+class DiferencaCarteiras:
+    """
+    Diferença entre as carteiras da estratégia em duas datas base.
+
+    Attributes:
+        data_anterior (str): Data base da carteira anterior.
+        data_atual (str): Data base da carteira atual.
+        entradas (list): Tickers que entram na carteira.
+        saidas (list): Tickers que saem da carteira.
+        mantidas (list): Tickers presentes nas duas carteiras.
+        rotatividade (float): Fração da carteira negociada no rebalanceamento (entre 0 e 1), com pesos iguais.
+        detalhes (pd.DataFrame): Uma linha por ticker das duas carteiras, com a situação, o valor de
+            cada indicador nas duas datas e a variação.
+    """
+    data_anterior: str
+    data_atual: str
+    entradas: list
+    saidas: list
+    mantidas: list
+    rotatividade: float
+    detalhes: pd.DataFrame
+
+
+def _tickers_carteira(snapshot: Snapshot, indicador_rent, indicador_desc, num) -> np.ndarray:
+    """Tickers selecionados pela estratégia em um snapshot, a partir do índice de rankings."""
+    linhas, _, _ = selecionar_por_ranks(snapshot.ranks, indicador_rent, indicador_desc, num)
+    return snapshot.df["ticker"].to_numpy()[linhas]
+
+
+def _comparar_tickers(anteriores: np.ndarray, atuais: np.ndarray) -> tuple:
+    """
+    Junta os tickers das duas carteiras em um índice único e marca a presença de cada um em cada data.
+
+    O índice lista as entradas primeiro, depois as saídas e as mantidas, em ordem alfabética dentro de cada grupo.
+    """
+    tickers = np.union1d(anteriores, atuais)
+    em_anterior = np.isin(tickers, anteriores, assume_unique=True)
+    em_atual = np.isin(tickers, atuais, assume_unique=True)
+    codigos = np.where(em_anterior & em_atual, 2, np.where(em_atual, 0, 1))
+    ordem = np.argsort(codigos, kind="stable")
+    return tickers[ordem], em_anterior[ordem], em_atual[ordem], codigos[ordem]
+
+
+def _rotatividade(anteriores: np.ndarray, atuais: np.ndarray, em_anterior: np.ndarray, em_atual: np.ndarray) -> float:
+    """Metade da soma das variações absolutas de peso entre duas carteiras igualmente ponderadas."""
+    peso_anterior = np.where(em_anterior, 1 / max(len(anteriores), 1), 0.0)
+    peso_atual = np.where(em_atual, 1 / max(len(atuais), 1), 0.0)
+    return float(np.abs(peso_atual - peso_anterior).sum() / 2)
+
+
+def diferenca_snapshots(anterior: Snapshot, atual: Snapshot, indicador_rent, indicador_desc, num) -> DiferencaCarteiras:
+    """
+    Compara as carteiras da estratégia em dois snapshots do planilhão.
+
+    Os tickers das duas carteiras formam um único índice ordenado, e as linhas de cada
+    snapshot são localizadas nele com uma única busca por snapshot, sem juntar os
+    planilhões inteiros. Entradas, saídas e variações dos indicadores saem de operações
+    vetorizadas sobre esse índice.
+
+    Args:
+        anterior (Snapshot): Snapshot da data base anterior.
+        atual (Snapshot): Snapshot da data base atual.
+        indicador_rent (str): Indicador de rentabilidade da estratégia.
+        indicador_desc (str): Indicador de desconto da estratégia.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        DiferencaCarteiras: Entradas, saídas, rotatividade e variações dos indicadores.
+    """
+    anteriores = _tickers_carteira(anterior, indicador_rent, indicador_desc, num)
+    atuais = _tickers_carteira(atual, indicador_rent, indicador_desc, num)
+    tickers, em_anterior, em_atual, codigos = _comparar_tickers(anteriores, atuais)
+
+    # Linha de cada ticker em cada snapshot (-1 se ausente) e valores dos indicadores alinhados.
+    valores = []
+    for snapshot in (anterior, atual):
+        linhas = pd.Index(snapshot.df["ticker"]).get_indexer(tickers)
+        matriz = snapshot.df[INDICADORES].to_numpy(dtype=float)[linhas]
+        matriz[linhas < 0] = np.nan
+        valores.append(matriz)
+    variacao = valores[1] - valores[0]
+
+    detalhes = pd.DataFrame({"ticker": tickers, "situacao": SITUACOES[codigos]})
+    for j, indicador in enumerate(INDICADORES):
+        detalhes[f"{indicador}_anterior"] = valores[0][:, j]
+        detalhes[f"{indicador}_atual"] = valores[1][:, j]
+        detalhes[f"{indicador}_variacao"] = variacao[:, j]
+    detalhes.index = detalhes.index + 1
+
+    return DiferencaCarteiras(
+        anterior.data_base,
+        atual.data_base,
+        entradas=tickers[em_atual & ~em_anterior].tolist(),
+        saidas=tickers[em_anterior & ~em_atual].tolist(),
+        mantidas=tickers[em_anterior & em_atual].tolist(),
+        rotatividade=_rotatividade(anteriores, atuais, em_anterior, em_atual),
+        detalhes=detalhes,
+    )
+
+
+def historico_rotatividade(snapshots: list, indicador_rent, indicador_desc, num) -> pd.DataFrame:
+    """
+    Calcula a diferença entre as carteiras de cada par de snapshots consecutivos.
+
+    A carteira de cada snapshot é selecionada uma única vez e comparada com a do snapshot
+    seguinte, sem montar a tabela de indicadores de cada par.
+
+    Args:
+        snapshots (list): Snapshots em ordem cronológica.
+        indicador_rent (str): Indicador de rentabilidade da estratégia.
+        indicador_desc (str): Indicador de desconto da estratégia.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        pd.DataFrame: Uma linha por par, com as datas, a quantidade de entradas, saídas e mantidas,
+        a rotatividade e os tickers que entram e saem.
+    """
+    logger.info(f"Calculando rotatividade entre {max(len(snapshots) - 1, 0)} pares de snapshots.")
+    carteiras = [_tickers_carteira(s, indicador_rent, indicador_desc, num) for s in snapshots]
+    linhas = []
+    for i in range(1, len(snapshots)):
+        tickers, em_anterior, em_atual, _ = _comparar_tickers(carteiras[i - 1], carteiras[i])
+        linhas.append({
+            "data_anterior": snapshots[i - 1].data_base,
+            "data_atual": snapshots[i].data_base,
+            "entradas": int((em_atual & ~em_anterior).sum()),
+            "saidas": int((em_anterior & ~em_atual).sum()),
+            "mantidas": int((em_anterior & em_atual).sum()),
+            "rotatividade": _rotatividade(carteiras[i - 1], carteiras[i], em_anterior, em_atual),
+            "tickers_entrada": ", ".join(tickers[em_atual & ~em_anterior]),
+            "tickers_saida": ", ".join(tickers[em_anterior & ~em_atual]),
+        })
+    return pd.DataFrame(linhas, columns=[
+        "data_anterior", "data_atual", "entradas", "saidas", "mantidas",
+        "rotatividade", "tickers_entrada", "tickers_saida",
+    ])
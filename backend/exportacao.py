@@ -0,0 +1,48 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Formatos de exportação: extensão do arquivo e tipo MIME.
+FORMATOS = {
+    "Arrow IPC": ("arrow", "application/vnd.apache.arrow.file"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+@st.cache_resource(show_spinner=False, max_entries=32)
+def serializar_frame(_df: pd.DataFrame, chave: str, formato: str) -> bytes:
+    """
+    Serializa um DataFrame em Arrow IPC ou Parquet, com cache por chave e formato.
+
+    A conversão para Arrow reaproveita os buffers das colunas numéricas sem cópia, e o
+    arquivo é escrito direto em um buffer do Arrow, sem passar por texto. O DataFrame não
+    entra na chave do cache: `chave` deve identificar o seu conteúdo (por exemplo, a chave
+    do repositório de frames).
+
+    Args:
+        _df (pd.DataFrame): DataFrame a ser exportado.
+        chave (str): Identificação do conteúdo do DataFrame.
+        formato (str): Um dos formatos de `FORMATOS`.
+
+    Returns:
+        bytes: Conteúdo do arquivo exportado.
+    """
+    logger.info(f"Serializando DataFrame {chave} em {formato} | Linhas: {len(_df)}")
+    try:
+        tabela = pa.Table.from_pandas(_df, preserve_index=True)
+        destino = pa.BufferOutputStream()
+        if formato == "Arrow IPC":
+            with pa.ipc.new_file(destino, tabela.schema) as escritor:
+                escritor.write_table(tabela)
+        elif formato == "Parquet":
+            pq.write_table(tabela, destino)
+        else:
+            raise ValueError(f"Formato de exportação desconhecido: {formato}")
+        conteudo = destino.getvalue().to_pybytes()
+        logger.info(f"DataFrame {chave} serializado em {formato} | {len(conteudo) / 1e6:.2f} MB")
+        return conteudo
+    except Exception as e:
+        logger.error(f"Erro ao serializar DataFrame {chave} em {formato}: {e}")
+        raise
@@ -0,0 +1,160 @@
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+import pandas as pd
+import streamlit as st
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Orçamento de memória padrão do repositório, em megabytes.
+LIMITE_MEMORIA_MB = int(os.getenv("LIMITE_MEMORIA_FRAMES_MB", "512"))
+
+
+def hash_frame(df: pd.DataFrame) -> str:
+    """
+    Calcula um hash do conteúdo de um DataFrame (valores, índice e nomes das colunas).
+
+    Args:
+        df (pd.DataFrame): DataFrame a ser identificado.
+
+    Returns:
+        str: Hash hexadecimal do conteúdo.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(list(df.columns)).encode())
+    h.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+class RepositorioFrames:
+    """
+    Repositório de DataFrames compartilhado por todas as sessões do processo.
+
+    Cada DataFrame é guardado uma única vez, identificado pelo hash do seu conteúdo, e
+    conta quantas referências as sessões mantêm para ele. Quando o total de memória passa
+    do orçamento, os DataFrames sem referências são descartados do menos recentemente
+    usado para o mais recente. Os DataFrames retornados são compartilhados e não devem
+    ser modificados.
+    """
+
+    def __init__(self, limite_bytes: int):
+        self.limite_bytes = limite_bytes
+        self._frames = OrderedDict()  # chave -> [df, referências, bytes]
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def guardar(self, df: pd.DataFrame) -> str:
+        """
+        Guarda um DataFrame (ou reaproveita um idêntico já guardado) e registra uma referência a ele.
+
+        Args:
+            df (pd.DataFrame): DataFrame a ser guardado.
+
+        Returns:
+            str: Chave do DataFrame no repositório.
+        """
+        chave = hash_frame(df)
+        with self._lock:
+            if chave in self._frames:
+                self._frames[chave][1] += 1
+                self._frames.move_to_end(chave)
+                logger.info(f"DataFrame {chave} reaproveitado no repositório.")
+                return chave
+            tamanho = int(df.memory_usage(deep=True).sum())
+            self._frames[chave] = [df, 1, tamanho]
+            self._bytes += tamanho
+            logger.info(f"DataFrame {chave} guardado no repositório | {tamanho / 1e6:.1f} MB")
+            self._aplicar_limite()
+        return chave
+
+    def obter(self, chave: str):
+        """
+        Retorna o DataFrame de uma chave.
+
+        Args:
+            chave (str): Chave retornada por `guardar`.
+
+        Returns:
+            pd.DataFrame or None: DataFrame guardado, ou None se a chave não existir mais.
+        """
+        with self._lock:
+            entrada = self._frames.get(chave)
+            if entrada is None:
+                return None
+            self._frames.move_to_end(chave)
+            return entrada[0]
+
+    def liberar(self, chave: str):
+        """
+        Remove uma referência a uma chave. O DataFrame só é descartado quando o orçamento exigir.
+
+        Args:
+            chave (str): Chave retornada por `guardar`.
+        """
+        with self._lock:
+            entrada = self._frames.get(chave)
+            if entrada is not None and entrada[1] > 0:
+                entrada[1] -= 1
+            self._aplicar_limite()
+
+    def estatisticas(self) -> dict:
+        """
+        Resume o uso do repositório.
+
+        Returns:
+            dict: Quantidade de DataFrames, bytes ocupados, orçamento e referências ativas.
+        """
+        with self._lock:
+            return {
+                "frames": len(self._frames),
+                "bytes": self._bytes,
+                "limite_bytes": self.limite_bytes,
+                "referencias": sum(entrada[1] for entrada in self._frames.values()),
+            }
+
+    def _aplicar_limite(self):
+        """Descarta DataFrames sem referências, do menos recente ao mais recente, até caber no orçamento."""
+        if self._bytes <= self.limite_bytes:
+            return
+        for chave in [c for c, entrada in self._frames.items() if entrada[1] == 0]:
+            _, _, tamanho = self._frames.pop(chave)
+            self._bytes -= tamanho
+            logger.info(f"DataFrame {chave} descartado do repositório | {tamanho / 1e6:.1f} MB")
+            if self._bytes <= self.limite_bytes:
+                return
+        logger.warning(
+            f"Repositório de DataFrames acima do orçamento com todas as entradas referenciadas | "
+            f"{self._bytes / 1e6:.1f} MB de {self.limite_bytes / 1e6:.1f} MB"
+        )
+
+
+@st.cache_resource(show_spinner=False)
+def obter_repositorio() -> RepositorioFrames:
+    """
+    Retorna o repositório de DataFrames único do processo.
+
+    Returns:
+        RepositorioFrames: Repositório compartilhado entre as sessões.
+    """
+    logger.info(f"Criando repositório de DataFrames | Orçamento: {LIMITE_MEMORIA_MB} MB")
+    return RepositorioFrames(LIMITE_MEMORIA_MB * 1024 * 1024)
+
+
+class ReferenciaFrame:
+    """
+    Referência leve a um DataFrame do repositório, própria para ser guardada no `st.session_state`.
+
+    A referência é liberada automaticamente quando o objeto é coletado, por exemplo ao ser
+    substituído na sessão ou quando a sessão termina.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        repositorio = obter_repositorio()
+        self.chave = repositorio.guardar(df)
+        weakref.finalize(self, repositorio.liberar, self.chave)
+
+    @property
+    def df(self):
+        """DataFrame referenciado, ou None se tiver sido descartado do repositório."""
+        return obter_repositorio().obter(self.chave)
@@ -0,0 +1,150 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date, timedelta
+import pandas as pd
+from backend.metricas import montar_matriz_precos, retornos_comparativo
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Quantidade máxima de carteiras com estado guardado no processo.
+MAX_ESTADOS = 32
+
+
+@dataclass(frozen=True)
+class EstadoComparativo:
+    """
+    Último estado calculado do comparativo de uma carteira com o Ibovespa.
+
+    Attributes:
+        acoes (tuple): Tickers da carteira.
+        data_ini (date): Início do período coberto.
+        data_fim (date): Fim do período coberto.
+        df_carteira (pd.DataFrame): Preços corrigidos da carteira no período, no formato longo.
+        df_ibov (pd.DataFrame): Preços do Ibovespa no período.
+        ultimo_preco (pd.Series): Última linha da matriz de preços alinhada.
+        fator (pd.DataFrame): Fator de crescimento acumulado (produto de 1 + retorno) da carteira e do Ibovespa,
+            com uma linha por pregão a partir do primeiro (que vale 1).
+    """
+    acoes: tuple
+    data_ini: date
+    data_fim: date
+    df_carteira: pd.DataFrame
+    df_ibov: pd.DataFrame
+    ultimo_preco: pd.Series
+    fator: pd.DataFrame
+
+
+# Estados por carteira, compartilhados entre as sessões. Cada estado é imutável: extensões criam um novo.
+_estados = OrderedDict()
+_lock = threading.Lock()
+
+
+def _fator_acumulado(matriz: pd.DataFrame, fator_inicial) -> pd.DataFrame:
+    """Continua o produto acumulado de 1 + retorno a partir de `fator_inicial`."""
+    return fator_inicial * (1 + retornos_comparativo(matriz).fillna(0)).cumprod()
+
+
+def _carregar(data_ini, data_fim, acoes, ao_receber=None) -> EstadoComparativo:
+    """Consulta o período inteiro e calcula o estado do zero."""
+    from backend.views import pegar_precos_comparativo
+
+    logger.info(f"Carregando comparativo completo de {data_ini} a {data_fim} para: {list(acoes)}")
+    df_carteira, df_ibov = pegar_precos_comparativo(data_ini, data_fim, list(acoes), ao_receber)
+    if df_carteira.empty or df_ibov.empty:
+        raise ValueError("Nenhum preço foi encontrado para a carteira ou para o Ibovespa no período.")
+    matriz = montar_matriz_precos(df_carteira, df_ibov)
+    fator = _fator_acumulado(matriz, 1.0)
+    # O primeiro pregão não tem retorno, mas é a base do rebase quando o período começa nele.
+    primeiro = pd.DataFrame(1.0, index=matriz.index[:1], columns=fator.columns)
+    return EstadoComparativo(
+        acoes, data_ini, data_fim, df_carteira, df_ibov,
+        ultimo_preco=matriz.iloc[-1],
+        fator=pd.concat([primeiro, fator]),
+    )
+
+
+def _estender(estado: EstadoComparativo, data_fim, ao_receber=None) -> EstadoComparativo:
+    """Consulta apenas os dias após `estado.data_fim` e continua o produto acumulado a partir da cauda guardada."""
+    from backend.views import pegar_precos_comparativo
+
+    data_ini_nova = estado.data_fim + timedelta(days=1)
+    logger.info(f"Estendendo comparativo de {data_ini_nova} a {data_fim} para: {list(estado.acoes)}")
+    df_carteira_nova, df_ibov_nova = pegar_precos_comparativo(data_ini_nova, data_fim, list(estado.acoes), ao_receber)
+    if df_carteira_nova.empty and df_ibov_nova.empty:
+        logger.info("Nenhum pregão novo no período estendido.")
+        return EstadoComparativo(
+            estado.acoes, estado.data_ini, data_fim, estado.df_carteira, estado.df_ibov,
+            estado.ultimo_preco, estado.fator,
+        )
+
+    # A última linha de preços guardada ancora o retorno do primeiro pregão novo.
+    matriz_nova = montar_matriz_precos(df_carteira_nova, df_ibov_nova).reindex(columns=estado.ultimo_preco.index)
+    ancora = estado.ultimo_preco.to_frame().T
+    matriz_nova = pd.concat([ancora, matriz_nova]).ffill()
+
+    fator_anterior = estado.fator.iloc[-1] if len(estado.fator) else 1.0
+    return EstadoComparativo(
+        estado.acoes, estado.data_ini, data_fim,
+        pd.concat([estado.df_carteira, df_carteira_nova], ignore_index=True),
+        pd.concat([estado.df_ibov, df_ibov_nova], ignore_index=True),
+        ultimo_preco=matriz_nova.iloc[-1],
+        fator=pd.concat([estado.fator, _fator_acumulado(matriz_nova, fator_anterior)]),
+    )
+
+
+def _recortar(df: pd.DataFrame, data_ini, data_fim) -> pd.DataFrame:
+    """Linhas de um DataFrame de preços no formato longo dentro do período."""
+    datas = pd.to_datetime(df["data"])
+    return df[(datas >= pd.Timestamp(data_ini)) & (datas <= pd.Timestamp(data_fim))]
+
+
+def obter_comparativo(data_ini, data_fim, acoes_carteira, ao_receber=None) -> tuple:
+    """
+    Obtém os preços e o retorno acumulado da carteira e do Ibovespa, reaproveitando o último estado calculado.
+
+    - Período já coberto pelo estado guardado: recortado sem nenhuma consulta à API.
+    - Fim do período posterior ao guardado: apenas os dias novos são consultados e o
+      produto acumulado continua a partir da cauda guardada.
+    - Início anterior ao guardado, carteira sem estado ou estado sem preços de algum ticker
+      pedido (por exemplo, uma consulta que falhou): o período inteiro é consultado.
+
+    O retorno acumulado é rebaseado no primeiro pregão a partir de `data_ini`, como em um
+    cálculo do zero para o período pedido.
+    As consultas da carteira e do Ibovespa são feitas ao mesmo tempo (`pegar_precos_comparativo`).
+
+    Args:
+        data_ini (date): Data inicial do período.
+        data_fim (date): Data final do período.
+        acoes_carteira (list): Tickers da carteira.
+        ao_receber (callable, opcional): Repassado a `pegar_precos_comparativo` para acompanhar cada
+            preço recebido; não é chamado quando o período é atendido pelo estado guardado.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: Preços da carteira, preços do Ibovespa
+        e retorno acumulado (colunas 'Carteira' e 'Ibovespa').
+    """
+    acoes = tuple(acoes_carteira)
+    with _lock:
+        estado = _estados.get(acoes)
+
+    if estado is None or data_ini < estado.data_ini or not set(acoes) <= set(estado.df_carteira["ticker"]):
+        estado = _carregar(data_ini, data_fim, acoes, ao_receber)
+    elif data_fim > estado.data_fim:
+        estado = _estender(estado, data_fim, ao_receber)
+    else:
+        logger.info(f"Comparativo de {data_ini} a {data_fim} atendido pelo estado guardado.")
+
+    with _lock:
+        _estados[acoes] = estado
+        _estados.move_to_end(acoes)
+        while len(_estados) > MAX_ESTADOS:
+            _estados.popitem(last=False)
+
+    # Recorta o período pedido e rebaseia o fator acumulado no primeiro pregão a partir de data_ini.
+    fator = estado.fator[(estado.fator.index >= pd.Timestamp(data_ini)) & (estado.fator.index <= pd.Timestamp(data_fim))]
+    acumulado = fator.iloc[1:] / fator.iloc[0] - 1 if len(fator) else fator
+    return (
+        _recortar(estado.df_carteira, data_ini, data_fim),
+        _recortar(estado.df_ibov, data_ini, data_fim),
+        acumulado,
+    )
@@ -0,0 +1,211 @@
+import numpy as np
+import pandas as pd
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Número de pregões usado para anualizar retornos e volatilidades.
+DIAS_UTEIS_ANO = 252
+
+# Nome da coluna do benchmark na matriz de preços alinhada.
+COLUNA_IBOV = "IBOV"
+
+# Rótulos das métricas, na ordem em que são exibidas.
+METRICAS = [
+    "Retorno anualizado",
+    "Volatilidade anualizada",
+    "Máximo drawdown",
+    "Sharpe",
+    "Sortino",
+    "Beta",
+    "Tracking error",
+]
+
+
+def montar_matriz_precos(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame) -> pd.DataFrame:
+    """
+    Alinha os preços de fechamento da carteira e do Ibovespa em uma matriz data x ticker.
+
+    Args:
+        df_carteira (pd.DataFrame): Preços corrigidos no formato longo (colunas 'data', 'ticker', 'fechamento').
+        df_ibov (pd.DataFrame): Preços do Ibovespa (colunas 'data', 'fechamento').
+
+    Returns:
+        pd.DataFrame: Matriz com uma coluna por ticker e a coluna `COLUNA_IBOV` por último,
+        indexada por data e com lacunas preenchidas pelo último preço conhecido.
+    """
+    logger.info("Montando matriz de preços alinhada.")
+    try:
+        precos = (
+            df_carteira.pivot_table(index="data", columns="ticker", values="fechamento", aggfunc="last")
+            if not df_carteira.empty else pd.DataFrame()
+        )
+        ibov = (
+            df_ibov.groupby("data")["fechamento"].last() if not df_ibov.empty else pd.Series(dtype=float)
+        ).rename(COLUNA_IBOV)
+        matriz = precos.join(ibov, how="outer")
+        matriz.index = pd.to_datetime(matriz.index)
+        matriz = matriz.sort_index().ffill()
+        matriz.columns.name = None
+        logger.info(f"Matriz de preços montada. Dimensões: {matriz.shape}")
+        return matriz
+    except Exception as e:
+        logger.error(f"Erro ao montar matriz de preços: {e}")
+        raise
+
+
+def retornos_comparativo(matriz: pd.DataFrame, pesos: pd.Series = None) -> pd.DataFrame:
+    """
+    Calcula os retornos diários da carteira e do Ibovespa a partir da matriz de preços.
+
+    Args:
+        matriz (pd.DataFrame): Matriz gerada por `montar_matriz_precos`.
+        pesos (pd.Series, opcional): Peso de cada ticker da carteira, rebalanceada diariamente.
+            Padrão: carteira igualmente ponderada.
+
+    Returns:
+        pd.DataFrame: Colunas 'Carteira' e 'Ibovespa' com os retornos diários, indexadas por data.
+    """
+    valores = matriz.to_numpy(dtype=float)
+    retornos = valores[1:] / valores[:-1] - 1
+
+    # Média ponderada por data apenas dos tickers com cotação nos dois pregões.
+    acoes = retornos[:, :-1]
+    pesos_acoes = (
+        np.ones(acoes.shape[1]) if pesos is None
+        else pesos.reindex(matriz.columns[:-1], fill_value=0.0).to_numpy(dtype=float)
+    )
+    validos = ~np.isnan(acoes)
+    peso_valido = validos @ pesos_acoes
+    soma = np.where(validos, acoes, 0.0) @ pesos_acoes
+    carteira = np.divide(soma, peso_valido, out=np.full(len(soma), np.nan), where=peso_valido > 0)
+
+    return pd.DataFrame(
+        {"Carteira": carteira, "Ibovespa": retornos[:, -1]},
+        index=matriz.index[1:],
+    )
+
+
+def retorno_acumulado(retornos: pd.DataFrame) -> pd.DataFrame:
+    """
+    Calcula o retorno acumulado de cada série a partir dos retornos diários.
+
+    Args:
+        retornos (pd.DataFrame): Retornos diários gerados por `retornos_comparativo`.
+
+    Returns:
+        pd.DataFrame: Retorno acumulado desde o início do período, com as mesmas colunas.
+    """
+    return (1 + retornos.fillna(0)).cumprod() - 1
+
+
+def _max_drawdown(retornos: np.ndarray) -> np.ndarray:
+    """Máximo drawdown de cada coluna de uma matriz de retornos diários."""
+    riqueza = np.cumprod(1 + retornos, axis=0)
+    riqueza = np.vstack([np.ones((1, retornos.shape[1])), riqueza])
+    return (riqueza / np.maximum.accumulate(riqueza, axis=0) - 1).min(axis=0)
+
+
+def calcular_metricas(retornos: pd.DataFrame, taxa_livre_risco: float = 0.0) -> pd.DataFrame:
+    """
+    Calcula as métricas de risco e desempenho de cada série em relação ao Ibovespa.
+
+    Args:
+        retornos (pd.DataFrame): Retornos diários gerados por `retornos_comparativo`.
+        taxa_livre_risco (float, opcional): Taxa livre de risco anual usada no Sharpe e no Sortino. Padrão: 0.
+
+    Returns:
+        pd.DataFrame: Uma linha por métrica de `METRICAS` e uma coluna por série.
+    """
+    logger.info(f"Calculando métricas de risco e desempenho | Taxa livre de risco: {taxa_livre_risco}")
+    try:
+        r = retornos.dropna().to_numpy(dtype=float)
+        if len(r) < 2:
+            raise ValueError("Histórico insuficiente para calcular as métricas.")
+        n = len(r)
+        rf = (1 + taxa_livre_risco) ** (1 / DIAS_UTEIS_ANO) - 1
+        bench = r[:, [-1]]
+
+        excesso = r - rf
+        desvio = r.std(axis=0, ddof=1)
+        desvio_negativo = np.sqrt((np.minimum(excesso, 0) ** 2).mean(axis=0))
+        cov_bench = ((r - r.mean(axis=0)) * (bench - bench.mean())).sum(axis=0) / (n - 1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            metricas = np.vstack([
+                np.prod(1 + r, axis=0) ** (DIAS_UTEIS_ANO / n) - 1,
+                desvio * np.sqrt(DIAS_UTEIS_ANO),
+                _max_drawdown(r),
+                excesso.mean(axis=0) / desvio * np.sqrt(DIAS_UTEIS_ANO),
+                excesso.mean(axis=0) / desvio_negativo * np.sqrt(DIAS_UTEIS_ANO),
+                cov_bench / bench.var(ddof=1),
+                (r - bench).std(axis=0, ddof=1) * np.sqrt(DIAS_UTEIS_ANO),
+            ])
+
+        logger.info("Métricas de risco e desempenho calculadas com sucesso.")
+        return pd.DataFrame(metricas, index=METRICAS, columns=retornos.columns)
+    except Exception as e:
+        logger.error(f"Erro ao calcular métricas: {e}")
+        raise
+
+
+def calcular_metricas_moveis(retornos: pd.DataFrame, janela: int, taxa_livre_risco: float = 0.0) -> pd.DataFrame:
+    """
+    Calcula as métricas de `calcular_metricas` em janelas móveis de `janela` pregões.
+
+    As somas de cada janela são obtidas por diferenças de somas acumuladas, e o drawdown
+    por uma visão deslizante da curva de riqueza, sem laços em Python.
+
+    Args:
+        retornos (pd.DataFrame): Retornos diários gerados por `retornos_comparativo`.
+        janela (int): Tamanho da janela móvel em pregões.
+        taxa_livre_risco (float, opcional): Taxa livre de risco anual. Padrão: 0.
+
+    Returns:
+        pd.DataFrame: Colunas MultiIndex (métrica, série), indexadas pela data final de cada janela.
+    """
+    logger.info(f"Calculando métricas móveis | Janela: {janela} pregões")
+    try:
+        retornos = retornos.dropna()
+        r = retornos.to_numpy(dtype=float)
+        n, k = r.shape
+        if janela < 2 or n < janela:
+            raise ValueError(f"Histórico insuficiente para uma janela de {janela} pregões.")
+        rf = (1 + taxa_livre_risco) ** (1 / DIAS_UTEIS_ANO) - 1
+        bench = r[:, [-1]]
+        ativo = r - bench
+
+        def soma_movel(x):
+            acumulado = np.vstack([np.zeros((1, x.shape[1])), np.cumsum(x, axis=0)])
+            return acumulado[janela:] - acumulado[:-janela]
+
+        media = soma_movel(r) / janela
+        media_bench = media[:, [-1]]
+        var = (soma_movel(r ** 2) - janela * media ** 2) / (janela - 1)
+        cov_bench = (soma_movel(r * bench) - janela * media * media_bench) / (janela - 1)
+        var_ativo = (soma_movel(ativo ** 2) - soma_movel(ativo) ** 2 / janela) / (janela - 1)
+        desvio = np.sqrt(np.clip(var, 0, None))
+        desvio_negativo = np.sqrt(soma_movel(np.minimum(r - rf, 0) ** 2) / janela)
+        retorno_janela = np.exp(soma_movel(np.log1p(r))) - 1
+
+        # Drawdown de cada janela sobre a curva de riqueza relativa ao início da janela.
+        riqueza = np.vstack([np.ones((1, k)), np.cumprod(1 + r, axis=0)])
+        caminhos = np.lib.stride_tricks.sliding_window_view(riqueza, janela + 1, axis=0)
+        drawdown = (caminhos / np.maximum.accumulate(caminhos, axis=-1) - 1).min(axis=-1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            valores = [
+                (1 + retorno_janela) ** (DIAS_UTEIS_ANO / janela) - 1,
+                desvio * np.sqrt(DIAS_UTEIS_ANO),
+                drawdown,
+                (media - rf) / desvio * np.sqrt(DIAS_UTEIS_ANO),
+                (media - rf) / desvio_negativo * np.sqrt(DIAS_UTEIS_ANO),
+                cov_bench / var[:, [-1]],
+                np.sqrt(np.clip(var_ativo, 0, None)) * np.sqrt(DIAS_UTEIS_ANO),
+            ]
+
+        colunas = pd.MultiIndex.from_product([METRICAS, retornos.columns])
+        moveis = pd.DataFrame(np.hstack(valores), index=retornos.index[janela - 1:], columns=colunas)
+        logger.info(f"Métricas móveis calculadas com sucesso. Janelas: {len(moveis)}")
+        return moveis
+    except Exception as e:
+        logger.error(f"Erro ao calcular métricas móveis: {e}")
+        raise
@@ -0,0 +1,260 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import streamlit as st
+from backend.frames import hash_frame
+from backend.metricas import COLUNA_IBOV, montar_matriz_precos
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Métodos de ponderação da carteira, na ordem em que são exibidos.
+METODOS = ["Pesos iguais", "Mínima variância", "Paridade de risco"]
+
+# Janela padrão de estimação da covariância, em pregões.
+JANELA_ESTIMACAO = 252
+
+# Dias corridos por pregão, com folga para feriados, na conversão da janela em período de consulta.
+DIAS_POR_PREGAO = 1.5
+
+# Validade, em segundos, dos pesos em cache: uma consulta incompleta (por exemplo, com o
+# disjuntor da API aberto) não fica guardada indefinidamente.
+TTL_PESOS = 3600
+
+
+def covariancia_encolhida(retornos: np.ndarray) -> tuple:
+    """
+    Estima a matriz de covariância com encolhimento de Ledoit-Wolf em direção a um múltiplo da identidade.
+
+    A covariância amostral é instável quando o número de ações se aproxima do número de
+    pregões (e singular quando o ultrapassa). O encolhimento combina a amostral com a
+    variância média de forma a minimizar o erro quadrático esperado, o que mantém a
+    matriz bem condicionada para carteiras com centenas de ações.
+
+    Args:
+        retornos (np.ndarray): Retornos diários, uma linha por pregão e uma coluna por ação, sem lacunas.
+
+    Returns:
+        Tuple[np.ndarray, float]: Matriz de covariância encolhida e intensidade do encolhimento (entre 0 e 1).
+    """
+    t, n = retornos.shape
+    x = retornos - retornos.mean(axis=0)
+    amostral = x.T @ x / t
+    media_variancias = np.trace(amostral) / n
+    alvo = media_variancias * np.eye(n)
+
+    # Distância da amostral ao alvo e variância da estimativa amostral (normalizadas por n).
+    distancia = np.sum((amostral - alvo) ** 2) / n
+    normas = np.sum(x ** 2, axis=1)
+    dispersao = (np.sum(normas ** 2) / t - np.sum(amostral ** 2)) / (t * n)
+    intensidade = 1.0 if distancia <= 0 else min(dispersao, distancia) / distancia
+
+    return intensidade * alvo + (1 - intensidade) * amostral, float(intensidade)
+
+
+def _minima_variancia_restrita(cov: np.ndarray, livres: np.ndarray) -> np.ndarray:
+    """Pesos de mínima variância (somando 1, sem restrição de sinal) usando apenas as ações `livres`."""
+    solucao = np.linalg.solve(cov[np.ix_(livres, livres)], np.ones(len(livres)))
+    pesos = np.zeros(len(cov))
+    pesos[livres] = solucao / solucao.sum()
+    return pesos
+
+
+def pesos_minima_variancia(cov: np.ndarray, tolerancia: float = 1e-12) -> np.ndarray:
+    """
+    Calcula os pesos da carteira de mínima variância sem venda a descoberto.
+
+    Parte da solução fechada (pesos proporcionais a cov⁻¹·1), descartando as ações com peso
+    negativo até restarem apenas pesos positivos, e refina o resultado com o método de
+    conjunto ativo: ações fora da carteira cuja variância marginal seja menor que a das
+    ações dentro entram, e pesos que chegariam a zero saem, até as condições de otimalidade
+    serem satisfeitas.
+
+    Args:
+        cov (np.ndarray): Matriz de covariância n x n.
+        tolerancia (float, opcional): Tolerância relativa das condições de otimalidade. Padrão: 1e-12.
+
+    Returns:
+        np.ndarray: Pesos não negativos que somam 1.
+    """
+    n = len(cov)
+    livres = np.arange(n)
+    pesos = _minima_variancia_restrita(cov, livres)
+    while (pesos < 0).any():
+        livres = livres[pesos[livres] >= 0]
+        pesos = _minima_variancia_restrita(cov, livres)
+
+    livre = np.zeros(n, dtype=bool)
+    livre[livres] = True
+    for _ in range(10 * n):
+        marginal = cov @ pesos
+        nivel = marginal[livre].mean()
+        violacoes = ~livre & (marginal < nivel * (1 - tolerancia))
+        if not violacoes.any():
+            break
+        livre[np.argmin(np.where(violacoes, marginal, np.inf))] = True
+        while True:
+            candidato = _minima_variancia_restrita(cov, np.flatnonzero(livre))
+            if (candidato[livre] >= 0).all():
+                pesos = candidato
+                break
+            # Avança até o primeiro peso zerar e tira essa ação da carteira.
+            reduz = livre & (candidato < pesos)
+            fracoes = np.where(reduz, pesos / np.where(reduz, pesos - candidato, 1.0), np.inf)
+            fracao = fracoes.min()
+            pesos = pesos + fracao * (candidato - pesos)
+            livre &= pesos > 0
+            livre[np.argmin(fracoes)] = False
+            pesos[~livre] = 0.0
+    return pesos
+
+
+def pesos_paridade_risco(cov: np.ndarray, tolerancia: float = 1e-10, max_iteracoes: int = 100) -> np.ndarray:
+    """
+    Calcula os pesos de paridade de risco, em que cada ação contribui igualmente para a variância da carteira.
+
+    Usa o método de Newton na formulação convexa min ½·yᵀΣy − Σ log(yᵢ)/n, cuja solução,
+    normalizada para somar 1, iguala as contribuições de risco.
+
+    Args:
+        cov (np.ndarray): Matriz de covariância n x n.
+        tolerancia (float, opcional): Norma máxima do gradiente para considerar convergido. Padrão: 1e-10.
+        max_iteracoes (int, opcional): Limite de iterações de Newton. Padrão: 100.
+
+    Returns:
+        np.ndarray: Pesos positivos que somam 1.
+    """
+    n = len(cov)
+    alvo = np.full(n, 1 / n)
+    y = 1 / np.sqrt(np.diag(cov))
+    y *= np.sqrt(1 / (y @ cov @ y))
+    for _ in range(max_iteracoes):
+        gradiente = cov @ y - alvo / y
+        if np.linalg.norm(gradiente) < tolerancia:
+            break
+        passo = np.linalg.solve(cov + np.diag(alvo / y ** 2), gradiente)
+        # Reduz o passo até manter todos os pesos positivos.
+        fracao = 1.0
+        while np.any(y - fracao * passo <= 0):
+            fracao /= 2
+        y -= fracao * passo
+    return y / y.sum()
+
+
+def periodo_estimacao(data_ini, janela: int = JANELA_ESTIMACAO) -> tuple:
+    """
+    Período de consulta dos preços usados na estimação dos pesos: os dias anteriores a `data_ini`.
+
+    Estimar os pesos com os pregões do próprio período exibido usaria retornos que o
+    investidor ainda não conhecia na data inicial. O período cobre `janela` pregões com
+    folga; `calcular_pesos` usa apenas os últimos `janela`.
+
+    Args:
+        data_ini (date): Data inicial do período exibido.
+        janela (int, opcional): Quantidade de pregões usados na estimação. Padrão: `JANELA_ESTIMACAO`.
+
+    Returns:
+        Tuple[date, date]: Datas inicial e final da consulta.
+    """
+    return data_ini - timedelta(days=int(janela * DIAS_POR_PREGAO) + 10), data_ini - timedelta(days=1)
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def estimar_covariancia(_retornos: pd.DataFrame, chave: str) -> pd.DataFrame:
+    """
+    Estima, com cache por conteúdo, a covariância encolhida dos retornos da carteira.
+
+    Os retornos não entram diretamente na chave do cache: `chave` deve identificar o seu
+    conteúdo (por exemplo, `hash_frame` dos retornos). Os preços preenchidos com o último
+    valor conhecido alteram os retornos sem mudar as ações nem as datas da janela, por
+    isso a chave não pode depender apenas delas.
+
+    Args:
+        _retornos (pd.DataFrame): Retornos diários da janela, uma coluna por ação.
+        chave (str): Identificação do conteúdo dos retornos.
+
+    Returns:
+        pd.DataFrame: Matriz de covariância das ações com cotação na janela.
+    """
+    inicio, fim = _retornos.index[0], _retornos.index[-1]
+    logger.info(f"Estimando covariância de {_retornos.shape[1]} ações | Janela: {inicio.date()} a {fim.date()}")
+    try:
+        # Ações sem nenhuma cotação na janela ficam de fora; dias sem cotação contam como retorno zero.
+        retornos = _retornos.dropna(axis=1, how="all")
+        cov, intensidade = covariancia_encolhida(retornos.fillna(0).to_numpy(dtype=float))
+        logger.info(f"Covariância estimada | Ações: {cov.shape[0]}, Encolhimento: {intensidade:.3f}")
+        return pd.DataFrame(cov, index=retornos.columns, columns=retornos.columns)
+    except Exception as e:
+        logger.error(f"Erro ao estimar covariância: {e}")
+        raise
+
+
+def calcular_pesos(matriz: pd.DataFrame, metodo: str, janela: int = JANELA_ESTIMACAO) -> pd.Series:
+    """
+    Calcula os pesos das ações da carteira a partir dos últimos `janela` pregões da matriz de preços.
+
+    Para pesos sem viés de antecipação, a matriz deve conter apenas pregões anteriores ao
+    período em que a carteira é avaliada (ver `periodo_estimacao`).
+
+    Args:
+        matriz (pd.DataFrame): Matriz gerada por `montar_matriz_precos`.
+        metodo (str): Um dos métodos de `METODOS`.
+        janela (int, opcional): Quantidade de pregões usados na estimação. Padrão: `JANELA_ESTIMACAO`.
+
+    Returns:
+        pd.Series or None: Peso de cada ação (zero para as sem cotação na janela), ou None para pesos iguais.
+
+    Raises:
+        ValueError: Se o método for desconhecido ou o histórico tiver menos de dois pregões.
+    """
+    if metodo not in METODOS:
+        raise ValueError(f"Método de ponderação desconhecido: {metodo}")
+    if metodo == "Pesos iguais":
+        return None
+
+    precos = matriz.drop(columns=COLUNA_IBOV).iloc[-(janela + 1):]
+    if len(precos) < 3:
+        raise ValueError("Histórico insuficiente para estimar a covariância da carteira.")
+    retornos = precos.pct_change(fill_method=None).iloc[1:]
+    cov = estimar_covariancia(retornos, hash_frame(retornos))
+
+    if metodo == "Mínima variância":
+        pesos = pesos_minima_variancia(cov.to_numpy())
+    else:
+        pesos = pesos_paridade_risco(cov.to_numpy())
+    return pd.Series(pesos, index=cov.index).reindex(precos.columns, fill_value=0.0)
+
+
+@st.cache_data(show_spinner=False, max_entries=64, ttl=TTL_PESOS)
+def pesos_fora_da_amostra(acoes: tuple, data_ini, metodo: str, janela: int = JANELA_ESTIMACAO) -> tuple:
+    """
+    Calcula, com cache por carteira, data inicial, método e janela, os pesos estimados antes de `data_ini`.
+
+    Consulta os preços de `periodo_estimacao` e estima os pesos com `calcular_pesos`. Ações
+    sem cotação na janela de estimação (por exemplo, abertas depois dela) ficam com peso zero
+    e são devolvidas à parte, para que a página avise o usuário.
+
+    Args:
+        acoes (tuple): Ações da carteira.
+        data_ini (date): Data inicial do período exibido.
+        metodo (str): Um dos métodos de `METODOS`, exceto pesos iguais.
+        janela (int, opcional): Quantidade de pregões usados na estimação. Padrão: `JANELA_ESTIMACAO`.
+
+    Returns:
+        Tuple[pd.Series, tuple]: Peso de cada ação da carteira e ações sem histórico na janela de estimação.
+
+    Raises:
+        ValueError: Se não houver preços da carteira antes de `data_ini` ou o histórico for insuficiente.
+    """
+    from backend.views import pegar_precos_comparativo
+
+    df_historico, df_ibov_historico = pegar_precos_comparativo(*periodo_estimacao(data_ini, janela), list(acoes))
+    if df_historico.empty:
+        raise ValueError("Não há preços da carteira antes da data inicial para estimar os pesos.")
+    matriz = montar_matriz_precos(df_historico, df_ibov_historico)
+    pesos = calcular_pesos(matriz, metodo, janela).reindex(list(acoes), fill_value=0.0)
+
+    retornos = matriz.drop(columns=COLUNA_IBOV).iloc[-(janela + 1):].pct_change(fill_method=None)
+    cotadas = retornos.notna().any()
+    sem_historico = tuple(acao for acao in acoes if not cotadas.get(acao, False))
+    if sem_historico:
+        logger.warning(f"Ações sem histórico antes de {data_ini} ficam com peso zero: {list(sem_historico)}")
+    return pesos, sem_historico
@@ -0,0 +1,259 @@
+import numpy as np
+import pandas as pd
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Indicadores do planilhão que recebem ranking pré-calculado, na ordem das colunas do índice.
+INDICADORES = ["roc", "roe", "roic", "earning_yield", "dividend_yield", "p_vp"]
+
+# Indicadores em que o menor valor é o melhor (ranqueados em ordem crescente).
+INDICADORES_MENOR_MELHOR = {"p_vp"}
+
+# Quantidade de ações mantida em cada etapa de corte da estratégia.
+LIMITE_CORTE = 300
+
+# Direções aceitas para cada fator do ranking multifatorial.
+DIRECOES = {"maior": 1, "menor": -1}
+
+# Modos de ajuste setorial da estratégia, na ordem em que são exibidos.
+MODOS_SETOR = ["Sem ajuste", "Ranking dentro do setor", "Limite por setor", "Z-score neutro por setor"]
+
+# Valor absoluto máximo dos z-scores setoriais, para que um único outlier não domine a nota.
+LIMITE_ZSCORE = 3.0
+
+# Colunas do planilhão exibidas nas carteiras da estratégia.
+COLUNAS_CARTEIRA = ["ticker", "setor", "data_base"] + INDICADORES
+
+
+def construir_indice_ranks(df):
+    """
+    Calcula a posição de cada ticker no ranking de cada indicador de `INDICADORES`.
+
+    A posição 0 é a melhor. Empates recebem a mesma posição (a menor do grupo) e valores
+    ausentes ficam empatados depois de todos os válidos, como em `nlargest`/`nsmallest`.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado, com uma linha por ticker.
+
+    Returns:
+        np.ndarray: Matriz de inteiros (linhas de `df` x `INDICADORES`) no menor tipo que comporta `len(df)`.
+    """
+    logger.info(f"Construindo índice de rankings para {len(df)} tickers.")
+    n = len(df)
+    ranks = np.empty((n, len(INDICADORES)), dtype=np.min_scalar_type(n))
+    posicoes = np.arange(n)
+    for j, indicador in enumerate(INDICADORES):
+        valores = df[indicador].to_numpy(dtype=float)
+        ausentes = np.isnan(valores)
+        validos = np.flatnonzero(~ausentes)
+        ranks[ausentes, j] = len(validos)
+        chave = valores[validos] if indicador in INDICADORES_MENOR_MELHOR else -valores[validos]
+        ordem = np.argsort(chave, kind="stable")
+        ordenados = chave[ordem]
+
+        # Em cada grupo de valores iguais, todos recebem a posição do primeiro elemento.
+        inicio_grupo = np.r_[True, ordenados[1:] != ordenados[:-1]]
+        ranks[validos[ordem], j] = np.maximum.accumulate(np.where(inicio_grupo, posicoes[:len(validos)], 0))
+    logger.info("Índice de rankings construído com sucesso.")
+    return ranks
+
+
+def selecionar_por_ranks(ranks, indicador_rent, indicador_desc, num, limite=LIMITE_CORTE):
+    """
+    Reproduz a seleção de `carteira` a partir do índice de rankings pré-calculado.
+
+    Apenas as linhas que passam no corte de rentabilidade (no máximo algumas centenas)
+    são ordenadas; o universo inteiro é percorrido só por máscaras.
+
+    Args:
+        ranks (np.ndarray): Índice gerado por `construir_indice_ranks`.
+        indicador_rent (str): Indicador de rentabilidade.
+        indicador_desc (str): Indicador de desconto.
+        num (int): Número de ações a serem selecionadas.
+        limite (int, opcional): Tamanho de cada corte. Padrão: `LIMITE_CORTE`.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: Linhas selecionadas (na ordem final),
+        posição no corte de rentabilidade e posição no corte de desconto de cada uma.
+    """
+    rank_rent = ranks[:, INDICADORES.index(indicador_rent)].astype(np.int64)
+    rank_desc = ranks[:, INDICADORES.index(indicador_desc)].astype(np.int64)
+
+    # Corte de rentabilidade: empates na fronteira são resolvidos pela ordem original das linhas.
+    candidatos = np.flatnonzero(rank_rent < limite)
+    candidatos = candidatos[np.argsort(rank_rent[candidatos], kind="stable")][:limite]
+    index_rent = np.arange(len(candidatos))
+
+    # Corte de desconto entre os candidatos, com empates mantendo a ordem de rentabilidade.
+    ordem = np.argsort(rank_desc[candidatos], kind="stable")[:limite]
+    candidatos, index_rent = candidatos[ordem], index_rent[ordem]
+    index_desc = np.arange(len(candidatos))
+
+    # Soma dos rankings e seleção das `num` melhores.
+    escolhidos = np.argsort(index_rent + index_desc, kind="stable")[:num]
+    return candidatos[escolhidos], index_rent[escolhidos], index_desc[escolhidos]
+
+
+def _maiores_notas(nota: np.ndarray, num: int) -> np.ndarray:
+    """
+    Posições das `num` maiores notas, em ordem decrescente de nota e, nos empates, de posição.
+
+    A seleção parcial só encontra a nota de corte; todas as notas iguais ou acima dela
+    entram na ordenação, para que empates no corte sejam decididos pela posição e o
+    resultado seja igual ao de uma ordenação estável completa.
+    """
+    num = min(num, len(nota))
+    if num <= 0:
+        return np.array([], dtype=int)
+    corte = -np.partition(-nota, num - 1)[num - 1]
+    candidatos = np.flatnonzero(nota >= corte)
+    return candidatos[np.lexsort((candidatos, -nota[candidatos]))][:num]
+
+
+def ranking_multifatorial(df, fatores, num, setores=None, volume_minimo=None):
+    """
+    Ranqueia o universo combinando qualquer número de colunas do planilhão, cada uma com direção e peso.
+
+    Os percentis de todas as colunas são calculados em uma única chamada vetorizada sobre o
+    universo inteiro (empates recebem o percentil médio e valores ausentes o pior percentil),
+    e a nota de cada ação é a média dos percentis ponderada pelos pesos. Os filtros de setor
+    e de liquidez mínima só restringem quais ações podem ser selecionadas: a nota de uma ação
+    não muda com os filtros escolhidos.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado.
+        fatores (list): Tuplas (coluna, direcao, peso), com direcao em `DIRECOES` e peso positivo.
+        num (int): Número de ações a serem selecionadas.
+        setores (list, opcional): Setores aceitos. Padrão: todos.
+        volume_minimo (float, opcional): Volume mínimo negociado. Padrão: sem filtro.
+
+    Returns:
+        pd.DataFrame: Ações selecionadas, com os percentis de cada fator e a coluna 'nota', indexadas a partir de 1.
+
+    Raises:
+        ValueError: Se os fatores forem inválidos ou nenhuma ação passar pelos filtros.
+    """
+    logger.info(f"Calculando ranking multifatorial | Fatores: {fatores} | Num: {num} | "
+                f"Setores: {setores} | Volume mínimo: {volume_minimo}")
+    if not fatores:
+        raise ValueError("Informe ao menos um fator para o ranking.")
+    colunas = [coluna for coluna, _, _ in fatores]
+    if len(set(colunas)) != len(colunas):
+        raise ValueError("Cada coluna só pode aparecer uma vez entre os fatores.")
+    for coluna, direcao, peso in fatores:
+        if coluna not in df.columns:
+            raise ValueError(f"Coluna inexistente no planilhão: {coluna}")
+        if direcao not in DIRECOES:
+            raise ValueError(f"Direção inválida para {coluna}: {direcao}")
+        if peso <= 0:
+            raise ValueError(f"O peso de {coluna} deve ser positivo.")
+
+    # Filtros de setor e liquidez com máscaras sobre o universo inteiro.
+    filtro = np.ones(len(df), dtype=bool)
+    if setores:
+        filtro &= df["setor"].isin(setores).to_numpy()
+    if volume_minimo is not None:
+        filtro &= (df["volume"].to_numpy(dtype=float) >= volume_minimo)
+    elegiveis = np.flatnonzero(filtro)
+    if not len(elegiveis):
+        raise ValueError("Nenhuma ação passou pelos filtros de setor e liquidez.")
+
+    # Percentis de todos os fatores em uma única passada sobre o universo inteiro; 1 é o melhor.
+    sinais = np.array([DIRECOES[direcao] for _, direcao, _ in fatores], dtype=float)
+    pesos = np.array([peso for _, _, peso in fatores], dtype=float)
+    percentis = (df[colunas].astype(float) * sinais).rank(pct=True).fillna(0.0).to_numpy()
+    nota = percentis @ (pesos / pesos.sum())
+
+    escolhidos = elegiveis[_maiores_notas(nota[elegiveis], num)]
+
+    resultado = df.iloc[escolhidos][["ticker", "setor", "data_base", "volume"] + colunas].reset_index(drop=True)
+    for i, coluna in enumerate(colunas):
+        resultado[f"pct_{coluna}"] = percentis[escolhidos, i]
+    resultado["nota"] = nota[escolhidos]
+    resultado.index = resultado.index + 1
+    logger.info(f"Ranking multifatorial calculado. Universo: {len(df)} | Elegíveis: {len(elegiveis)} | "
+                f"Selecionadas: {len(resultado)}")
+    return resultado
+
+
+def _valores_orientados(df, indicadores) -> pd.DataFrame:
+    """Valores dos indicadores com sinal invertido nos de menor-melhor, para que maior seja sempre melhor."""
+    sinais = np.array([-1.0 if i in INDICADORES_MENOR_MELHOR else 1.0 for i in indicadores])
+    return df[indicadores].astype(float) * sinais
+
+
+def ranking_setorial(df, ranks, indicador_rent, indicador_desc, num, modo, limite_setor=None):
+    """
+    Seleciona a carteira da estratégia levando em conta o setor de cada ação.
+
+    Todos os modos são operações agrupadas por setor sobre o snapshot inteiro, em uma única passada:
+        - "Ranking dentro do setor": percentis de rentabilidade e de desconto calculados dentro
+          de cada setor como (posição - 0,5) / tamanho do setor; a nota é a média dos dois. Os
+          líderes de setores grandes competem igualmente, e setores pequenos não dão nota máxima
+          a quem é o único do setor (uma ação sozinha fica no percentil 0,5).
+        - "Limite por setor": a seleção padrão (`selecionar_por_ranks`) com no máximo
+          `limite_setor` ações de cada setor, mantendo a ordem da estratégia.
+        - "Z-score neutro por setor": os indicadores são padronizados pela média e pelo
+          desvio do setor (limitados a ±`LIMITE_ZSCORE`), e a nota é a soma dos dois z-scores.
+
+    Ações sem setor formam um grupo próprio em todos os modos.
+
+    Args:
+        df (pd.DataFrame): Planilhão processado.
+        ranks (np.ndarray): Índice gerado por `construir_indice_ranks` para `df`.
+        indicador_rent (str): Indicador de rentabilidade.
+        indicador_desc (str): Indicador de desconto.
+        num (int): Número de ações a serem selecionadas.
+        modo (str): Um dos modos de `MODOS_SETOR`, exceto "Sem ajuste".
+        limite_setor (int, opcional): Máximo de ações por setor, usado no modo "Limite por setor".
+
+    Returns:
+        pd.DataFrame: Ações selecionadas com as colunas de `COLUNAS_CARTEIRA` e as notas do modo, indexadas a partir de 1.
+
+    Raises:
+        ValueError: Se o modo for desconhecido ou o limite por setor não for positivo.
+    """
+    logger.info(f"Calculando ranking setorial | Modo: {modo} | Indicadores: {indicador_rent}, {indicador_desc} | "
+                f"Num: {num} | Limite por setor: {limite_setor}")
+    if modo not in MODOS_SETOR[1:]:
+        raise ValueError(f"Modo setorial desconhecido: {modo}")
+    setores = df["setor"].to_numpy()
+
+    if modo == "Limite por setor":
+        if not limite_setor or limite_setor < 1:
+            raise ValueError("O limite de ações por setor deve ser positivo.")
+        # Ordem completa da estratégia e posição de cada ação dentro do seu setor nessa ordem.
+        linhas, index_rent, index_desc = selecionar_por_ranks(ranks, indicador_rent, indicador_desc, len(df))
+        posicao_setor = (
+            pd.Series(setores[linhas]).groupby(setores[linhas], sort=False, dropna=False).cumcount().to_numpy()
+        )
+        escolhidos = np.flatnonzero(posicao_setor < limite_setor)[:num]
+        resultado = df.iloc[linhas[escolhidos]][COLUNAS_CARTEIRA].reset_index(drop=True)
+        resultado["index_rent"] = index_rent[escolhidos]
+        resultado["index_desc"] = index_desc[escolhidos]
+        resultado["media"] = resultado["index_rent"] + resultado["index_desc"]
+        resultado["posicao_setor"] = posicao_setor[escolhidos] + 1
+    else:
+        valores = _valores_orientados(df, [indicador_rent, indicador_desc])
+        grupos = valores.groupby(setores, sort=False, dropna=False)
+        if modo == "Ranking dentro do setor":
+            # Percentis no setor, próximos de 1 para os melhores; valores ausentes recebem o pior percentil.
+            notas = ((grupos.rank() - 0.5) / grupos.transform("count")).fillna(0.0)
+            nomes = [f"pct_setor_{indicador_rent}", f"pct_setor_{indicador_desc}"]
+            nota = notas.to_numpy().mean(axis=1)
+        else:
+            # Setores com uma única ação ou sem dispersão ficam com z-score zero; ausentes recebem o pior valor.
+            desvios = grupos.transform("std", ddof=0).replace(0.0, np.nan)
+            notas = ((valores - grupos.transform("mean")) / desvios).clip(-LIMITE_ZSCORE, LIMITE_ZSCORE)
+            notas = notas.mask(notas.isna() & valores.notna(), 0.0).fillna(-LIMITE_ZSCORE)
+            nomes = [f"z_{indicador_rent}", f"z_{indicador_desc}"]
+            nota = notas.to_numpy().sum(axis=1)
+        escolhidos = _maiores_notas(nota, num)
+        resultado = df.iloc[escolhidos][COLUNAS_CARTEIRA].reset_index(drop=True)
+        for j, nome in enumerate(nomes):
+            resultado[nome] = notas.to_numpy()[escolhidos, j]
+        resultado["nota"] = nota[escolhidos]
+
+    resultado.index = resultado.index + 1
+    logger.info(f"Ranking setorial calculado | Selecionadas: {len(resultado)} | "
+                f"Setores: {resultado['setor'].nunique()}")
+    return resultado
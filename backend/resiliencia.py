@@ -0,0 +1,124 @@
+import threading
+import time
+from collections import OrderedDict
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+
+class DisjuntorCircuito:
+    """
+    Disjuntor (circuit breaker) para chamadas a um serviço externo.
+
+    Depois de `limite_falhas` falhas consecutivas o circuito abre e as chamadas falham
+    imediatamente durante `tempo_aberto` segundos. Passado esse tempo, uma única chamada
+    de teste é liberada: se der certo o circuito fecha, se falhar ele abre de novo.
+    """
+
+    FECHADO, ABERTO, MEIO_ABERTO = "fechado", "aberto", "meio-aberto"
+
+    def __init__(self, limite_falhas: int, tempo_aberto: float):
+        self.limite_falhas = limite_falhas
+        self.tempo_aberto = tempo_aberto
+        self.estado = self.FECHADO
+        self._falhas = 0
+        self._aberto_em = 0.0
+        self._lock = threading.Lock()
+
+    def permite(self) -> bool:
+        """
+        Indica se uma chamada pode ser feita agora.
+
+        Returns:
+            bool: False enquanto o circuito estiver aberto ou já houver uma chamada de teste em andamento.
+        """
+        with self._lock:
+            if self.estado == self.FECHADO:
+                return True
+            if self.estado == self.ABERTO and time.monotonic() - self._aberto_em >= self.tempo_aberto:
+                self.estado = self.MEIO_ABERTO
+                logger.info("Disjuntor meio-aberto: liberando chamada de teste.")
+                return True
+            return False
+
+    def registrar_sucesso(self):
+        """Registra uma chamada bem-sucedida e fecha o circuito."""
+        with self._lock:
+            if self.estado != self.FECHADO:
+                logger.info("Disjuntor fechado: serviço voltou a responder.")
+            self.estado = self.FECHADO
+            self._falhas = 0
+
+    def registrar_falha(self):
+        """Registra uma falha e abre o circuito se o limite for atingido ou a chamada de teste falhar."""
+        with self._lock:
+            self._falhas += 1
+            if self.estado == self.MEIO_ABERTO or self._falhas >= self.limite_falhas:
+                if self.estado != self.ABERTO:
+                    logger.warning(f"Disjuntor aberto após {self._falhas} falhas consecutivas.")
+                self.estado = self.ABERTO
+                self._aberto_em = time.monotonic()
+
+
+class CacheRespostas:
+    """
+    Cache em memória das últimas respostas válidas de cada consulta, com o instante em que foram obtidas.
+
+    Limitado a `max_entradas`, descartando as menos recentemente usadas. Cada resposta guardada
+    fica marcada como nova até ser retirada uma vez com `retirar_novidade`, o que permite
+    distinguir a primeira entrega de uma resposta obtida da API das entregas seguintes.
+    """
+
+    def __init__(self, max_entradas: int):
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()  # chave -> (instante, dados)
+        self._novas = set()  # chaves cuja resposta guardada ainda não foi entregue
+        self._lock = threading.Lock()
+
+    def obter(self, chave):
+        """
+        Retorna a resposta guardada e há quantos segundos foi obtida.
+
+        Args:
+            chave (tuple): Identificação da consulta.
+
+        Returns:
+            Tuple[object, float] or None: Dados e idade em segundos, ou None se não houver resposta guardada.
+        """
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+            self._entradas.move_to_end(chave)
+            instante, dados = entrada
+            return dados, time.monotonic() - instante
+
+    def guardar(self, chave, dados):
+        """
+        Guarda uma resposta válida.
+
+        Args:
+            chave (tuple): Identificação da consulta.
+            dados (object): Resposta da API.
+        """
+        with self._lock:
+            self._entradas[chave] = (time.monotonic(), dados)
+            self._entradas.move_to_end(chave)
+            self._novas.add(chave)
+            while len(self._entradas) > self.max_entradas:
+                descartada, _ = self._entradas.popitem(last=False)
+                self._novas.discard(descartada)
+
+    def retirar_novidade(self, chave) -> bool:
+        """
+        Indica se a resposta guardada para a consulta ainda não havia sido entregue, e a marca como entregue.
+
+        Args:
+            chave (tuple): Identificação da consulta.
+
+        Returns:
+            bool: True apenas na primeira chamada após cada `guardar` da consulta.
+        """
+        with self._lock:
+            if chave in self._novas:
+                self._novas.remove(chave)
+                return True
+            return False
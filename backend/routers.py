@@ -1,10 +1,20 @@
 from backend.views import (
-    pegar_df_planilhao,
     carteira,
+    carteira_multifatorial,
+    diferenca_carteiras,
+    rotatividade_carteiras,
     pegar_df_preco_corrigido,
     pegar_df_preco_diversos,
-    plot_comparativo_acumulado
+    plot_comparativo_acumulado,
+    metricas_comparativo
 )
+from backend.snapshots import carregar_snapshot
+from backend.banco_analitico import ranking_historico, resumo_setorial
+from backend.ranking import INDICADORES_MENOR_MELHOR, MODOS_SETOR
+from backend.backtest import preparar_backtest, executar_backtest
+from backend.incremental import obter_comparativo
+from backend.otimizacao import pesos_fora_da_amostra
+from backend.metricas import COLUNA_IBOV, retornos_comparativo, retorno_acumulado
 from log_config.logging_config import logger  # Importa o logger centralizado
 
 def menu_planilhao(data_base):
@@ -22,7 +32,7 @@ def menu_planilhao(data_base):
     """
     logger.info(f"Iniciando consulta ao planilhão para a data base: {data_base}")
     try:
-        df = pegar_df_planilhao(data_base)
+        df = carregar_snapshot(data_base).df
         if df is None or df.empty:
             logger.warning(f"Nenhum dado retornado para a data base: {data_base}")
             raise ValueError("Nenhum dado foi encontrado para o Planilhão.")
@@ -33,7 +43,40 @@ def menu_planilhao(data_base):
         raise
 
 
-def menu_estrategia(data, indicador_rent, indicador_desc, num):
+def menu_historico_planilhao(indicador, data_ini, data_fim, top):
+    """
+    Consulta no banco analítico o ranking de um indicador e a sua mediana por setor em todas as datas base de um período.
+
+    Args:
+        indicador (str): Indicador do planilhão.
+        data_ini (date): Data base inicial.
+        data_fim (date): Data base final.
+        top (int): Quantidade de ações por data base no ranking.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Ranking por data base e medianas por setor.
+
+    Raises:
+        ValueError: Se o período for inválido ou não houver dados no banco para ele.
+    """
+    logger.info(f"Iniciando consulta histórica | Indicador: {indicador} | Período: {data_ini} - {data_fim} | Top: {top}")
+    try:
+        if data_ini > data_fim:
+            logger.error("Data inicial posterior à data final.")
+            raise ValueError("A data inicial deve ser anterior à data final.")
+        ranking = ranking_historico(indicador, data_ini, data_fim, top, maior_melhor=indicador not in INDICADORES_MENOR_MELHOR)
+        if ranking.empty:
+            logger.warning("Nenhum planilhão no banco analítico para o período.")
+            raise ValueError("Nenhum planilhão consultado neste período. Busque algumas datas base antes.")
+        medianas = resumo_setorial(indicador, data_ini, data_fim)
+        logger.info(f"Consulta histórica concluída | Datas base: {ranking['data_base'].nunique()}")
+        return ranking, medianas
+    except Exception as e:
+        logger.error(f"Erro na consulta histórica do planilhão | {e}")
+        raise
+
+
+def menu_estrategia(data, indicador_rent, indicador_desc, num, modo_setor=MODOS_SETOR[0], limite_setor=None):
     """
     Calcula a estratégia com base nos indicadores fornecidos e retorna um DataFrame com os resultados.
 
@@ -42,6 +85,8 @@ def menu_estrategia(data, indicador_rent, indicador_desc, num):
         indicador_rent (str): Indicador de rentabilidade utilizado.
         indicador_desc (str): Indicador de desconto utilizado.
         num (int): Número de ações a serem selecionadas na estratégia.
+        modo_setor (str, opcional): Ajuste setorial, um dos modos de `MODOS_SETOR`. Padrão: sem ajuste.
+        limite_setor (int, opcional): Máximo de ações por setor no modo "Limite por setor".
 
     Returns:
         pd.DataFrame: DataFrame com a estratégia gerada.
@@ -49,9 +94,10 @@ def menu_estrategia(data, indicador_rent, indicador_desc, num):
     Raises:
         ValueError: Se nenhum dado for retornado ou ocorrer um erro no cálculo.
     """
-    logger.info(f"Calculando estratégia com indicador_rent: {indicador_rent}, indicador_desc: {indicador_desc}, num: {num}")
+    logger.info(f"Calculando estratégia com indicador_rent: {indicador_rent}, indicador_desc: {indicador_desc}, num: {num}, "
+                f"modo_setor: {modo_setor}")
     try:
-        df = carteira(data, indicador_rent, indicador_desc, num)
+        df = carteira(data, indicador_rent, indicador_desc, num, modo_setor, limite_setor)
         if df is None or df.empty:
             logger.warning("Nenhum dado retornado pela função carteira.")
             raise ValueError("Nenhum dado foi encontrado para a estratégia.")
@@ -62,6 +108,97 @@ def menu_estrategia(data, indicador_rent, indicador_desc, num):
         raise
 
 
+def menu_estrategia_multifatorial(data, fatores, num, setores=None, volume_minimo=None):
+    """
+    Calcula a estratégia multifatorial e retorna as ações selecionadas.
+
+    Args:
+        data (date): Data base do planilhão.
+        fatores (list): Tuplas (coluna, direcao, peso), com direcao 'maior' ou 'menor'.
+        num (int): Número de ações a serem selecionadas.
+        setores (list, opcional): Setores aceitos. Padrão: todos.
+        volume_minimo (float, opcional): Volume mínimo negociado. Padrão: sem filtro.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
+
+    Raises:
+        ValueError: Se os fatores forem inválidos ou nenhuma ação for selecionada.
+    """
+    logger.info(f"Calculando estratégia multifatorial | Fatores: {fatores} | Num: {num}")
+    try:
+        df, acoes_carteira = carteira_multifatorial(data, fatores, num, setores, volume_minimo)
+        if df is None or df.empty:
+            logger.warning("Nenhum dado retornado pela função carteira_multifatorial.")
+            raise ValueError("Nenhum dado foi encontrado para a estratégia.")
+        logger.info(f"Estratégia multifatorial gerada com sucesso | Linhas retornadas: {len(df)}")
+        return df, acoes_carteira
+    except Exception as e:
+        logger.error(f"Erro ao calcular estratégia multifatorial | Fatores: {fatores}, Num: {num} | {e}")
+        raise
+
+
+def menu_diferenca_carteiras(data_anterior, data_atual, indicador_rent, indicador_desc, num):
+    """
+    Compara as carteiras da estratégia em duas datas base, validando as datas.
+
+    Args:
+        data_anterior (date): Data base da carteira anterior.
+        data_atual (date): Data base da carteira atual.
+        indicador_rent (str): Indicador de rentabilidade selecionado.
+        indicador_desc (str): Indicador de desconto selecionado.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        DiferencaCarteiras: Entradas, saídas, rotatividade e variações dos indicadores.
+
+    Raises:
+        ValueError: Se a data anterior não for anterior à data atual.
+    """
+    logger.info(f"Iniciando comparação de carteiras | {data_anterior} x {data_atual}")
+    try:
+        if data_anterior >= data_atual:
+            logger.error("Data anterior não é anterior à data atual.")
+            raise ValueError("A data da carteira anterior deve ser anterior à data da carteira atual.")
+        diferenca = diferenca_carteiras(data_anterior, data_atual, indicador_rent, indicador_desc, num)
+        logger.info(f"Comparação concluída | Rotatividade: {diferenca.rotatividade:.2%}")
+        return diferenca
+    except Exception as e:
+        logger.error(f"Erro ao comparar carteiras | {e}")
+        raise
+
+
+def menu_rotatividade(data_ini, data_fim, frequencia, indicador_rent, indicador_desc, num):
+    """
+    Calcula a rotatividade da estratégia em cada rebalanceamento de um período.
+
+    Args:
+        data_ini (date): Data inicial do período.
+        data_fim (date): Data final do período.
+        frequencia (str): Frequência de rebalanceamento.
+        indicador_rent (str): Indicador de rentabilidade selecionado.
+        indicador_desc (str): Indicador de desconto selecionado.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        pd.DataFrame: Uma linha por rebalanceamento, com entradas, saídas e rotatividade.
+
+    Raises:
+        ValueError: Se o período for inválido ou não houver dados suficientes.
+    """
+    logger.info(f"Iniciando cálculo de rotatividade | Período: {data_ini} - {data_fim} | Frequência: {frequencia}")
+    try:
+        if data_ini >= data_fim:
+            logger.error("Data inicial não é anterior à data final.")
+            raise ValueError("A data inicial deve ser anterior à data final.")
+        historico = rotatividade_carteiras(data_ini, data_fim, frequencia, indicador_rent, indicador_desc, num)
+        logger.info(f"Rotatividade calculada com sucesso | Linhas retornadas: {len(historico)}")
+        return historico
+    except Exception as e:
+        logger.error(f"Erro ao calcular rotatividade | {e}")
+        raise
+
+
 def menu_graficos(data_ini, data_fim, acoes_carteira):
     """
     Gera os dados necessários para gráficos da carteira no período especificado.
@@ -121,13 +258,80 @@ def grafico_ibov(data_ini, data_fim):
         raise
 
 
-def Comparacao_graficos(df_carteira, df_ibov):
+def menu_comparativo(data_ini, data_fim, acoes_carteira, ao_receber=None):
+    """
+    Obtém os preços e o retorno acumulado da carteira e do Ibovespa, consultando apenas os dias ainda não calculados.
+
+    Args:
+        data_ini (date): Data inicial do período.
+        data_fim (date): Data final do período.
+        acoes_carteira (list): Lista de ações presentes na carteira.
+        ao_receber (callable, opcional): Chamado na thread do script a cada preço recebido da API,
+            com (nome, df, concluidos, total), para exibir o progresso.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame]: Preços da carteira, preços do Ibovespa e retorno acumulado.
+
+    Raises:
+        ValueError: Se a carteira estiver vazia ou nenhum preço for encontrado.
+    """
+    logger.info(f"Iniciando comparativo | Data inicial: {data_ini}, Data final: {data_fim}, Ações: {acoes_carteira}")
+    try:
+        if not acoes_carteira:
+            logger.error("Nenhuma ação na carteira foi fornecida para o comparativo.")
+            raise ValueError("A carteira está vazia. Por favor, gere uma carteira antes de visualizar os gráficos.")
+        df_carteira, df_ibov, acumulado = obter_comparativo(data_ini, data_fim, acoes_carteira, ao_receber)
+        logger.info(f"Comparativo obtido com sucesso | Pregões: {len(acumulado)}")
+        return df_carteira, df_ibov, acumulado
+    except Exception as e:
+        logger.error(f"Erro ao obter comparativo | {e}")
+        raise
+
+
+def menu_ponderacao(matriz, data_ini, metodo, janela):
+    """
+    Calcula os pesos da carteira pelo método escolhido e o retorno acumulado resultante.
+
+    Os pesos são estimados com os pregões anteriores a `data_ini`, fora do período exibido,
+    e mantidos fixos (com rebalanceamento diário) durante todo o período. A estimação fica
+    em cache por carteira, data inicial, método e janela, então reexecuções da página não
+    consultam os preços de novo.
+
+    Args:
+        matriz (pd.DataFrame): Matriz de preços do período exibido, gerada por `montar_matriz_precos`.
+        data_ini (date): Data inicial do período exibido.
+        metodo (str): Método de ponderação (um de `METODOS`).
+        janela (int): Quantidade de pregões usados na estimação da covariância.
+
+    Returns:
+        Tuple[pd.Series, pd.DataFrame, tuple]: Pesos das ações (None para pesos iguais), retorno
+        acumulado e ações sem histórico antes de `data_ini` (com peso zero).
+
+    Raises:
+        ValueError: Se o método for desconhecido ou o histórico for insuficiente.
+    """
+    logger.info(f"Iniciando ponderação da carteira | Método: {metodo}, Janela: {janela}")
+    try:
+        if metodo == "Pesos iguais":
+            return None, retorno_acumulado(retornos_comparativo(matriz)), ()
+        acoes = tuple(coluna for coluna in matriz.columns if coluna != COLUNA_IBOV)
+        pesos, sem_historico = pesos_fora_da_amostra(acoes, data_ini, metodo, janela)
+        acumulado = retorno_acumulado(retornos_comparativo(matriz, pesos))
+        logger.info(f"Ponderação calculada com sucesso | Método: {metodo}")
+        return pesos, acumulado, sem_historico
+    except Exception as e:
+        logger.error(f"Erro ao calcular a ponderação da carteira | {e}")
+        raise
+
+
+def Comparacao_graficos(df_carteira, df_ibov, acumulado=None):
     """
     Gera um gráfico comparativo entre a carteira de ações e o Ibovespa.
 
     Args:
         df_carteira (pd.DataFrame): Dados da carteira de ações.
         df_ibov (pd.DataFrame): Dados do Ibovespa.
+        acumulado (pd.DataFrame, opcional): Retorno acumulado já calculado. Padrão: calculado a partir dos dados.
 
     Raises:
         ValueError: Se os dados da carteira ou do Ibovespa estiverem ausentes ou inválidos.
@@ -142,8 +346,68 @@ def Comparacao_graficos(df_carteira, df_ibov):
             raise ValueError("Dados do Ibovespa não estão disponíveis para a comparação.")
 
         # Gera o gráfico comparativo usando a função plot_comparativo_acumulado
-        plot_comparativo_acumulado(df_carteira, df_ibov)
+        plot_comparativo_acumulado(df_carteira, df_ibov, acumulado)
         logger.info(f"Comparação de gráficos gerada com sucesso.")
     except Exception as e:
         logger.error(f"Erro ao gerar comparação de gráficos | {e}")
         raise
+
+
+def menu_metricas(df_carteira, df_ibov, janela, pesos=None):
+    """
+    Calcula as métricas de risco e desempenho da carteira em relação ao Ibovespa.
+
+    Args:
+        df_carteira (pd.DataFrame): Dados da carteira de ações.
+        df_ibov (pd.DataFrame): Dados do Ibovespa.
+        janela (int): Tamanho da janela móvel em pregões.
+        pesos (pd.Series, opcional): Peso de cada ação da carteira. Padrão: pesos iguais.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Métricas do período inteiro e métricas móveis
+        (None se o histórico for menor que a janela).
+
+    Raises:
+        ValueError: Se os dados estiverem ausentes ou o histórico tiver menos de dois pregões.
+    """
+    logger.info(f"Iniciando cálculo de métricas | Janela: {janela}")
+    try:
+        if df_carteira is None or df_carteira.empty or df_ibov is None or df_ibov.empty:
+            logger.error("Dados da carteira ou do Ibovespa ausentes para o cálculo de métricas.")
+            raise ValueError("Dados da carteira e do Ibovespa são necessários para calcular as métricas.")
+        metricas, moveis = metricas_comparativo(df_carteira, df_ibov, janela, pesos)
+        logger.info("Métricas calculadas com sucesso.")
+        return metricas, moveis
+    except Exception as e:
+        logger.error(f"Erro ao calcular métricas | {e}")
+        raise
+
+
+def menu_backtest(data_ini, data_fim, variantes, processos=None):
+    """
+    Executa o backtest de várias variantes da estratégia em paralelo e retorna o resumo dos resultados.
+
+    Args:
+        data_ini (date): Data inicial do backtest.
+        data_fim (date): Data final do backtest.
+        variantes (list): Tuplas (indicador_rent, indicador_desc, num, frequencia).
+        processos (int, opcional): Tamanho do pool de processos. Padrão: número de CPUs.
+
+    Returns:
+        pd.DataFrame: Uma linha por variante com retorno total e métricas.
+
+    Raises:
+        ValueError: Se nenhuma variante for informada ou não houver dados no período.
+    """
+    logger.info(f"Iniciando backtest | Período: {data_ini} - {data_fim} | Variantes: {len(variantes)}")
+    try:
+        if not variantes:
+            logger.error("Nenhuma variante informada para o backtest.")
+            raise ValueError("Selecione ao menos uma variante para o backtest.")
+        dados = preparar_backtest(data_ini, data_fim, variantes)
+        resumo = executar_backtest(dados, variantes, processos)
+        logger.info(f"Backtest concluído com sucesso | Linhas retornadas: {len(resumo)}")
+        return resumo
+    except Exception as e:
+        logger.error(f"Erro ao executar backtest | {e}")
+        raise
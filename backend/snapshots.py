@@ -0,0 +1,136 @@
+import os
+import uuid
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+import streamlit as st
+from backend.config import SNAPSHOT_DIR
+from backend.ranking import construir_indice_ranks
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    Planilhão de uma data base acompanhado do seu índice de rankings pré-calculado.
+
+    Attributes:
+        data_base (str): Data base no formato 'YYYY-MM-DD'.
+        df (pd.DataFrame): Planilhão processado, sem empresas duplicadas.
+        ranks (np.ndarray): Índice gerado por `construir_indice_ranks`, alinhado às linhas de `df`.
+    """
+    data_base: str
+    df: pd.DataFrame
+    ranks: np.ndarray
+
+
+def _caminho_snapshot(data_base: str) -> str:
+    """Diretório onde o snapshot de uma data base é persistido."""
+    return os.path.join(SNAPSHOT_DIR, data_base)
+
+
+def salvar_snapshot(snapshot: Snapshot):
+    """
+    Persiste o planilhão e o índice de rankings de um snapshot em disco.
+
+    Os arquivos são gravados em arquivos temporários com nome único e renomeados ao final,
+    para que uma leitura concorrente nunca encontre um snapshot incompleto e que processos
+    gravando a mesma data base ao mesmo tempo não usem o mesmo arquivo temporário.
+
+    Args:
+        snapshot (Snapshot): Snapshot a ser persistido.
+    """
+    caminho = _caminho_snapshot(snapshot.data_base)
+    logger.info(f"Persistindo snapshot da data base {snapshot.data_base} em {caminho}")
+    try:
+        os.makedirs(caminho, exist_ok=True)
+        sufixo = f".{uuid.uuid4().hex[:12]}.tmp"
+        snapshot.df.to_pickle(os.path.join(caminho, "planilhao.pkl" + sufixo), compression=None)
+        with open(os.path.join(caminho, "ranks.npy" + sufixo), "wb") as f:
+            np.save(f, snapshot.ranks)
+        os.replace(os.path.join(caminho, "planilhao.pkl" + sufixo), os.path.join(caminho, "planilhao.pkl"))
+        os.replace(os.path.join(caminho, "ranks.npy" + sufixo), os.path.join(caminho, "ranks.npy"))
+        logger.info(f"Snapshot da data base {snapshot.data_base} persistido com sucesso.")
+    except Exception as e:
+        logger.error(f"Erro ao persistir snapshot da data base {snapshot.data_base}: {e}")
+        raise
+
+
+def ler_snapshot(data_base: str):
+    """
+    Lê do disco um snapshot previamente persistido.
+
+    Args:
+        data_base (str): Data base no formato 'YYYY-MM-DD'.
+
+    Returns:
+        Snapshot or None: Snapshot persistido, ou None se não houver um completo em disco.
+    """
+    caminho = _caminho_snapshot(data_base)
+    arquivo_df = os.path.join(caminho, "planilhao.pkl")
+    arquivo_ranks = os.path.join(caminho, "ranks.npy")
+    if not (os.path.exists(arquivo_df) and os.path.exists(arquivo_ranks)):
+        return None
+    try:
+        df = pd.read_pickle(arquivo_df, compression=None)
+        ranks = np.load(arquivo_ranks)
+        if len(ranks) != len(df):
+            logger.warning(f"Snapshot da data base {data_base} inconsistente em disco. Será recriado.")
+            return None
+        logger.info(f"Snapshot da data base {data_base} lido do disco.")
+        return Snapshot(data_base, df, ranks)
+    except Exception as e:
+        logger.error(f"Erro ao ler snapshot da data base {data_base}: {e}")
+        return None
+
+
+def listar_snapshots() -> list:
+    """
+    Lista as datas base com snapshot completo persistido em disco.
+
+    Returns:
+        list: Datas base no formato 'YYYY-MM-DD', em ordem cronológica.
+    """
+    if not os.path.isdir(SNAPSHOT_DIR):
+        return []
+    return sorted(
+        nome for nome in os.listdir(SNAPSHOT_DIR)
+        if os.path.exists(os.path.join(SNAPSHOT_DIR, nome, "planilhao.pkl"))
+        and os.path.exists(os.path.join(SNAPSHOT_DIR, nome, "ranks.npy"))
+    )
+
+
+@st.cache_resource(show_spinner=False, max_entries=64)
+def carregar_snapshot(data_base) -> Snapshot:
+    """
+    Obtém o snapshot do planilhão de uma data base, consultando a API apenas se ele não estiver em disco.
+
+    O índice de rankings é calculado uma única vez, quando o planilhão é carregado da API,
+    e fica persistido junto com ele. O objeto retornado é compartilhado entre as sessões
+    e não deve ser modificado.
+
+    Args:
+        data_base (date | str): Data base do planilhão.
+
+    Returns:
+        Snapshot: Planilhão processado e índice de rankings.
+
+    Raises:
+        ValueError: Se a API não retornar dados para a data base.
+    """
+    # Importação tardia: `backend.views` depende deste módulo.
+    from backend.views import pegar_df_planilhao
+
+    data_base = str(data_base)
+    logger.info(f"Carregando snapshot da data base: {data_base}")
+    snapshot = ler_snapshot(data_base)
+    if snapshot is not None:
+        return snapshot
+
+    df = pegar_df_planilhao(data_base).reset_index(drop=True)
+    if df.empty:
+        logger.warning(f"Nenhum dado retornado para o snapshot da data base: {data_base}")
+        raise ValueError("Planilhão vazio.")
+    snapshot = Snapshot(data_base, df, construir_indice_ranks(df))
+    salvar_snapshot(snapshot)
+    return snapshot
@@ -1,7 +1,18 @@
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import date
 import streamlit as st
+from backend.config import CONSULTAS_SIMULTANEAS
 from backend.apis import pegar_planilhao, get_preco_corrigido, get_preco_diversos
+from backend.ranking import COLUNAS_CARTEIRA, MODOS_SETOR, selecionar_por_ranks, ranking_multifatorial, ranking_setorial
+from backend.snapshots import carregar_snapshot
+from backend.diferencas import diferenca_snapshots, historico_rotatividade
+from backend.backtest import FREQUENCIAS, carregar_snapshot_do_mes, datas_mensais
+from backend.arquivo_precos import abrir_arquivo_precos
+from backend.banco_analitico import guardar_planilhao, guardar_precos
+from backend.metricas import (
+    COLUNA_IBOV, montar_matriz_precos, retornos_comparativo, retorno_acumulado, calcular_metricas, calcular_metricas_moveis
+)
 import plotly.graph_objects as go
 from log_config.logging_config import logger  # Importando o logger centralizado para logs consistentes.
 
@@ -51,12 +62,14 @@ def pegar_df_planilhao(data_base: date) -> pd.DataFrame:
     """
     logger.info(f"Consultando planilhão para a data base: {data_base}")  # Log do início do processo.
     try:
-        dados = pegar_planilhao(data_base)  # Obtém dados do planilhão para a data base fornecida.
+        dados, nova = pegar_planilhao(data_base, indicar_nova=True)  # Obtém dados do planilhão para a data base fornecida.
         if dados:
             dados = dados['dados']  # Extrai os dados relevantes.
             planilhao = pd.DataFrame(dados)  # Converte para DataFrame.
             planilhao['empresa'] = [ticker[:4] for ticker in planilhao.ticker.values]  # Cria coluna 'empresa'.
             df = filtrar_duplicado(planilhao)  # Remove duplicatas usando a função `filtrar_duplicado`.
+            if nova:
+                guardar_planilhao(df)  # Grava no banco analítico local (respostas repetidas do cache já foram gravadas).
             logger.info(f"Planilhão processado com sucesso. Total de linhas: {len(df)}")
             return df
         else:
@@ -67,7 +80,7 @@ def pegar_df_planilhao(data_base: date) -> pd.DataFrame:
         raise
 
 # Gerar carteira baseada em indicadores
-def carteira(data, indicador_rent, indicador_desc, num):
+def carteira(data, indicador_rent, indicador_desc, num, modo_setor=MODOS_SETOR[0], limite_setor=None):
     """
     Gera uma carteira com base em indicadores de rentabilidade e desconto.
 
@@ -76,37 +89,32 @@ def carteira(data, indicador_rent, indicador_desc, num):
         indicador_rent (str): Indicador de rentabilidade para ranqueamento.
         indicador_desc (str): Indicador de desconto para ranqueamento.
         num (int): Número de ações a serem selecionadas.
+        modo_setor (str, opcional): Ajuste setorial, um dos modos de `MODOS_SETOR`. Padrão: sem ajuste.
+        limite_setor (int, opcional): Máximo de ações por setor no modo "Limite por setor".
 
     Returns:
         Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
     """
     logger.info(f"Gerando carteira com base nos indicadores: {indicador_rent}, {indicador_desc} e num ações: {num}")
     try:
-        # Obtém os dados do planilhão processado.
-        df = pegar_df_planilhao(data)
-        if df.empty:
-            logger.warning("Nenhum dado encontrado no planilhão para a data selecionada.")
-            raise ValueError("Planilhão vazio.")
-
-        # Seleciona as colunas de interesse.
-        colunas = ["ticker", "setor", "data_base", "roc", "roe", "roic", "earning_yield", "dividend_yield", "p_vp"]
-        df = df[colunas]
-
-        # Filtra as ações com base no indicador de rentabilidade.
-        df = df.nlargest(300, indicador_rent).reset_index(drop=True)
-        df['index_rent'] = df.index
-
-        # Filtra as ações com base no indicador de desconto.
-        if indicador_desc == 'p_vp':
-            df = df.nsmallest(300, indicador_desc).reset_index(drop=True)
+        # Obtém o planilhão processado e o índice de rankings pré-calculado da data base.
+        snapshot = carregar_snapshot(data)
+
+        if modo_setor != MODOS_SETOR[0]:
+            # Seleção com ajuste setorial, em operações agrupadas sobre o snapshot inteiro.
+            df_sorted = ranking_setorial(
+                snapshot.df, snapshot.ranks, indicador_rent, indicador_desc, num, modo_setor, limite_setor
+            )
         else:
-            df = df.nlargest(300, indicador_desc).reset_index(drop=True)
-        df['index_desc'] = df.index
+            # Combina os rankings pré-calculados sem reordenar o universo inteiro.
+            linhas, index_rent, index_desc = selecionar_por_ranks(snapshot.ranks, indicador_rent, indicador_desc, num)
 
-        # Calcula a média dos rankings e seleciona as melhores ações.
-        df["media"] = df["index_desc"] + df["index_rent"]
-        df_sorted = df.sort_values(by=['media'], ascending=True).nsmallest(num, 'media').reset_index(drop=True)
-        df_sorted.index = df_sorted.index + 1
+            # Seleciona as colunas de interesse das ações escolhidas.
+            df_sorted = snapshot.df.iloc[linhas][COLUNAS_CARTEIRA].reset_index(drop=True)
+            df_sorted['index_rent'] = index_rent
+            df_sorted['index_desc'] = index_desc
+            df_sorted["media"] = df_sorted["index_desc"] + df_sorted["index_rent"]
+            df_sorted.index = df_sorted.index + 1
 
         # Extrai os tickers das ações selecionadas.
         acoes_carteira = df_sorted['ticker'].tolist()
@@ -115,11 +123,151 @@ def carteira(data, indicador_rent, indicador_desc, num):
     except Exception as e:
         logger.error(f"Erro ao gerar a carteira: {e}")
         raise
+# Gerar carteira com ranking multifatorial ponderado
+def carteira_multifatorial(data, fatores, num, setores=None, volume_minimo=None):
+    """
+    Gera uma carteira combinando qualquer número de indicadores do planilhão, com direção e peso.
+
+    Args:
+        data (date): Data base para consulta do planilhão.
+        fatores (list): Tuplas (coluna, direcao, peso), com direcao 'maior' ou 'menor'.
+        num (int): Número de ações a serem selecionadas.
+        setores (list, opcional): Setores aceitos. Padrão: todos.
+        volume_minimo (float, opcional): Volume mínimo negociado. Padrão: sem filtro.
+
+    Returns:
+        Tuple[pd.DataFrame, List[str]]: DataFrame com as ações selecionadas e lista de tickers.
+    """
+    logger.info(f"Gerando carteira multifatorial | Fatores: {fatores} | Num: {num}")
+    try:
+        snapshot = carregar_snapshot(data)
+        df_sorted = ranking_multifatorial(snapshot.df, fatores, num, setores, volume_minimo)
+        acoes_carteira = df_sorted['ticker'].tolist()
+        logger.info(f"Carteira multifatorial gerada com sucesso. Ações selecionadas: {acoes_carteira}")
+        return df_sorted, acoes_carteira
+    except Exception as e:
+        logger.error(f"Erro ao gerar a carteira multifatorial: {e}")
+        raise
+
+# Comparar as carteiras da estratégia em duas datas base
+def diferenca_carteiras(data_anterior, data_atual, indicador_rent, indicador_desc, num):
+    """
+    Compara as carteiras geradas pela estratégia em duas datas base.
+
+    Args:
+        data_anterior (date): Data base da carteira anterior.
+        data_atual (date): Data base da carteira atual.
+        indicador_rent (str): Indicador de rentabilidade para ranqueamento.
+        indicador_desc (str): Indicador de desconto para ranqueamento.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        DiferencaCarteiras: Entradas, saídas, rotatividade e variações dos indicadores.
+    """
+    logger.info(f"Comparando carteiras de {data_anterior} e {data_atual} | {indicador_rent}, {indicador_desc}, {num} ações")
+    try:
+        diferenca = diferenca_snapshots(
+            carregar_snapshot(data_anterior), carregar_snapshot(data_atual), indicador_rent, indicador_desc, num
+        )
+        logger.info(f"Carteiras comparadas | Entradas: {len(diferenca.entradas)}, Saídas: {len(diferenca.saidas)}")
+        return diferenca
+    except Exception as e:
+        logger.error(f"Erro ao comparar as carteiras: {e}")
+        raise
+
+# Calcular a rotatividade da estratégia em cada rebalanceamento de um período
+def rotatividade_carteiras(data_ini, data_fim, frequencia, indicador_rent, indicador_desc, num) -> pd.DataFrame:
+    """
+    Calcula a rotatividade da carteira da estratégia entre cada par de rebalanceamentos consecutivos.
+
+    Args:
+        data_ini (date): Data inicial do período.
+        data_fim (date): Data final do período.
+        frequencia (str): Frequência de rebalanceamento (uma de `FREQUENCIAS`).
+        indicador_rent (str): Indicador de rentabilidade para ranqueamento.
+        indicador_desc (str): Indicador de desconto para ranqueamento.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        pd.DataFrame: Uma linha por rebalanceamento, com entradas, saídas e rotatividade.
+
+    Raises:
+        ValueError: Se houver menos de dois snapshots disponíveis no período.
+    """
+    logger.info(f"Calculando rotatividade de {data_ini} a {data_fim} | Frequência: {frequencia}")
+    try:
+        snapshots = []
+        for data_base in datas_mensais(data_ini, data_fim)[::FREQUENCIAS[frequencia]]:
+            try:
+                snapshots.append(carregar_snapshot_do_mes(data_base))
+            except ValueError:
+                logger.warning(f"Snapshot indisponível para a data base {data_base}. Data ignorada.")
+        if len(snapshots) < 2:
+            raise ValueError("São necessárias ao menos duas datas base com dados no período.")
+        historico = historico_rotatividade(snapshots, indicador_rent, indicador_desc, num)
+        logger.info(f"Rotatividade calculada | Rebalanceamentos: {len(historico)}")
+        return historico
+    except Exception as e:
+        logger.error(f"Erro ao calcular a rotatividade: {e}")
+        raise
+
+def _precos_do_arquivo(data_ini, data_fim, acoes_carteira) -> tuple:
+    """
+    Recorta do arquivo local os preços dos tickers presentes nele, quando o arquivo cobre o período.
+
+    Returns:
+        Tuple[pd.DataFrame, list]: Preços lidos do arquivo e tickers que precisam ser consultados na API.
+    """
+    arquivo = abrir_arquivo_precos()
+    if arquivo is None or not arquivo.cobre(data_ini, data_fim):
+        return pd.DataFrame(), list(acoes_carteira)
+    df_preco = pd.DataFrame()
+    do_arquivo = [ticker for ticker in acoes_carteira if ticker in arquivo]
+    if do_arquivo:
+        df_preco = arquivo.precos_longos(do_arquivo, data_ini, data_fim)
+        logger.info(f"Preços de {len(do_arquivo)} ações lidos do arquivo local.")
+    return df_preco, [ticker for ticker in acoes_carteira if ticker not in arquivo]
+
+
+def _preco_corrigido_api(ticker, data_ini, data_fim) -> pd.DataFrame:
+    """
+    Consulta na API os preços corrigidos de um ticker, com o retorno diário (vazio se não houver dados).
+
+    Respostas novas da API são gravadas no banco analítico local.
+    """
+    dados, nova = get_preco_corrigido(ticker, data_ini, data_fim, indicar_nova=True)
+    if not dados or 'dados' not in dados:
+        return pd.DataFrame()
+    df_temp = pd.DataFrame.from_dict(dados['dados'])  # Converte os dados para DataFrame.
+    df_temp['ticker'] = ticker  # Adiciona a coluna de ticker.
+    df_temp['retorno_diario'] = df_temp['fechamento'].pct_change()  # Calcula o retorno diário.
+    if nova:
+        guardar_precos(df_temp)
+    return df_temp
+
+
+def _juntar_precos(df_arquivo: pd.DataFrame, partes_api: list, ordem: dict) -> pd.DataFrame:
+    """Junta os preços lidos do arquivo e os consultados na API, mantendo os tickers na ordem pedida."""
+    partes_api = [parte for parte in partes_api if not parte.empty]
+    df_api = pd.concat(partes_api, ignore_index=True) if partes_api else pd.DataFrame()
+    partes = [parte for parte in (df_arquivo, df_api) if not parte.empty]
+    if not partes:
+        return pd.DataFrame()
+    df_preco = pd.concat(partes, ignore_index=True)
+    if len(partes) > 1:
+        # Intercala os tickers lidos do arquivo e os consultados na API.
+        df_preco = df_preco.sort_values("ticker", key=lambda t: t.map(ordem), kind="stable", ignore_index=True)
+    return df_preco
+
+
 # Obter preços corrigidos para os tickers da carteira
 def pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira) -> pd.DataFrame:
     """
     Obtém os preços corrigidos das ações selecionadas em um intervalo de datas.
 
+    Quando o arquivo local de preços cobre o período, os tickers presentes nele são
+    recortados do disco e apenas os demais são consultados na API.
+
     Args:
         data_ini (date): Data inicial para consulta.
         data_fim (date): Data final para consulta.
@@ -129,16 +277,12 @@ def pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira) -> pd.DataFrame
         pd.DataFrame: DataFrame com os preços corrigidos e retornos diários.
     """
     logger.info(f"Obtendo preços corrigidos de {data_ini} a {data_fim} para as ações: {acoes_carteira}")
-    df_preco = pd.DataFrame()
     try:
-        for ticker in acoes_carteira:
-            # Chama a API para obter dados do ticker no intervalo fornecido.
-            dados = get_preco_corrigido(ticker, data_ini, data_fim)
-            if dados and 'dados' in dados:
-                df_temp = pd.DataFrame.from_dict(dados['dados'])  # Converte os dados para DataFrame.
-                df_temp['ticker'] = ticker  # Adiciona a coluna de ticker.
-                df_temp['retorno_diario'] = df_temp['fechamento'].pct_change()  # Calcula o retorno diário.
-                df_preco = pd.concat([df_preco, df_temp], axis=0, ignore_index=True)  # Adiciona ao DataFrame final.
+        ordem = {ticker: i for i, ticker in enumerate(acoes_carteira)}
+        df_arquivo, acoes_api = _precos_do_arquivo(data_ini, data_fim, acoes_carteira)
+        # Chama a API para obter dados de cada ticker no intervalo fornecido.
+        partes_api = [_preco_corrigido_api(ticker, data_ini, data_fim) for ticker in acoes_api]
+        df_preco = _juntar_precos(df_arquivo, partes_api, ordem)
         if df_preco.empty:
             logger.warning("Nenhum dado retornado para os preços corrigidos.")
         else:
@@ -148,6 +292,63 @@ def pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira) -> pd.DataFrame
         logger.error(f"Erro ao obter preços corrigidos: {e}")
         raise
 
+# Obter ao mesmo tempo os preços da carteira e do Ibovespa
+def pegar_precos_comparativo(data_ini, data_fim, acoes_carteira, ao_receber=None) -> tuple:
+    """
+    Obtém os preços corrigidos da carteira e os preços do Ibovespa com consultas simultâneas.
+
+    As consultas de cada ticker e a do Ibovespa começam juntas em um pool de até
+    `CONSULTAS_SIMULTANEAS` threads, e os resultados são recebidos na ordem em que chegam.
+    `ao_receber` é chamado na thread de quem chamou esta função (a do script do Streamlit),
+    nunca nas threads do pool, e por isso pode atualizar a interface.
+
+    Args:
+        data_ini (date): Data inicial para consulta.
+        data_fim (date): Data final para consulta.
+        acoes_carteira (list): Lista de tickers das ações na carteira.
+        ao_receber (callable, opcional): Chamado a cada resultado com (nome, df, concluidos, total),
+            em que nome é o ticker ou `COLUNA_IBOV` e df são os preços recebidos (vazio se não houver dados).
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Preços corrigidos da carteira e preços do Ibovespa,
+        nos mesmos formatos de `pegar_df_preco_corrigido` e `pegar_df_preco_diversos`.
+    """
+    logger.info(f"Obtendo preços simultâneos de {data_ini} a {data_fim} para o Ibovespa e as ações: {acoes_carteira}")
+    ordem = {ticker: i for i, ticker in enumerate(acoes_carteira)}
+    df_arquivo, acoes_api = _precos_do_arquivo(data_ini, data_fim, acoes_carteira)
+    total = len(acoes_carteira) + 1
+    concluidos = len(acoes_carteira) - len(acoes_api)
+    if ao_receber is not None and not df_arquivo.empty:
+        # Os tickers lidos do arquivo local já estão disponíveis antes de qualquer consulta.
+        for i, (ticker, df_ticker) in enumerate(df_arquivo.groupby("ticker", sort=False), start=1):
+            ao_receber(ticker, df_ticker, i, total)
+
+    partes_api = {}
+    df_ibov = pd.DataFrame()
+    pool = ThreadPoolExecutor(max_workers=min(CONSULTAS_SIMULTANEAS, len(acoes_api) + 1), thread_name_prefix="precos")
+    try:
+        futuros = {pool.submit(pegar_df_preco_diversos, data_ini, data_fim): COLUNA_IBOV}
+        futuros.update({pool.submit(_preco_corrigido_api, ticker, data_ini, data_fim): ticker for ticker in acoes_api})
+        for futuro in as_completed(futuros):
+            nome = futuros[futuro]
+            df = futuro.result()
+            if nome == COLUNA_IBOV:
+                df_ibov = df
+            else:
+                partes_api[nome] = df
+            concluidos += 1
+            if ao_receber is not None:
+                ao_receber(nome, df, concluidos, total)
+        df_carteira = _juntar_precos(df_arquivo, [partes_api[ticker] for ticker in acoes_api], ordem)
+        logger.info(f"Preços simultâneos obtidos | Linhas da carteira: {len(df_carteira)}, Linhas do Ibovespa: {len(df_ibov)}")
+        return df_carteira, df_ibov
+    except Exception as e:
+        logger.error(f"Erro ao obter preços simultâneos: {e}")
+        raise
+    finally:
+        # Em caso de erro, descarta as consultas que ainda não começaram.
+        pool.shutdown(wait=False, cancel_futures=True)
+
 # Obter preços do índice Ibovespa
 def pegar_df_preco_diversos(data_ini: date, data_fim: date) -> pd.DataFrame:
     """
@@ -163,11 +364,13 @@ def pegar_df_preco_diversos(data_ini: date, data_fim: date) -> pd.DataFrame:
     logger.info(f"Obtendo preços diversos de {data_ini} a {data_fim} para o Ibovespa.")
     try:
         df_preco = pd.DataFrame()
-        dados = get_preco_diversos(data_ini, data_fim, 'ibov')  # Obtém dados do índice Ibovespa.
+        dados, nova = get_preco_diversos(data_ini, data_fim, 'ibov', indicar_nova=True)  # Obtém dados do índice Ibovespa.
         if dados:
             dados = dados['dados']
             df_temp = pd.DataFrame.from_dict(dados)  # Converte para DataFrame.
             df_preco = pd.concat([df_preco, df_temp], axis=0, ignore_index=True)  # Adiciona ao DataFrame final.
+            if nova:
+                guardar_precos(df_preco, ticker='ibov')  # Grava no banco analítico local.
         if df_preco.empty:
             logger.warning("Nenhum dado retornado para os preços diversos.")
         else:
@@ -179,13 +382,15 @@ def pegar_df_preco_diversos(data_ini: date, data_fim: date) -> pd.DataFrame:
 
 
 # Plotar comparativo entre carteira e Ibovespa
-def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame):
+def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame, acumulado: pd.DataFrame = None):
     """
     Plota um gráfico comparativo do retorno acumulado da carteira e do Ibovespa ao longo do tempo.
 
     Args:
-        df_carteira (pd.DataFrame): DataFrame com os retornos diários da carteira.
-        df_ibov (pd.DataFrame): DataFrame com os preços e retornos diários do Ibovespa.
+        df_carteira (pd.DataFrame): DataFrame com os preços corrigidos da carteira.
+        df_ibov (pd.DataFrame): DataFrame com os preços do Ibovespa.
+        acumulado (pd.DataFrame, opcional): Retorno acumulado já calculado (colunas 'Carteira' e 'Ibovespa').
+            Padrão: calculado a partir dos preços.
 
     Returns:
         None: O gráfico é exibido na interface Streamlit.
@@ -194,26 +399,22 @@ def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame)
     try:
         fig = go.Figure()
 
-        # Calcula o retorno acumulado da carteira.
-        df_carteira_grouped = df_carteira.groupby('data')['retorno_diario'].mean().reset_index()
-        df_carteira_grouped['retorno_acumulado'] = (1 + df_carteira_grouped['retorno_diario']).cumprod() - 1
-
-        # Calcula o retorno acumulado do Ibovespa.
-        df_ibov['retorno_diario'] = df_ibov['fechamento'].pct_change()
-        df_ibov['retorno_acumulado'] = (1 + df_ibov['retorno_diario']).cumprod() - 1
+        # Calcula o retorno acumulado da carteira e do Ibovespa sobre a matriz de preços alinhada.
+        if acumulado is None:
+            acumulado = retorno_acumulado(retornos_comparativo(montar_matriz_precos(df_carteira, df_ibov)))
 
         # Adiciona ambas as séries de retorno ao gráfico.
         fig.add_trace(go.Scatter(
-            x=df_carteira_grouped['data'],
-            y=df_carteira_grouped['retorno_acumulado'],
+            x=acumulado.index,
+            y=acumulado['Carteira'],
             mode='lines',
             name="Retorno Acumulado da Carteira",
             line=dict(color='blue', width=2)
         ))
 
         fig.add_trace(go.Scatter(
-            x=df_ibov['data'],
-            y=df_ibov['retorno_acumulado'],
+            x=acumulado.index,
+            y=acumulado['Ibovespa'],
             mode='lines',
             name="Retorno Acumulado do Ibovespa",
             line=dict(color='green', width=2)
@@ -235,6 +436,38 @@ def plot_comparativo_acumulado(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame)
         logger.error(f"Erro ao plotar gráfico comparativo acumulado: {e}")
         raise
 
+# Calcular métricas de risco e desempenho da carteira contra o Ibovespa
+@st.cache_data(show_spinner=False)
+def metricas_comparativo(df_carteira: pd.DataFrame, df_ibov: pd.DataFrame, janela: int, pesos: pd.Series = None) -> tuple:
+    """
+    Calcula, com cache por carteira, janela e pesos, as métricas totais e móveis da carteira e do Ibovespa.
+
+    Usa a mesma matriz de preços alinhada de `plot_comparativo_acumulado`. As métricas do
+    período inteiro são calculadas mesmo quando o período é mais curto que a janela móvel;
+    nesse caso apenas as métricas móveis ficam de fora.
+
+    Args:
+        df_carteira (pd.DataFrame): DataFrame com os preços corrigidos da carteira.
+        df_ibov (pd.DataFrame): DataFrame com os preços do Ibovespa.
+        janela (int): Tamanho da janela móvel em pregões.
+        pesos (pd.Series, opcional): Peso de cada ação da carteira. Padrão: pesos iguais.
+
+    Returns:
+        Tuple[pd.DataFrame, pd.DataFrame]: Métricas do período inteiro e métricas móveis
+        (None se o período tiver menos pregões que a janela).
+    """
+    logger.info(f"Calculando métricas do comparativo | Janela: {janela}")
+    try:
+        retornos = retornos_comparativo(montar_matriz_precos(df_carteira, df_ibov), pesos)
+        metricas = calcular_metricas(retornos)
+        if len(retornos.dropna()) < janela:
+            logger.warning(f"Período com {len(retornos.dropna())} pregões, menor que a janela de {janela}: sem métricas móveis.")
+            return metricas, None
+        return metricas, calcular_metricas_moveis(retornos, janela)
+    except Exception as e:
+        logger.error(f"Erro ao calcular métricas do comparativo: {e}")
+        raise
+
 # Validar data fornecida pelo usuário
 def validar_data(data):
     """
@@ -0,0 +1,123 @@
+import json
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+# Setores atribuídos aos tickers sintéticos.
+SETORES = ["Financeiro", "Energia", "Varejo", "Saúde", "Indústria", "Tecnologia", "Materiais", "Utilidades"]
+
+
+def _semente(*partes) -> int:
+    """Semente determinística para que a mesma consulta sempre gere os mesmos dados."""
+    return zlib.crc32("|".join(str(p) for p in partes).encode())
+
+
+def gerar_planilhao(data_base: str, quantidade: int = 400) -> list:
+    """
+    Gera um planilhão sintético com os campos usados pelo app.
+
+    Args:
+        data_base (str): Data base no formato 'YYYY-MM-DD'.
+        quantidade (int, opcional): Número de tickers. Padrão: 400.
+
+    Returns:
+        list: Registros do planilhão.
+    """
+    rng = np.random.default_rng(_semente("planilhao", data_base))
+    registros = []
+    for i in range(quantidade):
+        # Algumas empresas têm duas classes de ações, para exercitar `filtrar_duplicado`.
+        ticker = (f"T{i // 2:03d}" + ("3" if i % 2 == 0 else "4")) if i < 40 else f"A{i:03d}3"
+        registros.append({
+            "ticker": ticker,
+            "setor": SETORES[i % len(SETORES)],
+            "data_base": data_base,
+            "roc": float(rng.normal(0.12, 0.08)),
+            "roe": float(rng.normal(0.15, 0.10)),
+            "roic": float(rng.normal(0.10, 0.07)),
+            "earning_yield": float(rng.normal(0.08, 0.05)),
+            "dividend_yield": float(max(rng.normal(0.04, 0.03), 0)),
+            "p_vp": float(abs(rng.normal(1.5, 0.8))),
+            "volume": float(rng.lognormal(15, 2)),
+        })
+    return registros
+
+
+def gerar_precos(ticker: str, data_ini: str, data_fim: str) -> list:
+    """
+    Gera uma série sintética de fechamentos em dias úteis.
+
+    Os preços de cada ticker seguem um passeio aleatório com semente fixa desde 2000,
+    de modo que janelas diferentes do mesmo ticker são consistentes entre si.
+
+    Args:
+        ticker (str): Ticker da série.
+        data_ini (str): Data inicial no formato 'YYYY-MM-DD'.
+        data_fim (str): Data final no formato 'YYYY-MM-DD'.
+
+    Returns:
+        list: Registros com 'data' e 'fechamento'.
+    """
+    datas = pd.bdate_range("2000-01-03", data_fim)
+    rng = np.random.default_rng(_semente("precos", ticker))
+    fechamentos = 100 * np.cumprod(1 + rng.normal(0.0003, 0.02, len(datas)))
+    inicio = datas.searchsorted(pd.Timestamp(data_ini))
+    return [
+        {"data": d.strftime("%Y-%m-%d"), "fechamento": round(float(f), 4)}
+        for d, f in zip(datas[inicio:], fechamentos[inicio:])
+    ]
+
+
+class _Servidor(ThreadingHTTPServer):
+    """Servidor da API sintética com fila de conexões para muitas sessões consultando preços em paralelo."""
+
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+class _Manipulador(BaseHTTPRequestHandler):
+    """Responde aos endpoints do planilhão e de preços com dados sintéticos."""
+
+    latencia = 0.0
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        time.sleep(self.latencia)
+        if url.path.endswith("/planilhao"):
+            dados = gerar_planilhao(params["data_base"])
+        elif url.path.endswith("/preco-corrigido") or url.path.endswith("/preco-diversos"):
+            dados = gerar_precos(params["ticker"], params["data_ini"], params["data_fim"])
+        else:
+            self.send_error(404)
+            return
+        corpo = json.dumps({"dados": dados}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, format, *args):
+        pass  # Silencia o log de cada requisição.
+
+
+def iniciar_api_falsa(latencia: float = 0.0, porta: int = 0):
+    """
+    Inicia a API sintética em uma thread de fundo.
+
+    Args:
+        latencia (float, opcional): Atraso artificial de cada resposta, em segundos. Padrão: 0.
+        porta (int, opcional): Porta local. Padrão: 0 (escolhida pelo sistema).
+
+    Returns:
+        Tuple[ThreadingHTTPServer, str]: Servidor em execução e endereço base para `API_BASE_URL`.
+    """
+    manipulador = type("Manipulador", (_Manipulador,), {"latencia": latencia})
+    servidor = _Servidor(("127.0.0.1", porta), manipulador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/api/v1"
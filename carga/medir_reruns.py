@@ -0,0 +1,117 @@
+"""
+Mede a latência das reexecuções do app ao alterar um widget da página Estratégia, com o `AppTest`.
+
+A interação (mudar a quantidade de ações) não consulta a API, então o tempo medido é só o
+da reexecução do script. Dois modos:
+
+- completo: reexecuta o app inteiro, como o `AppTest` faz por padrão;
+- fragmento: mantém o armazenamento de fragmentos entre as execuções e enfileira o id do
+  fragmento da página, como o navegador faz ao interagir com um widget dentro de um
+  `st.fragment`. O `AppTest` (Streamlit 1.39) cria um armazenamento novo a cada execução e
+  nunca enfileira fragmentos, por isso o seu executor é substituído aqui.
+
+`--raiz` aponta para outra cópia do repositório (por exemplo, um `git worktree` de um commit
+anterior) para comparar versões com o mesmo script.
+
+Uso:
+    python -m carga.medir_reruns --rodadas 300
+    python -m carga.medir_reruns --rodadas 300 --fragmento
+    python -m carga.medir_reruns --raiz /tmp/commit_anterior --rodadas 300
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+import numpy as np
+
+# Raiz padrão: este repositório.
+RAIZ = str(Path(__file__).resolve().parent.parent)
+
+# Execuções descartadas antes das medições.
+AQUECIMENTO = 3
+
+
+def _instalar_executor_de_fragmentos():
+    """
+    Faz o `AppTest` reexecutar apenas o fragmento da página, como o navegador.
+
+    Returns:
+        dict: Estado compartilhado; preencha 'fila' com os ids dos fragmentos a reexecutar.
+    """
+    from streamlit.runtime.fragment import MemoryFragmentStorage
+    from streamlit.runtime.scriptrunner import RerunData
+    from streamlit.testing.v1 import app_test
+    from streamlit.testing.v1.local_script_runner import LocalScriptRunner
+
+    estado = {"armazenamento": MemoryFragmentStorage(), "fila": []}
+
+    class ExecutorDeFragmentos(LocalScriptRunner):
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._fragment_storage = estado["armazenamento"]
+
+        def request_rerun(self, dados):
+            if estado["fila"]:
+                dados = RerunData(
+                    widget_states=dados.widget_states,
+                    query_string=dados.query_string,
+                    page_script_hash=dados.page_script_hash,
+                    fragment_id_queue=list(estado["fila"]),
+                )
+            return super().request_rerun(dados)
+
+    app_test.LocalScriptRunner = ExecutorDeFragmentos
+    return estado
+
+
+def medir_reruns(raiz: str, rodadas: int, fragmento: bool, timeout: float = 60) -> np.ndarray:
+    """
+    Mede o tempo de cada reexecução após alterar a quantidade de ações na página Estratégia.
+
+    Args:
+        raiz (str): Diretório do repositório cujo `app.py` será executado.
+        rodadas (int): Quantidade de reexecuções medidas (após `AQUECIMENTO`).
+        fragmento (bool): Se True, reexecuta apenas o fragmento da página.
+        timeout (float, opcional): Tempo máximo de cada execução, em segundos. Padrão: 60.
+
+    Returns:
+        np.ndarray: Tempos das reexecuções, em milissegundos.
+    """
+    os.environ.setdefault("TOKEN", "medicao-de-reruns")
+    os.chdir(raiz)
+    sys.path.insert(0, raiz)
+    from streamlit.testing.v1 import AppTest
+
+    estado = _instalar_executor_de_fragmentos() if fragmento else None
+    at = AppTest.from_file(os.path.join(raiz, "app.py"), default_timeout=timeout).run()
+    next(botao for botao in at.button if "Estratégia" in botao.label).click().run()
+    if fragmento:
+        estado["fila"] = list(estado["armazenamento"]._fragments)
+        if len(estado["fila"]) != 1:
+            raise RuntimeError(f"Esperado um único fragmento na página, encontrados: {len(estado['fila'])}")
+
+    tempos = []
+    for i in range(rodadas + AQUECIMENTO):
+        campo = next(campo for campo in at.number_input if "Quantas ações" in campo.label)
+        valor = 11 + i % 20
+        inicio = time.perf_counter()
+        campo.set_value(valor).run()
+        decorrido = (time.perf_counter() - inicio) * 1000
+        if at.exception:
+            raise RuntimeError(f"Exceção na reexecução: {at.exception[0].value}")
+        if i >= AQUECIMENTO:
+            tempos.append(decorrido)
+    return np.array(tempos)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Latência das reexecuções da página Estratégia.")
+    parser.add_argument("--raiz", default=RAIZ, help="Repositório cujo app será medido.")
+    parser.add_argument("--rodadas", type=int, default=300, help="Reexecuções medidas.")
+    parser.add_argument("--fragmento", action="store_true", help="Reexecuta apenas o fragmento da página.")
+    args = parser.parse_args()
+
+    tempos = medir_reruns(os.path.abspath(args.raiz), args.rodadas, args.fragmento)
+    print(f"{'fragmento' if args.fragmento else 'completo'} | n={len(tempos)} | "
+          f"p50 {np.percentile(tempos, 50):.1f} ms | p90 {np.percentile(tempos, 90):.1f} ms")
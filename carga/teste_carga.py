@@ -0,0 +1,509 @@
+"""
+Teste de carga do app: sobe um único servidor com `streamlit run` e simula N sessões
+concorrentes conectadas a ele, percorrendo os fluxos reais das páginas (busca no Planilhão,
+geração de Estratégia e geração de Gráficos) contra a API sintética de `carga.api_falsa`, e
+relata vazão, percentis de latência por ação e memória do servidor.
+
+Cada sessão fala com o servidor como o navegador: pelo websocket `/_stcore/stream`, com as
+mensagens protobuf do Streamlit. Uma ação envia um `BackMsg` de reexecução com os estados dos
+widgets (e o id do fragmento, quando o widget está dentro de uma página) e termina quando o
+servidor envia `script_finished`. As sessões compartilham, portanto, o runtime, os caches
+(`st.cache_data`, `st.cache_resource` e o cache das respostas da API) e o banco analítico,
+como em produção.
+
+A API sintética roda em um processo próprio, para não disputar o GIL com o servidor nem ter o
+seu trabalho contado na memória dele. A memória relatada é a residente (`VmRSS` de `/proc`,
+portanto apenas no Linux) do processo do servidor, amostrada durante todo o teste, a partir
+de uma carga inicial de aquecimento que importa os módulos do app.
+
+Uso:
+    python -m carga.teste_carga --sessoes 20 --rodadas 3 --latencia 0.05
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from pathlib import Path
+import numpy as np
+import pandas as pd
+from carga.api_falsa import iniciar_api_falsa
+
+# Raiz do repositório e script principal do app.
+RAIZ = str(Path(__file__).resolve().parent.parent)
+APP = os.path.join(RAIZ, "app.py")
+
+# Intervalo entre duas amostras da memória do servidor, em segundos.
+INTERVALO_AMOSTRAGEM = 0.2
+
+# Tempo máximo para o servidor do app começar a responder, em segundos.
+TIMEOUT_INICIO = 60
+
+
+def memoria_residente_mb(pid: int) -> float:
+    """
+    Memória residente atual de um processo, em MB.
+
+    Args:
+        pid (int): Id do processo.
+
+    Returns:
+        float: Memória em megabytes, ou NaN se `/proc` não estiver disponível.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for linha in f:
+                if linha.startswith("VmRSS:"):
+                    return int(linha.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+
+
+def _dia_util(dias_atras: int):
+    """Dia útil imediatamente anterior à data de `dias_atras` dias atrás."""
+    return (pd.Timestamp.today().normalize() - pd.Timedelta(days=dias_atras) - pd.offsets.BDay(1)).date()
+
+
+def _porta_livre() -> int:
+    """Porta local livre, escolhida pelo sistema."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _servir_api_falsa(latencia: float, fila):
+    """Processo da API sintética: publica o endereço em `fila` e atende até ser encerrado."""
+    _, url = iniciar_api_falsa(latencia)
+    fila.put(url)
+    threading.Event().wait()
+
+
+def iniciar_api_em_processo(latencia: float) -> tuple:
+    """
+    Inicia a API sintética em um processo próprio.
+
+    Args:
+        latencia (float): Atraso artificial de cada resposta, em segundos.
+
+    Returns:
+        Tuple[multiprocessing.Process, str]: Processo da API e endereço base para `API_BASE_URL`.
+    """
+    # "spawn" para não herdar o estado do processo do teste.
+    contexto = multiprocessing.get_context("spawn")
+    fila = contexto.Queue()
+    processo = contexto.Process(target=_servir_api_falsa, args=(latencia, fila), daemon=True)
+    processo.start()
+    return processo, fila.get(timeout=TIMEOUT_INICIO)
+
+
+def iniciar_servidor_app(porta: int, ambiente: dict) -> subprocess.Popen:
+    """
+    Inicia o app com `streamlit run` e espera o servidor responder.
+
+    Args:
+        porta (int): Porta local do servidor.
+        ambiente (dict): Variáveis de ambiente do processo do servidor.
+
+    Returns:
+        subprocess.Popen: Processo do servidor.
+
+    Raises:
+        RuntimeError: Se o servidor terminar ou não responder em `TIMEOUT_INICIO` segundos.
+    """
+    processo = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", APP,
+         "--server.headless", "true", "--server.address", "127.0.0.1", "--server.port", str(porta),
+         "--server.fileWatcherType", "none", "--browser.gatherUsageStats", "false"],
+        cwd=RAIZ, env=ambiente, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    limite = time.monotonic() + TIMEOUT_INICIO
+    while time.monotonic() < limite:
+        if processo.poll() is not None:
+            raise RuntimeError(f"O servidor do app terminou ao iniciar (código {processo.returncode}).")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{porta}/_stcore/health", timeout=1) as resposta:
+                if resposta.status == 200:
+                    return processo
+        except OSError:
+            time.sleep(0.2)
+    processo.kill()
+    raise RuntimeError(f"O servidor do app não respondeu em {TIMEOUT_INICIO} s.")
+
+
+class SessaoNavegador:
+    """
+    Sessão do app conduzida pelo websocket, com as mesmas mensagens que o navegador envia.
+
+    Guarda os elementos exibidos (por caminho na árvore de elementos, com o fragmento e a
+    execução que os escreveram) para encontrar os widgets pelo rótulo ou pela chave, e os
+    valores dos widgets já alterados, reenviados a cada execução como faz o navegador.
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url
+        self.timeout = timeout
+        self.conexao = None
+        self.elementos = {}  # caminho -> (elemento, id do fragmento, execução)
+        self.estados = {}  # id do widget -> WidgetState
+        self.mensagens_guardadas = {}  # hash -> ForwardMsg, para as referências do cache de mensagens
+        self.pagina = ""
+        self.execucao = 0
+
+    async def conectar(self):
+        """Abre o websocket da sessão."""
+        import tornado.websocket
+
+        self.conexao = await tornado.websocket.websocket_connect(
+            self.url, subprotocols=["streamlit"], max_message_size=1 << 30
+        )
+
+    def fechar(self):
+        """Fecha o websocket, encerrando a sessão no servidor."""
+        if self.conexao is not None:
+            self.conexao.close()
+
+    def widget(self, tipo: str, rotulo: str = None, chave: str = None):
+        """
+        Encontra um widget exibido.
+
+        Args:
+            tipo (str): Tipo do elemento (por exemplo, 'button' ou 'date_input').
+            rotulo (str, opcional): Rótulo exato do widget.
+            chave (str, opcional): Chave (`key`) do widget.
+
+        Returns:
+            Tuple[object, str]: Proto do widget e id do fragmento que o contém ('' fora de fragmentos).
+
+        Raises:
+            LookupError: Se nenhum widget exibido corresponder.
+        """
+        for caminho in sorted(self.elementos):
+            elemento, fragmento, _ = self.elementos[caminho]
+            if elemento.WhichOneof("type") != tipo:
+                continue
+            proto = getattr(elemento, tipo)
+            if rotulo is not None and proto.label != rotulo:
+                continue
+            if chave is not None and not proto.id.endswith(f"-{chave}"):
+                continue
+            return proto, fragmento
+        raise LookupError(f"Widget não encontrado: {tipo} {rotulo or chave or ''}")
+
+    def definir_datas(self, *datas, rotulo: str = None, chave: str = None):
+        """Altera o valor de um `st.date_input` (sem rótulo nem chave, o primeiro exibido), enviado na próxima execução."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        proto, _ = self.widget("date_input", rotulo, chave)
+        estado = WidgetState(id=proto.id)
+        estado.string_array_value.data.extend(data.strftime("%Y/%m/%d") for data in datas)
+        self.estados[proto.id] = estado
+
+    async def clicar(self, rotulo: str) -> list:
+        """
+        Clica em um botão, reexecutando o fragmento dele (ou o app, se estiver fora de fragmentos).
+
+        Returns:
+            list: Mensagens de erro exibidas na execução.
+        """
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        proto, fragmento = self.widget("button", rotulo)
+        return await self.executar([WidgetState(id=proto.id, trigger_value=True)], fragmento)
+
+    async def executar(self, gatilhos: list = (), fragmento: str = "") -> list:
+        """
+        Pede uma execução ao servidor e processa as mensagens até o seu fim.
+
+        Args:
+            gatilhos (list, opcional): Estados de botões, enviados apenas nesta execução.
+            fragmento (str, opcional): Id do fragmento reexecutado. Padrão: o app inteiro.
+
+        Returns:
+            list: Mensagens de erro (`st.error` e exceções) exibidas na execução.
+
+        Raises:
+            asyncio.TimeoutError: Se a execução não terminar em `timeout` segundos.
+            RuntimeError: Se o servidor fechar a conexão ou a execução for interrompida.
+        """
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+
+        # Como o navegador, envia apenas os valores dos widgets ainda exibidos.
+        exibidos = {
+            getattr(getattr(elemento, elemento.WhichOneof("type")), "id", None)
+            for elemento, _, _ in self.elementos.values() if elemento.WhichOneof("type")
+        }
+        self.estados = {id_widget: estado for id_widget, estado in self.estados.items() if id_widget in exibidos}
+
+        self.execucao += 1
+        mensagem = BackMsg()
+        estado = mensagem.rerun_script
+        estado.page_script_hash = self.pagina
+        estado.fragment_id = fragmento
+        estado.widget_states.widgets.extend(list(self.estados.values()) + list(gatilhos))
+        await self.conexao.write_message(mensagem.SerializeToString(), binary=True)
+        return await asyncio.wait_for(self._receber_execucao(fragmento), self.timeout)
+
+    async def _receber_execucao(self, fragmento: str) -> list:
+        """Processa as mensagens do servidor até `script_finished`, descartando os elementos que não foram reescritos."""
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+        erros = []
+        while True:
+            dados = await self.conexao.read_message()
+            if dados is None:
+                raise RuntimeError("O servidor fechou a conexão.")
+            mensagem = ForwardMsg()
+            mensagem.ParseFromString(dados)
+            if mensagem.WhichOneof("type") == "ref_hash":
+                # A referência traz apenas a posição atual; o conteúdo é o da mensagem guardada.
+                referencia = mensagem
+                mensagem = ForwardMsg()
+                mensagem.CopyFrom(self.mensagens_guardadas[referencia.ref_hash])
+                mensagem.metadata.CopyFrom(referencia.metadata)
+            elif mensagem.metadata.cacheable:
+                self.mensagens_guardadas[mensagem.hash] = mensagem
+
+            tipo = mensagem.WhichOneof("type")
+            if tipo == "new_session":
+                self.pagina = mensagem.new_session.page_script_hash
+            elif tipo == "delta":
+                erros.extend(self._aplicar_delta(mensagem))
+            elif tipo == "script_finished":
+                if mensagem.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    self._descartar_antigos(lambda id_fragmento: True)
+                elif mensagem.script_finished == ForwardMsg.FINISHED_FRAGMENT_RUN_SUCCESSFULLY:
+                    self._descartar_antigos(lambda id_fragmento: id_fragmento == fragmento)
+                else:
+                    raise RuntimeError(f"Execução terminada com o status {mensagem.script_finished}.")
+                return erros
+
+    def _aplicar_delta(self, mensagem) -> list:
+        """Atualiza a árvore de elementos com um delta e retorna as mensagens de erro que ele exibe."""
+        from streamlit.proto.Alert_pb2 import Alert
+
+        caminho = tuple(mensagem.metadata.delta_path)
+        delta = mensagem.delta
+        if delta.WhichOneof("type") not in ("new_element", "add_block"):
+            return []
+        # Um elemento novo em um caminho substitui tudo o que estava abaixo dele.
+        for antigo in [c for c in self.elementos if c[:len(caminho)] == caminho and c != caminho]:
+            del self.elementos[antigo]
+        if delta.WhichOneof("type") == "add_block":
+            self.elementos.pop(caminho, None)
+            return []
+        elemento = delta.new_element
+        self.elementos[caminho] = (elemento, delta.fragment_id, self.execucao)
+        tipo = elemento.WhichOneof("type")
+        if tipo == "alert" and elemento.alert.format == Alert.ERROR:
+            return [elemento.alert.body]
+        if tipo == "exception":
+            return [elemento.exception.message]
+        return []
+
+    def _descartar_antigos(self, no_escopo):
+        """Remove os elementos do escopo da execução que ela não reescreveu, como faz o navegador."""
+        self.elementos = {
+            caminho: (elemento, fragmento, execucao)
+            for caminho, (elemento, fragmento, execucao) in self.elementos.items()
+            if execucao == self.execucao or not no_escopo(fragmento)
+        }
+
+
+async def simular_sessao(url: str, indice: int, rodadas: int, datas_distintas: int, timeout: float) -> list:
+    """
+    Simula uma sessão de analista percorrendo as três páginas principais.
+
+    Args:
+        url (str): Endereço do websocket do servidor do app.
+        indice (int): Número da sessão, usado para variar as datas consultadas.
+        rodadas (int): Quantas vezes a sessão repete o fluxo completo.
+        datas_distintas (int): Quantidade de datas base diferentes entre as sessões.
+        timeout (float): Tempo máximo de cada execução do app, em segundos.
+
+    Returns:
+        list: Tuplas (ação, segundos, sucesso).
+    """
+    medicoes = []
+    sessao = SessaoNavegador(url, timeout)
+
+    async def medir(acao, passo, aceitar_erros=False):
+        # As páginas tratam os próprios erros com `st.error`, então uma ação só é bem-sucedida
+        # sem exceções e sem mensagens de erro. Ao navegar, a data padrão (hoje) é recusada
+        # pelas páginas, e essas mensagens são esperadas.
+        inicio = time.perf_counter()
+        try:
+            erros = await passo()
+            sucesso = aceitar_erros or not erros
+        except Exception:
+            sucesso = False
+        medicoes.append((acao, time.perf_counter() - inicio, sucesso))
+        return sucesso
+
+    async def carga_inicial():
+        await sessao.conectar()
+        return await sessao.executar()
+
+    try:
+        if not await medir("carga_inicial", carga_inicial):
+            return medicoes
+        for rodada in range(rodadas):
+            deslocamento = 7 * ((indice + rodada) % datas_distintas)
+            data_base = _dia_util(30 + deslocamento)
+
+            await medir("navegacao", lambda: sessao.clicar("📋 Planilhão"), aceitar_erros=True)
+            sessao.definir_datas(data_base)
+            await medir("planilhao_busca", lambda: sessao.clicar("Buscar"))
+
+            await medir("navegacao", lambda: sessao.clicar("🔍 Estratégia"), aceitar_erros=True)
+            sessao.definir_datas(data_base)
+            await medir("estrategia_geracao", lambda: sessao.clicar("Gerar Estratégia"))
+
+            await medir("navegacao", lambda: sessao.clicar("📊 Gráfico"), aceitar_erros=True)
+            sessao.definir_datas(_dia_util(365 + deslocamento), data_base, chave="data_periodo")
+            await medir("grafico_geracao", lambda: sessao.clicar("Gerar Gráficos"))
+    finally:
+        sessao.fechar()
+    return medicoes
+
+
+async def _amostrar_memoria(pid: int, amostras: list, parar: asyncio.Event):
+    """Amostra a memória residente do servidor a cada `INTERVALO_AMOSTRAGEM` segundos até `parar`."""
+    while not parar.is_set():
+        amostras.append(memoria_residente_mb(pid))
+        try:
+            await asyncio.wait_for(parar.wait(), INTERVALO_AMOSTRAGEM)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def _aquecer(url: str, timeout: float):
+    """Carrega o app uma vez, para que a importação dos módulos não seja contada como memória das sessões."""
+    sessao = SessaoNavegador(url, timeout)
+    try:
+        await sessao.conectar()
+        await sessao.executar()
+    finally:
+        sessao.fechar()
+
+
+async def _executar_sessoes(url: str, pid: int, sessoes: int, rodadas: int, datas_distintas: int,
+                            timeout: float) -> tuple:
+    """Executa as sessões simultâneas enquanto amostra a memória do servidor."""
+    amostras = []
+    parar = asyncio.Event()
+    amostragem = asyncio.create_task(_amostrar_memoria(pid, amostras, parar))
+    try:
+        resultados = await asyncio.gather(*(
+            simular_sessao(url, i, rodadas, datas_distintas, timeout) for i in range(sessoes)
+        ))
+    finally:
+        parar.set()
+        await amostragem
+    return resultados, amostras
+
+
+def executar_teste(sessoes: int, rodadas: int, latencia: float, datas_distintas: int, timeout: float) -> dict:
+    """
+    Executa o teste de carga e consolida as medições.
+
+    Args:
+        sessoes (int): Número de sessões simultâneas.
+        rodadas (int): Repetições do fluxo completo por sessão.
+        latencia (float): Atraso artificial de cada resposta da API sintética, em segundos.
+        datas_distintas (int): Quantidade de datas base diferentes entre as sessões.
+        timeout (float): Tempo máximo de cada execução do app, em segundos.
+
+    Returns:
+        dict: Vazão, percentis por ação, falhas e memória do servidor. A memória inicial é a do
+        servidor com o app já carregado uma vez e sem sessões; a memória por sessão é o acréscimo
+        até o pico dividido pelo número de sessões, e inclui os caches compartilhados preenchidos por elas.
+    """
+    api, url_api = iniciar_api_em_processo(latencia)
+    temporario = tempfile.mkdtemp(prefix="carga_")
+    ambiente = dict(
+        os.environ,
+        API_BASE_URL=url_api,
+        SNAPSHOT_DIR=os.path.join(temporario, "snapshots"),
+        BANCO_ANALITICO=os.path.join(temporario, "analitico.duckdb"),
+    )
+    ambiente.setdefault("TOKEN", "teste-de-carga")
+    porta = _porta_livre()
+    try:
+        servidor = iniciar_servidor_app(porta, ambiente)
+        url = f"ws://127.0.0.1:{porta}/_stcore/stream"
+        try:
+            asyncio.run(_aquecer(url, timeout))
+            memoria_inicial = memoria_residente_mb(servidor.pid)
+            inicio = time.perf_counter()
+            resultados, amostras = asyncio.run(
+                _executar_sessoes(url, servidor.pid, sessoes, rodadas, datas_distintas, timeout)
+            )
+            duracao = time.perf_counter() - inicio
+        finally:
+            servidor.terminate()
+            try:
+                servidor.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                servidor.kill()
+    finally:
+        api.terminate()
+
+    medicoes = pd.DataFrame([m for sessao in resultados for m in sessao], columns=["acao", "segundos", "sucesso"])
+    acoes = {}
+    for acao, grupo in medicoes.groupby("acao"):
+        tempos = grupo["segundos"].to_numpy() * 1000
+        acoes[acao] = {
+            "execucoes": len(grupo),
+            "falhas": int((~grupo["sucesso"]).sum()),
+            "p50_ms": float(np.percentile(tempos, 50)),
+            "p95_ms": float(np.percentile(tempos, 95)),
+            "p99_ms": float(np.percentile(tempos, 99)),
+        }
+    memoria_pico = float(np.nanmax(amostras)) if amostras else float("nan")
+    return {
+        "sessoes": sessoes,
+        "rodadas": rodadas,
+        "latencia_api_s": latencia,
+        "duracao_s": duracao,
+        "vazao_acoes_por_s": len(medicoes) / duracao,
+        "acoes": acoes,
+        "memoria_servidor_inicial_mb": memoria_inicial,
+        "memoria_servidor_pico_mb": memoria_pico,
+        "memoria_por_sessao_mb": (memoria_pico - memoria_inicial) / sessoes,
+    }
+
+
+def imprimir_relatorio(relatorio: dict):
+    """Imprime o relatório do teste de carga em formato de tabela."""
+    print(f"Sessões: {relatorio['sessoes']} | Rodadas: {relatorio['rodadas']} | "
+          f"Latência da API: {relatorio['latencia_api_s'] * 1000:.0f} ms")
+    print(f"Duração: {relatorio['duracao_s']:.1f} s | Vazão: {relatorio['vazao_acoes_por_s']:.2f} ações/s")
+    print(pd.DataFrame(relatorio["acoes"]).T.round(1).to_string())
+    print(f"Memória do servidor (MB): inicial {relatorio['memoria_servidor_inicial_mb']:.0f} | "
+          f"pico {relatorio['memoria_servidor_pico_mb']:.0f} | "
+          f"por sessão {relatorio['memoria_por_sessao_mb']:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Teste de carga com sessões simultâneas em um servidor do app.")
+    parser.add_argument("--sessoes", type=int, default=10, help="Número de sessões simultâneas.")
+    parser.add_argument("--rodadas", type=int, default=2, help="Repetições do fluxo completo por sessão.")
+    parser.add_argument("--latencia", type=float, default=0.05, help="Atraso de cada resposta da API, em segundos.")
+    parser.add_argument("--datas-distintas", type=int, default=3, help="Datas base diferentes entre as sessões.")
+    parser.add_argument("--timeout", type=float, default=120, help="Tempo máximo de cada execução, em segundos.")
+    parser.add_argument("--json", help="Arquivo onde salvar o relatório em JSON.")
+    args = parser.parse_args()
+
+    relatorio = executar_teste(args.sessoes, args.rodadas, args.latencia, args.datas_distintas, args.timeout)
+    imprimir_relatorio(relatorio)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(relatorio, f, indent=2)
@@ -0,0 +1,76 @@
+from functools import wraps
+import streamlit as st
+from backend.exportacao import FORMATOS, serializar_frame
+from backend.frames import hash_frame
+from log_config.perfilamento import perfilar
+
+
+def botoes_exportacao(df, nome_arquivo, chave=None):
+    """
+    Exibe a escolha do formato de exportação (Arrow IPC ou Parquet) e o botão de download do DataFrame.
+
+    Apenas o formato escolhido é serializado, e o resultado fica em cache por conteúdo e formato.
+
+    Args:
+        df (pd.DataFrame): DataFrame a ser exportado.
+        nome_arquivo (str): Nome do arquivo, sem extensão.
+        chave (str, opcional): Identificação do conteúdo do DataFrame. Padrão: hash do conteúdo.
+
+    Returns:
+        None
+    """
+    coluna_formato, coluna_botao = st.columns(2)
+    with coluna_formato:
+        formato = st.radio(
+            f"Formato de {nome_arquivo}:",
+            options=list(FORMATOS),
+            horizontal=True,
+            label_visibility="collapsed",
+            key=f"formato_{nome_arquivo}"
+        )
+    extensao, mime = FORMATOS[formato]
+    with coluna_botao:
+        st.download_button(
+            f"⬇️ {nome_arquivo}.{extensao}",
+            data=serializar_frame(df, chave or hash_frame(df), formato),
+            file_name=f"{nome_arquivo}.{extensao}",
+            mime=mime,
+            key=f"exportar_{nome_arquivo}"
+        )
+
+
+def painel_diagnostico(resultado):
+    """
+    Exibe o painel de diagnóstico com os pontos críticos de um perfil de execução.
+
+    Args:
+        resultado (ResultadoPerfil): Perfil gerado por `perfilar`.
+
+    Returns:
+        None
+    """
+    with st.expander(f"🩺 Diagnóstico | {resultado.nome}: {resultado.duracao_ms:.0f} ms"):
+        if resultado.arquivo:
+            st.caption(f"Perfil salvo em `{resultado.arquivo}` (abra com `python -m pstats` ou snakeviz).")
+        st.dataframe(resultado.pontos_criticos.round(2), use_container_width=True)
+        st.json(resultado.entradas, expanded=False)
+
+
+def perfilado(nome):
+    """
+    Decorador que perfila cada execução da página (inclusive as reexecuções do seu fragmento)
+    quando o perfilamento está ativado, e exibe o painel de diagnóstico ao final dela.
+
+    Args:
+        nome (str): Identificação da página.
+    """
+    def decorador(funcao):
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with perfilar(nome) as perfilamento:
+                retorno = funcao(*args, **kwargs)
+            if perfilamento.resultado is not None:
+                painel_diagnostico(perfilamento.resultado)
+            return retorno
+        return envolvida
+    return decorador
@@ -1,18 +1,34 @@
+import itertools
 import streamlit as st
 import pandas as pd
 from datetime import date
 from backend.views import carteira, validar_data
-from backend.routers import menu_estrategia
+from backend.routers import (
+    menu_estrategia, menu_backtest, menu_estrategia_multifatorial, menu_diferenca_carteiras, menu_rotatividade
+)
+from backend.backtest import FREQUENCIAS
+from backend.ranking import INDICADORES, DIRECOES, MODOS_SETOR
+from backend.snapshots import carregar_snapshot
+from backend.frames import ReferenciaFrame
+from frontend.componentes import botoes_exportacao, perfilado
 from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.tempo import cronometrar
 
+@st.fragment
+@perfilado("Página Estratégia")
+@cronometrar("Página Estratégia")
 def Pagina_estrategia():
     """
     Exibe a página de estratégia na aplicação Streamlit, permitindo ao usuário selecionar indicadores financeiros
     e parâmetros para gerar uma carteira de ações.
 
+    A página é executada como um fragmento: interações com os seus widgets reexecutam
+    apenas esta função, sem recarregar a navegação e o restante do app.
+
     Funcionalidades:
         - Permite a escolha de indicadores de rentabilidade e desconto.
         - Permite a seleção de uma data base para análise e o número de ações desejadas.
+        - Permite um ajuste setorial opcional (ranking dentro do setor, limite por setor ou z-score neutro).
         - Gera uma carteira de ações com base nos critérios selecionados.
         - Exibe os resultados da análise em formato tabular.
 
@@ -70,6 +86,17 @@ def Pagina_estrategia():
         )
         logger.info(f"Data selecionada: {data}. Quantidade de ações: {num}")
 
+        # Ajuste setorial da seleção
+        modo_setor = st.selectbox(
+            "Ajuste **setorial**:",
+            options=MODOS_SETOR,
+            help="Evita que a carteira se concentre em poucos setores."
+        )
+        limite_setor = None
+        if modo_setor == "Limite por setor":
+            limite_setor = st.number_input("Máximo de ações por setor:", min_value=1, max_value=3000, value=3)
+        logger.info(f"Ajuste setorial selecionado: {modo_setor} | Limite por setor: {limite_setor}")
+
         # Validação da data
         validar_data(data)
 
@@ -78,25 +105,200 @@ def Pagina_estrategia():
             logger.info("Usuário clicou em 'Gerar Estratégia'.")
             try:
                 # Geração da carteira de ações
-                df_sorted, acoes_carteira = carteira(data, indicador_rent_valor, indicador_desc_valor, num)
+                df_sorted, acoes_carteira = carteira(
+                    data, indicador_rent_valor, indicador_desc_valor, num, modo_setor, limite_setor
+                )
 
-                # Armazenar no session_state
+                # Armazenar no session_state apenas a referência ao DataFrame compartilhado
                 st.session_state.acoes_carteira = acoes_carteira
-                st.session_state.df_sorted = df_sorted
+                st.session_state.df_sorted = ReferenciaFrame(df_sorted)
                 st.session_state.estrategia_preenchida = True
-                logger.info(f"Carteira gerada com sucesso. Ações selecionadas: {acoes_carteira}")
-
-                # Exibição dos resultados
-                st.markdown("### 📊 Resultados da Análise")
-                st.write(
+                st.session_state.descricao_estrategia = (
                     f"Top {num} ações pelo indicador de rentabilidade: **{indicador_rent}** e "
                     f"pelo indicador de desconto **{indicador_desc}** com base na data **{data.strftime('%Y-%m-%d')}**."
+                    + (f" Ajuste setorial: **{modo_setor}**." if modo_setor != MODOS_SETOR[0] else "")
                 )
-                st.dataframe(df_sorted)
+                logger.info(f"Carteira gerada com sucesso. Ações selecionadas: {acoes_carteira}")
                 st.success("✅ Estratégia gerada com sucesso!")
             except Exception as e:
                 logger.error(f"Erro ao gerar estratégia: {e}")
                 st.error("❌ Ocorreu um erro ao gerar a estratégia. Por favor, tente novamente.")
+
+        secao_multifatorial(data, num)
+
+        # Exibição dos resultados da última estratégia gerada na sessão
+        referencia = st.session_state.get("df_sorted")
+        if referencia is not None and referencia.df is not None:
+            st.markdown("### 📊 Resultados da Análise")
+            st.write(st.session_state.descricao_estrategia)
+            st.dataframe(referencia.df)
+            botoes_exportacao(referencia.df, "estrategia", chave=referencia.chave)
+
+        secao_rotatividade(indicador_rent_valor, indicador_desc_valor, num)
+        secao_backtest(indicadores_rentabilidade, indicadores_desconto)
     except Exception as e:
         logger.error(f"Erro na página Estratégia: {e}")
         st.error("❌ Ocorreu um erro inesperado. Verifique os logs ou entre em contato com o suporte.")
+
+
+def secao_multifatorial(data, num):
+    """
+    Exibe a seção de estratégia multifatorial, que combina qualquer número de indicadores com direção e peso,
+    com filtros opcionais de setor e de liquidez mínima.
+
+    Args:
+        data (date): Data base selecionada na página.
+        num (int): Quantidade de ações selecionada na página.
+
+    Returns:
+        None
+    """
+    with st.expander("⚙️ Estratégia Multifatorial"):
+        st.caption("Combine vários indicadores, escolhendo para cada um se o melhor é o maior ou o menor valor e o seu peso. "
+                   "As notas comparam cada ação com o planilhão inteiro; os filtros de setor e de volume só limitam quais ações podem ser escolhidas.")
+        fatores = st.data_editor(
+            pd.DataFrame({"indicador": ["roic", "earning_yield"], "direcao": ["maior", "maior"], "peso": [1.0, 1.0]}),
+            column_config={
+                "indicador": st.column_config.SelectboxColumn("Indicador", options=INDICADORES + ["volume"], required=True),
+                "direcao": st.column_config.SelectboxColumn("Direção", options=list(DIRECOES), required=True),
+                "peso": st.column_config.NumberColumn("Peso", min_value=0.01, step=0.5, required=True),
+            },
+            num_rows="dynamic",
+            hide_index=True,
+            key="mf_fatores"
+        )
+
+        setores = None
+        if st.toggle("Filtrar por setor", key="mf_filtrar_setor"):
+            try:
+                opcoes = sorted(carregar_snapshot(data).df["setor"].dropna().unique())
+                setores = st.multiselect("Setores aceitos:", opcoes, key="mf_setores")
+            except Exception as e:
+                logger.error(f"Erro ao carregar setores: {e}")
+                st.warning("⚠️ Não foi possível carregar os setores para a data selecionada.")
+        volume_minimo = st.number_input("Volume mínimo negociado:", min_value=0.0, value=0.0, step=1e6, key="mf_volume")
+
+        if st.button("Gerar Estratégia Multifatorial"):
+            lista_fatores = [
+                (linha.indicador, linha.direcao, float(linha.peso))
+                for linha in fatores.dropna().itertuples(index=False)
+            ]
+            logger.info(f"Usuário clicou em 'Gerar Estratégia Multifatorial' com fatores: {lista_fatores}")
+            try:
+                df_sorted, acoes_carteira = menu_estrategia_multifatorial(
+                    data, lista_fatores, num, setores or None, volume_minimo or None
+                )
+                st.session_state.acoes_carteira = acoes_carteira
+                st.session_state.df_sorted = ReferenciaFrame(df_sorted)
+                st.session_state.estrategia_preenchida = True
+                st.session_state.descricao_estrategia = (
+                    f"Top {len(acoes_carteira)} ações pelo ranking multifatorial "
+                    f"({', '.join(f'{c} {d} x{p:g}' for c, d, p in lista_fatores)}) "
+                    f"com base na data **{data.strftime('%Y-%m-%d')}**."
+                )
+                st.success("✅ Estratégia multifatorial gerada com sucesso!")
+            except ValueError as e:
+                st.error(f"❌ {e}")
+            except Exception as e:
+                logger.error(f"Erro ao gerar estratégia multifatorial: {e}")
+                st.error("❌ Ocorreu um erro ao gerar a estratégia. Por favor, tente novamente.")
+
+
+def secao_rotatividade(indicador_rent, indicador_desc, num):
+    """
+    Exibe a seção de rotatividade da estratégia: entradas e saídas da carteira entre duas datas base
+    e a rotatividade em cada rebalanceamento de um período.
+
+    Args:
+        indicador_rent (str): Indicador de rentabilidade selecionado.
+        indicador_desc (str): Indicador de desconto selecionado.
+        num (int): Número de ações da carteira.
+
+    Returns:
+        None
+    """
+    with st.expander("🔄 Rotatividade da Carteira"):
+        st.caption("Veja quais ações entram e saem da carteira entre datas base, com os indicadores selecionados acima.")
+
+        st.markdown("#### Comparar duas datas base")
+        coluna_anterior, coluna_atual = st.columns(2)
+        data_anterior = coluna_anterior.date_input(
+            "Carteira anterior:", value=pd.to_datetime('today') - pd.DateOffset(months=3), key="rt_data_anterior"
+        )
+        data_atual = coluna_atual.date_input(
+            "Carteira atual:", value=pd.to_datetime('today') - pd.DateOffset(days=1), key="rt_data_atual"
+        )
+        if st.button("Comparar Carteiras"):
+            logger.info(f"Usuário clicou em 'Comparar Carteiras' | {data_anterior} x {data_atual}")
+            try:
+                validar_data(data_anterior)
+                validar_data(data_atual)
+                diferenca = menu_diferenca_carteiras(data_anterior, data_atual, indicador_rent, indicador_desc, num)
+                coluna_entradas, coluna_saidas, coluna_rotatividade = st.columns(3)
+                coluna_entradas.metric("Entradas", len(diferenca.entradas))
+                coluna_saidas.metric("Saídas", len(diferenca.saidas))
+                coluna_rotatividade.metric("Rotatividade", f"{diferenca.rotatividade:.1%}")
+                st.dataframe(diferenca.detalhes, use_container_width=True)
+            except Exception as e:
+                logger.error(f"Erro ao comparar carteiras: {e}")
+                st.error(f"❌ Erro ao comparar as carteiras: {e}")
+
+        st.markdown("#### Rotatividade em cada rebalanceamento")
+        periodo = st.date_input(
+            "Período:",
+            value=(pd.to_datetime('today') - pd.DateOffset(years=2), pd.to_datetime('today') - pd.DateOffset(days=1)),
+            key="rt_periodo"
+        )
+        frequencia = st.selectbox("Frequência de rebalanceamento:", list(FREQUENCIAS), key="rt_freq")
+        if st.button("Calcular Rotatividade") and len(periodo) == 2:
+            logger.info(f"Usuário clicou em 'Calcular Rotatividade' | {periodo} | {frequencia}")
+            try:
+                with st.spinner("⏳ Calculando rotatividade..."):
+                    historico = menu_rotatividade(periodo[0], periodo[1], frequencia, indicador_rent, indicador_desc, num)
+                st.metric("Rotatividade média por rebalanceamento", f"{historico['rotatividade'].mean():.1%}")
+                st.line_chart(historico.set_index("data_atual")["rotatividade"])
+                st.dataframe(historico, use_container_width=True)
+            except Exception as e:
+                logger.error(f"Erro ao calcular rotatividade: {e}")
+                st.error(f"❌ Erro ao calcular a rotatividade: {e}")
+
+
+def secao_backtest(indicadores_rentabilidade, indicadores_desconto):
+    """
+    Exibe a seção de backtest de variantes da estratégia, executadas em paralelo em um pool de processos.
+
+    Args:
+        indicadores_rentabilidade (dict): Rótulos amigáveis e valores técnicos dos indicadores de rentabilidade.
+        indicadores_desconto (dict): Rótulos amigáveis e valores técnicos dos indicadores de desconto.
+
+    Returns:
+        None
+    """
+    with st.expander("🧪 Backtest de Variantes"):
+        st.caption("Compare várias combinações de indicadores, quantidade de ações e frequência de rebalanceamento.")
+        rent = st.multiselect("Indicadores de rentabilidade:", list(indicadores_rentabilidade), key="bt_rent")
+        desc = st.multiselect("Indicadores de desconto:", list(indicadores_desconto), key="bt_desc")
+        nums = st.multiselect("Quantidades de ações:", [5, 10, 15, 20, 30, 50], default=[10], key="bt_nums")
+        frequencias = st.multiselect("Frequências de rebalanceamento:", list(FREQUENCIAS), default=["mensal"], key="bt_freq")
+        periodo = st.date_input(
+            "Período do backtest:",
+            value=(pd.to_datetime('today') - pd.DateOffset(years=3), pd.to_datetime('today') - pd.DateOffset(days=1)),
+            key="bt_periodo"
+        )
+
+        variantes = [
+            (indicadores_rentabilidade[r], indicadores_desconto[d], n, f)
+            for r, d, n, f in itertools.product(rent, desc, nums, frequencias)
+        ]
+        st.write(f"Variantes selecionadas: **{len(variantes)}**")
+
+        if st.button("Executar Backtest") and len(periodo) == 2:
+            logger.info(f"Usuário clicou em 'Executar Backtest' com {len(variantes)} variantes.")
+            try:
+                with st.spinner("⏳ Executando backtest..."):
+                    resumo = menu_backtest(periodo[0], periodo[1], variantes)
+                st.dataframe(resumo, use_container_width=True)
+                st.success("✅ Backtest concluído com sucesso!")
+            except Exception as e:
+                logger.error(f"Erro ao executar backtest: {e}")
+                st.error(f"❌ Erro ao executar o backtest: {e}")
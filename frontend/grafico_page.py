@@ -1,18 +1,36 @@
 import streamlit as st
 import pandas as pd
-from backend.views import pegar_df_preco_corrigido, pegar_df_preco_diversos, validar_data
-from backend.routers import Comparacao_graficos
+from backend.views import validar_data
+from backend.routers import Comparacao_graficos, menu_metricas, menu_comparativo, menu_ponderacao
+from backend.metricas import METRICAS, COLUNA_IBOV, montar_matriz_precos, retornos_comparativo
+from backend.otimizacao import METODOS, JANELA_ESTIMACAO
+from frontend.componentes import botoes_exportacao, perfilado
 from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.tempo import cronometrar
 
+# Frações das séries recebidas em que o gráfico parcial é redesenhado durante o carregamento
+# (além da chegada do IBOVESPA). Cada redesenho remonta a matriz com tudo o que já chegou, então
+# o número de redesenhos é fixo para o custo total crescer linearmente com o tamanho da carteira.
+MARCOS_GRAFICO_PARCIAL = (0.25, 0.5, 0.75)
+
+@st.fragment
+@perfilado("Página Gráficos")
+@cronometrar("Página Gráficos")
 def Pagina_grafico(restrict_access=False):
     """
     Exibe a página de gráficos na aplicação Streamlit, permitindo ao usuário analisar 
     e comparar os retornos acumulados da carteira de ações com o IBOVESPA.
 
+    A página é executada como um fragmento: interações com os seus widgets reexecutam
+    apenas esta função, sem recarregar a navegação e o restante do app.
+
     Funcionalidades:
         - Verifica se a estratégia está preenchida antes de continuar.
         - Permite ao usuário selecionar um período de análise com datas de início e fim.
+        - Carrega os preços da carteira e do IBOVESPA ao mesmo tempo, exibindo o progresso de cada
+          ticker e um gráfico parcial à medida que os preços chegam.
         - Gera gráficos comparativos do retorno acumulado da carteira e do IBOVESPA.
+        - Permite ponderar a carteira por pesos iguais, mínima variância ou paridade de risco.
         - Valida as datas selecionadas pelo usuário.
 
     Args:
@@ -65,17 +83,199 @@ def Pagina_grafico(restrict_access=False):
                 st.error("⚠️ A data de fim deve ser posterior à data de início.")
                 return
 
+            # O período gerado fica na sessão para que os controles de métricas não apaguem o gráfico.
+            chave_grafico = (data_ini, data_fim, tuple(acoes_carteira))
             if st.button("Gerar Gráficos"):
+                st.session_state.grafico_gerado = chave_grafico
+
+            if st.session_state.get("grafico_gerado") == chave_grafico:
+                metodo, janela_estimacao = controles_ponderacao()
+                carregamento = CarregamentoProgressivo()
                 try:
-                    df_carteira = pegar_df_preco_corrigido(data_ini, data_fim, acoes_carteira)
-                    df_ibov = pegar_df_preco_diversos(data_ini, data_fim)
+                    df_carteira, df_ibov, acumulado = menu_comparativo(data_ini, data_fim, acoes_carteira, carregamento)
+                    carregamento.finalizar()
+                    matriz = montar_matriz_precos(df_carteira, df_ibov)
+                    pesos = None
+                    if metodo != "Pesos iguais":
+                        pesos, acumulado, sem_historico = menu_ponderacao(matriz, data_ini, metodo, janela_estimacao)
+                        if sem_historico:
+                            st.warning(
+                                f"⚠️ Sem cotações antes de {data_ini.strftime('%d/%m/%Y')} para estimar os pesos de: "
+                                f"{', '.join(sem_historico)}. Essas ações ficam com peso zero em todo o período."
+                            )
                     logger.info("Gráficos gerados com sucesso.")
                     st.subheader("📊 Comparativo: Retorno Acumulado Carteira x IBOVESPA")
-                    Comparacao_graficos(df_carteira, df_ibov)
+                    Comparacao_graficos(df_carteira, df_ibov, acumulado)
                     st.success("✅ Gráficos gerados com sucesso!")
+                    if pesos is not None:
+                        with st.expander("⚖️ Pesos da carteira"):
+                            st.dataframe(
+                                pesos[pesos > 0].sort_values(ascending=False).rename("Peso").to_frame().style.format("{:.2%}"),
+                                use_container_width=True
+                            )
                 except Exception as e:
+                    carregamento.finalizar(erro=True)
                     logger.error(f"Erro ao gerar gráficos: {e}")
                     st.error(f"❌ Erro ao gerar gráficos: {e}")
+                    return
+
+                painel_metricas(df_carteira, df_ibov, pesos)
+
+                st.markdown("### ⬇️ Exportar Dados")
+                botoes_exportacao(matriz, "precos_alinhados")
+                botoes_exportacao(acumulado, "retorno_acumulado")
         except Exception as e:
             logger.error(f"Erro ao processar as datas: {e}")
             st.error(f"❌ Erro ao processar as datas: {e}")
+
+
+class CarregamentoProgressivo:
+    """
+    Acompanha o carregamento dos preços do comparativo, repassado como `ao_receber` a `menu_comparativo`.
+
+    A cada preço recebido, marca o ticker no painel de progresso. O retorno acumulado parcial das
+    ações já recebidas é redesenhado quando chega o IBOVESPA e a cada marco de `MARCOS_GRAFICO_PARCIAL`.
+    É chamado na thread do script, então pode criar e atualizar elementos do Streamlit. Os
+    elementos só são criados no primeiro preço recebido: períodos atendidos pelo estado
+    guardado não exibem nada.
+    """
+
+    def __init__(self):
+        self.status = None
+        self.barra = None
+        self.grafico = None
+        self.partes = []
+        self.df_ibov = pd.DataFrame()
+        self.marcos = list(MARCOS_GRAFICO_PARCIAL)
+
+    def __call__(self, nome, df, concluidos, total):
+        if self.status is None:
+            self.status = st.status("⏳ Carregando preços da carteira e do IBOVESPA...", expanded=True)
+            self.barra = self.status.progress(0.0)
+            self.grafico = st.empty()
+        rotulo = "IBOVESPA" if nome == COLUNA_IBOV else nome
+        self.status.write(f"✅ {rotulo}: {len(df)} pregões" if not df.empty else f"⚠️ {rotulo}: sem dados no período")
+        self.barra.progress(concluidos / total, text=f"{concluidos} de {total} séries recebidas")
+
+        if nome == COLUNA_IBOV:
+            self.df_ibov = df
+        elif not df.empty:
+            self.partes.append(df)
+        atingiu_marco = False
+        while self.marcos and concluidos >= self.marcos[0] * total:
+            self.marcos.pop(0)
+            atingiu_marco = True
+        if (nome == COLUNA_IBOV or atingiu_marco) and concluidos < total:
+            self.desenhar_parcial()
+
+    def desenhar_parcial(self):
+        """Redesenha o retorno acumulado com os preços recebidos até agora."""
+        df_carteira = pd.concat(self.partes, ignore_index=True) if self.partes else pd.DataFrame()
+        matriz = montar_matriz_precos(df_carteira, self.df_ibov)
+        if len(matriz) < 2:
+            return
+        if self.df_ibov.empty:
+            matriz[COLUNA_IBOV] = float("nan")
+        acumulado = (1 + retornos_comparativo(matriz).fillna(0)).cumprod() - 1
+        if self.df_ibov.empty:
+            acumulado = acumulado.drop(columns="Ibovespa")
+        if not self.partes:
+            acumulado = acumulado.drop(columns="Carteira")
+        with self.grafico.container():
+            st.caption(f"Retorno acumulado parcial: {len(self.partes)} ações recebidas")
+            st.line_chart(acumulado)
+
+    def finalizar(self, erro=False):
+        """Remove o gráfico parcial e recolhe o painel de progresso."""
+        if self.status is None:
+            return
+        self.grafico.empty()
+        if erro:
+            self.status.update(label="❌ Falha ao carregar os preços", state="error", expanded=False)
+        else:
+            self.status.update(label="✅ Preços carregados", state="complete", expanded=False)
+
+
+def controles_ponderacao():
+    """
+    Exibe os controles de ponderação da carteira usada no gráfico e nas métricas.
+
+    Returns:
+        Tuple[str, int]: Método de ponderação escolhido e janela de estimação da covariância, em pregões.
+    """
+    st.markdown("### ⚖️ Ponderação da Carteira")
+    coluna_metodo, coluna_janela = st.columns(2)
+    metodo = coluna_metodo.selectbox(
+        "Método de ponderação:",
+        options=METODOS,
+        key="metodo_ponderacao",
+        help="Mínima variância e paridade de risco usam a covariância dos retornos (com encolhimento) "
+             "estimada nos pregões anteriores à data de início, fora do período exibido."
+    )
+    janela = coluna_janela.select_slider(
+        "Janela de estimação (pregões):",
+        options=[63, 126, JANELA_ESTIMACAO],
+        value=JANELA_ESTIMACAO,
+        key="janela_ponderacao",
+        disabled=metodo == "Pesos iguais"
+    )
+    logger.info(f"Ponderação selecionada: {metodo} | Janela: {janela}")
+    return metodo, janela
+
+
+def painel_metricas(df_carteira, df_ibov, pesos=None):
+    """
+    Exibe o painel de métricas de risco e desempenho da carteira em relação ao IBOVESPA.
+
+    As métricas são calculadas com cache por carteira e janela, de modo que alternar as
+    métricas exibidas não refaz cálculos nem consultas à API.
+
+    Args:
+        df_carteira (pd.DataFrame): Preços corrigidos da carteira.
+        df_ibov (pd.DataFrame): Preços do IBOVESPA.
+        pesos (pd.Series, opcional): Peso de cada ação da carteira. Padrão: pesos iguais.
+
+    Returns:
+        None
+    """
+    st.markdown("### 📐 Métricas de Risco e Desempenho")
+    selecionadas = st.multiselect(
+        "Escolha as métricas exibidas:",
+        options=METRICAS,
+        default=METRICAS,
+        key="metricas_exibidas"
+    )
+    janela = st.select_slider(
+        "Janela móvel (pregões):",
+        options=[21, 63, 126, 252],
+        value=63,
+        key="janela_metricas"
+    )
+    logger.info(f"Métricas selecionadas: {selecionadas} | Janela: {janela}")
+
+    if not selecionadas:
+        st.info("ℹ️ Selecione ao menos uma métrica para exibir.")
+        return
+
+    try:
+        metricas, moveis = menu_metricas(df_carteira, df_ibov, janela, pesos)
+    except ValueError as e:
+        st.warning(f"⚠️ {e}")
+        return
+    except Exception as e:
+        logger.error(f"Erro ao exibir métricas: {e}")
+        st.error(f"❌ Erro ao calcular as métricas: {e}")
+        return
+
+    st.dataframe(metricas.loc[selecionadas].round(4), use_container_width=True)
+
+    if moveis is None:
+        st.info(f"ℹ️ O período tem menos de {janela} pregões: escolha uma janela móvel menor para ver as métricas móveis.")
+        return
+
+    metrica_movel = st.selectbox(
+        "Métrica móvel para visualizar:",
+        options=selecionadas,
+        key="metrica_movel"
+    )
+    st.line_chart(moveis[metrica_movel])
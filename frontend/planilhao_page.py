@@ -1,18 +1,30 @@
 import streamlit as st
-from backend.routers import menu_planilhao
+import pandas as pd
+from backend.routers import menu_planilhao, menu_historico_planilhao
+from backend.ranking import INDICADORES
 from backend.views import validar_data
 from log_config.logging_config import logger  # Importa o logger centralizado
+from log_config.tempo import cronometrar
+from frontend.componentes import botoes_exportacao, perfilado
 
+@st.fragment
+@perfilado("Página Planilhão")
+@cronometrar("Página Planilhão")
 def Pagina_planilhao():
     """
     Exibe a página do Planilhão na aplicação Streamlit, permitindo ao usuário explorar dados de mercado
     com base em uma data específica.
 
+    A página é executada como um fragmento: interações com os seus widgets reexecutam
+    apenas esta função, sem recarregar a navegação e o restante do app.
+
     Funcionalidades:
         - Entrada de data base para análise.
         - Validação da data selecionada pelo usuário.
         - Busca de dados de mercado com base na data fornecida.
-        - Exibição dos resultados em formato de tabela, caso existam dados.
+        - Exibição dos resultados em formato de tabela, caso existam dados, mantidos enquanto a
+          data buscada não muda (a exportação em outro formato não exige nova busca).
+        - Consulta histórica de um indicador em todas as datas base já buscadas.
         - Tratamento de erros e mensagens para guiar o usuário.
 
     Args:
@@ -40,17 +52,21 @@ def Pagina_planilhao():
         # Validação da data
         validar_data(data_base)
 
-        # Ação ao clicar no botão "Buscar"
+        # A data buscada fica na sessão para que os controles de exportação não apaguem os resultados.
         if st.button("Buscar"):
             logger.info(f"Usuário clicou em 'Buscar' para a data: {data_base}")
+            st.session_state.planilhao_buscado = data_base
+
+        if st.session_state.get("planilhao_buscado") == data_base:
             try:
-                # Consulta os dados
+                # Consulta os dados (em cache após a primeira busca da data)
                 df = menu_planilhao(data_base)
                 if not df.empty:
                     # Exibe o DataFrame no Streamlit
                     st.markdown("### 📊 Resultados da Análise")
                     st.dataframe(df, height=600, use_container_width=True)
                     st.success(f"✅ Dados encontrados! Total de {len(df)} registros exibidos.")
+                    botoes_exportacao(df, f"planilhao_{data_base}", chave=f"snapshot-{data_base}")
                     logger.info(f"Dados encontrados: {len(df)} linhas exibidas.")
                 else:
                     # Caso nenhum dado seja encontrado
@@ -59,6 +75,40 @@ def Pagina_planilhao():
             except Exception as e:
                 logger.error(f"Erro ao buscar dados do Planilhão para a data: {data_base} | {e}")
                 st.error("❌ Ocorreu um erro ao buscar os dados. Por favor, tente novamente.")
+
+        secao_historico()
     except Exception as e:
         logger.error(f"Erro na página Planilhão: {e}")
         st.error("❌ Ocorreu um erro inesperado. Verifique os logs ou entre em contato com o suporte.")
+
+
+def secao_historico():
+    """
+    Exibe a consulta histórica do planilhão: ranking de um indicador e a sua mediana por setor
+    em todas as datas base já buscadas, consultados no banco analítico local.
+
+    Returns:
+        None
+    """
+    with st.expander("🗃️ Histórico do Planilhão"):
+        st.caption("Consulta todas as datas base já buscadas de uma só vez, no banco analítico local.")
+        indicador = st.selectbox("Indicador:", INDICADORES, key="hist_indicador")
+        periodo = st.date_input(
+            "Período das datas base:",
+            value=(pd.to_datetime('today') - pd.DateOffset(years=1), pd.to_datetime('today')),
+            key="hist_periodo"
+        )
+        top = st.number_input("Ações por data base:", min_value=1, max_value=100, value=10, key="hist_top")
+        if st.button("Consultar Histórico") and len(periodo) == 2:
+            logger.info(f"Usuário clicou em 'Consultar Histórico' | {indicador} | {periodo} | Top: {top}")
+            try:
+                ranking, medianas = menu_historico_planilhao(indicador, periodo[0], periodo[1], top)
+                st.markdown(f"#### Mediana de **{indicador}** por setor")
+                st.line_chart(medianas)
+                st.markdown(f"#### Top {top} por **{indicador}** em cada data base")
+                st.dataframe(ranking, use_container_width=True)
+            except ValueError as e:
+                st.warning(f"⚠️ {e}")
+            except Exception as e:
+                logger.error(f"Erro na consulta histórica: {e}")
+                st.error("❌ Ocorreu um erro ao consultar o histórico. Por favor, tente novamente.")
@@ -0,0 +1,174 @@
+import cProfile
+import datetime
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import pandas as pd
+import streamlit as st
+from log_config.logging_config import LOG_DIR, logger  # Importa o logger centralizado
+
+# Diretório dos perfis salvos e quantidade máxima mantida (os mais antigos são apagados).
+PERFIS_DIR = os.getenv("PERFIS_DIR", os.path.join(LOG_DIR, "perfis"))
+MAX_PERFIS = int(os.getenv("PERFIS_MAX", "50"))
+
+# O parâmetro `?perfil=1` da URL só liga o perfilamento se o ambiente permitir (`PERFIL_URL=1`):
+# cada execução perfilada fica mais lenta e grava arquivos no servidor, então um visitante
+# qualquer não deve poder ligá-lo.
+PERFIL_URL = os.getenv("PERFIL_URL", "0") == "1"
+
+# Quantidade de funções listadas entre os pontos críticos de cada perfil.
+TOP_PONTOS_CRITICOS = 15
+
+# Tipos de valores da sessão registrados como entradas do perfil.
+_TIPOS_ENTRADA = (str, int, float, bool, datetime.date, type(None))
+
+# Perfilamento em andamento na thread do script, para que perfis aninhados não se sobreponham.
+_local = threading.local()
+
+
+@dataclass
+class ResultadoPerfil:
+    """
+    Perfil de uma execução de página.
+
+    Attributes:
+        nome (str): Identificação do trecho perfilado (por exemplo, a página).
+        entradas (dict): Valores simples da sessão no momento da execução (widgets e estado).
+        duracao_ms (float): Duração total da execução, em milissegundos.
+        arquivo (str): Caminho do perfil salvo (formato do `pstats`), ou None se não foi salvo.
+        pontos_criticos (pd.DataFrame): Funções com maior tempo acumulado.
+    """
+    nome: str
+    entradas: dict
+    duracao_ms: float
+    arquivo: str = None
+    pontos_criticos: pd.DataFrame = field(default_factory=pd.DataFrame)
+
+
+class _Perfilamento:
+    """Recebe o resultado do perfilamento ao final do bloco `with perfilar(...)`."""
+
+    resultado = None
+
+
+def perfilamento_ativado() -> bool:
+    """
+    Indica se o perfilamento está ligado, pela variável de ambiente `PERFIL=1` ou, com `PERFIL_URL`, pelo parâmetro `?perfil=1` da URL.
+
+    Returns:
+        bool: True se as execuções devem ser perfiladas.
+    """
+    if os.getenv("PERFIL", "0") == "1":
+        return True
+    if not PERFIL_URL:
+        return False
+    try:
+        return st.query_params.get("perfil") == "1"
+    except Exception:
+        return False
+
+
+def entradas_da_sessao() -> dict:
+    """
+    Reúne os valores simples do estado da sessão (widgets, datas e flags), ignorando DataFrames e objetos grandes.
+
+    Returns:
+        dict: Valores serializáveis em JSON, com datas em texto.
+    """
+    entradas = {}
+    for chave, valor in st.session_state.to_dict().items():
+        if isinstance(valor, (list, tuple)) and all(isinstance(v, _TIPOS_ENTRADA) for v in valor) and len(valor) <= 50:
+            entradas[str(chave)] = [str(v) if isinstance(v, datetime.date) else v for v in valor]
+        elif isinstance(valor, _TIPOS_ENTRADA):
+            entradas[str(chave)] = str(valor) if isinstance(valor, datetime.date) else valor
+    return entradas
+
+
+def pontos_criticos(perfil: cProfile.Profile, quantidade: int = TOP_PONTOS_CRITICOS) -> pd.DataFrame:
+    """
+    Lista as funções com maior tempo acumulado em um perfil.
+
+    Args:
+        perfil (cProfile.Profile): Perfil coletado.
+        quantidade (int, opcional): Número de funções listadas. Padrão: `TOP_PONTOS_CRITICOS`.
+
+    Returns:
+        pd.DataFrame: Colunas 'funcao', 'chamadas', 'tempo_proprio_ms' e 'tempo_acumulado_ms'.
+    """
+    linhas = [
+        {
+            "funcao": f"{os.path.basename(arquivo)}:{linha}({nome})",
+            "chamadas": chamadas,
+            "tempo_proprio_ms": proprio * 1000,
+            "tempo_acumulado_ms": acumulado * 1000,
+        }
+        for (arquivo, linha, nome), (_, chamadas, proprio, acumulado, _) in pstats.Stats(perfil).stats.items()
+    ]
+    df = pd.DataFrame(linhas, columns=["funcao", "chamadas", "tempo_proprio_ms", "tempo_acumulado_ms"])
+    return df.nlargest(quantidade, "tempo_acumulado_ms").reset_index(drop=True)
+
+
+def _salvar(perfil: cProfile.Profile, resultado: ResultadoPerfil) -> str:
+    """Grava o perfil e os seus metadados e apaga os perfis mais antigos além de `MAX_PERFIS`."""
+    os.makedirs(PERFIS_DIR, exist_ok=True)
+    carimbo = datetime.datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    nome = re.sub(r"\W+", "_", resultado.nome).strip("_")
+    base = os.path.join(PERFIS_DIR, f"{carimbo}_{nome}")
+    perfil.dump_stats(base + ".prof")
+    with open(base + ".json", "w") as f:
+        json.dump({
+            "nome": resultado.nome,
+            "entradas": resultado.entradas,
+            "duracao_ms": resultado.duracao_ms,
+            "pontos_criticos": resultado.pontos_criticos.to_dict(orient="records"),
+        }, f, indent=2, ensure_ascii=False, default=str)
+
+    perfis = sorted(arquivo for arquivo in os.listdir(PERFIS_DIR) if arquivo.endswith(".prof"))
+    for antigo in perfis[:max(len(perfis) - MAX_PERFIS, 0)]:
+        for extensao in (".prof", ".json"):
+            try:
+                os.remove(os.path.join(PERFIS_DIR, antigo[:-len(".prof")] + extensao))
+            except FileNotFoundError:
+                pass  # Já apagado pela limpeza de outra sessão.
+    return base + ".prof"
+
+
+@contextmanager
+def perfilar(nome):
+    """
+    Perfila o bloco com o `cProfile` quando o perfilamento está ativado, salvando o perfil em `PERFIS_DIR`.
+
+    O perfil é marcado com o nome do trecho e com as entradas da sessão. Blocos aninhados
+    dentro de um perfilamento em andamento não abrem outro perfil. O resultado fica em
+    `.resultado` do objeto retornado, ou None se nada foi perfilado.
+
+    Args:
+        nome (str): Identificação do trecho perfilado (por exemplo, a página).
+    """
+    perfilamento = _Perfilamento()
+    if not perfilamento_ativado() or getattr(_local, "ativo", False):
+        yield perfilamento
+        return
+
+    _local.ativo = True
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    perfil.enable()
+    try:
+        yield perfilamento
+    finally:
+        perfil.disable()
+        _local.ativo = False
+        resultado = ResultadoPerfil(nome, entradas_da_sessao(), (time.perf_counter() - inicio) * 1000)
+        try:
+            resultado.pontos_criticos = pontos_criticos(perfil)
+            resultado.arquivo = _salvar(perfil, resultado)
+            logger.info(f"Perfil salvo | {nome}: {resultado.duracao_ms:.1f} ms em {resultado.arquivo}")
+        except Exception as e:
+            logger.error(f"Erro ao salvar o perfil de {nome}: {e}")
+        perfilamento.resultado = resultado
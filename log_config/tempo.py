@@ -0,0 +1,49 @@
+import os
+import time
+from contextlib import contextmanager
+from functools import wraps
+from log_config.logging_config import logger  # Importa o logger centralizado
+
+# Os tempos de execução só são medidos com o perfilamento ligado pelo ambiente (`PERFIL=1`).
+# Fora dele, registrar duas linhas no log a cada reexecução custa mais do que a reexecução
+# de um fragmento economiza.
+TEMPOS_ATIVADOS = os.getenv("PERFIL", "0") == "1"
+
+
+@contextmanager
+def medir_tempo(nome):
+    """
+    Registra no log o tempo gasto no bloco, em milissegundos, quando `TEMPOS_ATIVADOS`.
+
+    Args:
+        nome (str): Identificação do trecho medido.
+    """
+    if not TEMPOS_ATIVADOS:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        logger.info(f"Tempo de execução | {nome}: {(time.perf_counter() - inicio) * 1000:.1f} ms")
+
+
+def cronometrar(nome):
+    """
+    Decorador que registra no log o tempo de cada chamada da função, quando `TEMPOS_ATIVADOS`.
+
+    Com os tempos desligados a função é devolvida sem nenhum envoltório.
+
+    Args:
+        nome (str): Identificação da função medida.
+    """
+    def decorador(funcao):
+        if not TEMPOS_ATIVADOS:
+            return funcao
+
+        @wraps(funcao)
+        def envolvida(*args, **kwargs):
+            with medir_tempo(nome):
+                return funcao(*args, **kwargs)
+        return envolvida
+    return decorador
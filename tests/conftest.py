@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# Raiz do projeto no sys.path, como em `setup_paths.py`.
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# `backend.apis` exige um token ao ser importado; os testes nunca consultam a API real.
+os.environ.setdefault("TOKEN", "teste")
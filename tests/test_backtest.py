@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+import backend.snapshots
+from backend.backtest import carregar_snapshot_do_mes, datas_mensais, indices_rebalanceamento
+
+
+def _meses(datas):
+    datas = pd.to_datetime(datas)
+    return (datas.year * 12 + datas.month).to_numpy()
+
+
+def test_rebalanceamento_segue_o_calendario_mesmo_sem_alguns_snapshots():
+    # Janeiro a dezembro de 2024, sem os snapshots de fevereiro e maio.
+    datas = [d for d in datas_mensais("2024-01-01", "2024-12-31") if d[5:7] not in ("02", "05")]
+
+    trimestral = indices_rebalanceamento(_meses(datas), "trimestral")
+    semestral = indices_rebalanceamento(_meses(datas), "semestral")
+
+    assert [datas[i][5:7] for i in trimestral] == ["01", "04", "07", "10"]
+    assert [datas[i][5:7] for i in semestral] == ["01", "07"]
+
+
+def test_data_base_em_feriado_avanca_para_o_proximo_dia_util(monkeypatch):
+    consultadas = []
+
+    def carregar(data_base):
+        consultadas.append(data_base)
+        if data_base in ("2024-01-01", "2024-01-02"):
+            raise ValueError("Planilhão vazio.")
+        return data_base
+
+    monkeypatch.setattr(backend.snapshots, "carregar_snapshot", carregar)
+
+    assert carregar_snapshot_do_mes("2024-01-01") == "2024-01-03"
+    assert consultadas == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+def test_data_base_nao_avanca_para_o_mes_seguinte(monkeypatch):
+    def carregar(data_base):
+        raise ValueError("Planilhão vazio.")
+
+    monkeypatch.setattr(backend.snapshots, "carregar_snapshot", carregar)
+
+    with pytest.raises(ValueError):
+        carregar_snapshot_do_mes("2024-01-29")
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+from backend import banco_analitico
+from backend.ranking import INDICADORES
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    """Banco analítico vazio em um arquivo temporário."""
+    monkeypatch.setattr(banco_analitico, "BANCO_ANALITICO", str(tmp_path / "analitico.duckdb"))
+    monkeypatch.setattr(banco_analitico, "_conexao", None)
+    yield banco_analitico
+    banco_analitico.aguardar_gravacoes()
+    if banco_analitico._conexao is not None:
+        banco_analitico._conexao.close()
+
+
+def _planilhao(data_base, tickers, valor):
+    df = pd.DataFrame({"data_base": data_base, "ticker": tickers, "empresa": tickers, "setor": "Energia"})
+    for indicador in INDICADORES:
+        df[indicador] = valor
+    df["volume"] = 1.0
+    return df
+
+
+def test_regravar_data_base_substitui_planilhao(banco):
+    banco.guardar_planilhao(_planilhao("2024-01-31", ["AAAA3", "BBBB3"], 0.1))
+    banco.guardar_planilhao(_planilhao("2024-01-31", ["AAAA3", "CCCC3"], 99.0))
+    banco.aguardar_gravacoes()
+
+    df = banco.consultar("SELECT ticker, roe FROM planilhao ORDER BY ticker")
+    assert df["ticker"].tolist() == ["AAAA3", "CCCC3"]
+    assert (df["roe"] == 99.0).all()
+
+
+def test_regravar_uma_data_base_preserva_as_demais(banco):
+    banco.guardar_planilhao(_planilhao("2024-01-31", ["AAAA3"], 0.1))
+    banco.guardar_planilhao(_planilhao("2024-02-29", ["AAAA3"], 0.2))
+    banco.guardar_planilhao(_planilhao("2024-02-29", ["AAAA3"], 0.3))
+    banco.aguardar_gravacoes()
+
+    assert banco.datas_disponiveis() == ["2024-01-31", "2024-02-29"]
+    df = banco.consultar("SELECT roe FROM planilhao ORDER BY data_base")
+    assert df["roe"].tolist() == [0.1, 0.3]
+
+
+def test_precos_enfileirados_prevalece_o_ultimo(banco):
+    banco.guardar_precos(pd.DataFrame({"data": ["2024-01-02", "2024-01-03"], "fechamento": [10, 11]}), ticker="ibov")
+    banco.guardar_precos(pd.DataFrame({"ticker": "AAAA3", "data": ["2024-01-02"], "fechamento": [5.0]}))
+    banco.guardar_precos(pd.DataFrame({"data": ["2024-01-03"], "fechamento": [12.0]}), ticker="ibov")
+    banco.aguardar_gravacoes()
+
+    df = banco.consultar("SELECT ticker, fechamento FROM precos ORDER BY ticker, data")
+    assert df["ticker"].tolist() == ["AAAA3", "ibov", "ibov"]
+    assert df["fechamento"].tolist() == [5.0, 10.0, 12.0]
+
+
+def test_consulta_em_copia_com_banco_aberto(banco):
+    banco.guardar_planilhao(_planilhao("2024-01-31", ["AAAA3", "BBBB3"], 0.1))
+    banco.aguardar_gravacoes()
+
+    # A conexão do processo continua aberta para escrita, como no app em execução.
+    df = banco.consultar_copia("SELECT COUNT(*) AS linhas FROM planilhao")
+    assert df["linhas"].tolist() == [2]
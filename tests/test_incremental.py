@@ -0,0 +1,68 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+import backend.views
+from backend import incremental
+from backend.metricas import montar_matriz_precos, retorno_acumulado, retornos_comparativo
+
+PREGOES = pd.bdate_range("2024-01-01", "2024-06-28")
+
+
+def _precos(acoes, semente=0):
+    """Preços sintéticos da carteira e do Ibovespa em todos os dias úteis do semestre."""
+    rng = np.random.default_rng(semente)
+    colunas = list(acoes) + ["ibov"]
+    matriz = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (len(PREGOES), len(colunas))), axis=0),
+                          index=PREGOES, columns=colunas)
+    carteira = matriz[list(acoes)].rename_axis("data").reset_index().melt("data", var_name="ticker", value_name="fechamento")
+    ibov = matriz["ibov"].rename("fechamento").rename_axis("data").reset_index()
+    return carteira, ibov
+
+
+@pytest.fixture
+def api(monkeypatch):
+    """Substitui a consulta de preços por dados sintéticos e registra os períodos consultados."""
+    acoes = ("AAAA3", "BBBB4")
+    carteira, ibov = _precos(acoes)
+    consultas = []
+    faltando = set()
+
+    def consultar(data_ini, data_fim, tickers, ao_receber=None):
+        consultas.append((data_ini, data_fim))
+        dentro = lambda df: df[(df["data"] >= pd.Timestamp(data_ini)) & (df["data"] <= pd.Timestamp(data_fim))]
+        return dentro(carteira[~carteira["ticker"].isin(faltando)]), dentro(ibov)
+
+    monkeypatch.setattr(backend.views, "pegar_precos_comparativo", consultar)
+    monkeypatch.setattr(incremental, "_estados", incremental.OrderedDict())
+    return acoes, consultar, consultas, faltando
+
+
+def _do_zero(consultar, data_ini, data_fim, acoes):
+    carteira, ibov = consultar(data_ini, data_fim, list(acoes))
+    return retorno_acumulado(retornos_comparativo(montar_matriz_precos(carteira, ibov)))
+
+
+@pytest.mark.parametrize("data_ini", [date(2024, 2, 5), date(2024, 2, 3)])  # segunda-feira e sábado
+def test_rebase_igual_ao_calculo_do_zero(api, data_ini):
+    acoes, consultar, _, _ = api
+    incremental.obter_comparativo(date(2024, 1, 1), date(2024, 4, 30), acoes)
+    incremental.obter_comparativo(date(2024, 1, 1), date(2024, 6, 28), acoes)
+
+    _, _, acumulado = incremental.obter_comparativo(data_ini, date(2024, 6, 28), acoes)
+
+    esperado = _do_zero(consultar, data_ini, date(2024, 6, 28), acoes)
+    pd.testing.assert_frame_equal(acumulado, esperado, check_freq=False, check_names=False)
+
+
+def test_estado_sem_algum_ticker_consulta_o_periodo_inteiro(api):
+    acoes, consultar, consultas, faltando = api
+    faltando.add("BBBB4")
+    incremental.obter_comparativo(date(2024, 1, 1), date(2024, 3, 29), acoes)
+    faltando.clear()
+
+    df_carteira, _, acumulado = incremental.obter_comparativo(date(2024, 1, 1), date(2024, 3, 29), acoes)
+
+    assert consultas == [(date(2024, 1, 1), date(2024, 3, 29))] * 2
+    assert set(df_carteira["ticker"]) == set(acoes)
+    pd.testing.assert_frame_equal(acumulado, _do_zero(consultar, date(2024, 1, 1), date(2024, 3, 29), acoes), check_freq=False, check_names=False)
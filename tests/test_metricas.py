@@ -0,0 +1,29 @@
+import numpy as np
+import pandas as pd
+from backend.metricas import METRICAS
+from backend.views import metricas_comparativo
+
+
+def _precos(pregoes):
+    datas = pd.bdate_range("2024-01-02", periods=pregoes)
+    rng = np.random.default_rng(0)
+    carteira = pd.concat([
+        pd.DataFrame({"data": datas, "ticker": ticker, "fechamento": 100 * np.cumprod(1 + rng.normal(0, 0.01, pregoes))})
+        for ticker in ("AAAA3", "BBBB4")
+    ], ignore_index=True)
+    ibov = pd.DataFrame({"data": datas, "fechamento": 100 * np.cumprod(1 + rng.normal(0, 0.01, pregoes))})
+    return carteira, ibov
+
+
+def test_periodo_menor_que_a_janela_mantem_as_metricas_do_periodo():
+    metricas, moveis = metricas_comparativo(*_precos(40), 63)
+
+    assert moveis is None
+    assert list(metricas.index) == METRICAS
+    assert metricas.notna().all().all()
+
+
+def test_periodo_maior_que_a_janela_calcula_as_metricas_moveis():
+    metricas, moveis = metricas_comparativo(*_precos(100), 63)
+
+    assert len(moveis) == 99 - 63 + 1
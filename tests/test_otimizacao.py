@@ -0,0 +1,76 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+import backend.routers
+import backend.views
+from backend.metricas import COLUNA_IBOV, montar_matriz_precos
+from backend.otimizacao import calcular_pesos, pesos_fora_da_amostra
+
+
+def _precos_longos(inicio, fim, volatilidades, semente=0):
+    """Preços sintéticos no formato longo, com a volatilidade diária de cada ticker."""
+    rng = np.random.default_rng(semente)
+    datas = pd.bdate_range(inicio, fim)
+    partes = []
+    for ticker, vol in volatilidades.items():
+        precos = 100 * np.cumprod(1 + rng.normal(0, vol, len(datas)))
+        partes.append(pd.DataFrame({"data": datas, "ticker": ticker, "fechamento": precos}))
+    ibov = pd.DataFrame({"data": datas, "fechamento": 100 * np.cumprod(1 + rng.normal(0, 0.01, len(datas)))})
+    return pd.concat(partes, ignore_index=True), ibov
+
+
+def test_cache_da_covariancia_depende_dos_precos():
+    datas = pd.bdate_range("2024-01-01", periods=60)
+    rng = np.random.default_rng(1)
+    matriz = pd.DataFrame(100 * np.cumprod(1 + rng.normal(0, 0.01, (60, 3)), axis=0),
+                          index=datas, columns=["AAAA3", "BBBB4", COLUNA_IBOV])
+    outra = matriz.copy()
+    # Mesmas ações e datas; apenas os preços mudam (como ao preencher lacunas com outro histórico).
+    outra["AAAA3"] = 100 * np.cumprod(1 + rng.normal(0, 0.05, 60))
+
+    pesos = calcular_pesos(matriz, "Mínima variância", 59)
+    outros = calcular_pesos(outra, "Mínima variância", 59)
+
+    assert not np.allclose(pesos, outros)
+    assert outros["AAAA3"] < pesos["AAAA3"]
+
+
+@pytest.fixture
+def historico(monkeypatch):
+    """Consulta de preços sintética: antes da data inicial AAAA3 é a menos volátil e CCCC3 não existe."""
+    consultas = []
+
+    def consultar(inicio, fim, acoes, ao_receber=None):
+        consultas.append((inicio, fim))
+        return _precos_longos(inicio, fim, {"AAAA3": 0.005, "BBBB4": 0.03})
+
+    monkeypatch.setattr(backend.views, "pegar_precos_comparativo", consultar)
+    pesos_fora_da_amostra.clear()
+    yield consultas
+    pesos_fora_da_amostra.clear()
+
+
+def test_pesos_estimados_antes_da_data_inicial(historico):
+    data_ini = date(2024, 1, 2)
+    # No período exibido a volatilidade se inverte.
+    matriz = montar_matriz_precos(*_precos_longos(data_ini, date(2024, 6, 28), {"AAAA3": 0.03, "BBBB4": 0.005}, semente=2))
+
+    pesos, acumulado, sem_historico = backend.routers.menu_ponderacao(matriz, data_ini, "Mínima variância", 126)
+
+    assert len(historico) == 1 and historico[0][1] < data_ini
+    assert pesos["AAAA3"] > pesos["BBBB4"]
+    assert acumulado.index[0] > pd.Timestamp(data_ini)
+    assert sem_historico == ()
+
+
+def test_pesos_em_cache_e_acoes_sem_historico(historico):
+    data_ini = date(2024, 1, 2)
+    matriz = montar_matriz_precos(*_precos_longos(data_ini, date(2024, 6, 28), {"AAAA3": 0.01, "BBBB4": 0.01, "CCCC3": 0.01}))
+
+    for _ in range(3):
+        pesos, _, sem_historico = backend.routers.menu_ponderacao(matriz, data_ini, "Paridade de risco", 126)
+
+    assert len(historico) == 1
+    assert sem_historico == ("CCCC3",)
+    assert pesos["CCCC3"] == 0 and pesos.sum() == pytest.approx(1)
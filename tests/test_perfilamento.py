@@ -0,0 +1,44 @@
+import cProfile
+import os
+from types import SimpleNamespace
+import pytest
+from log_config import perfilamento
+
+
+@pytest.fixture
+def url_com_perfil(monkeypatch):
+    """Sessão aberta com `?perfil=1` na URL e sem `PERFIL` no ambiente."""
+    monkeypatch.delenv("PERFIL", raising=False)
+    monkeypatch.setattr(perfilamento, "st", SimpleNamespace(query_params={"perfil": "1"}))
+
+
+def test_parametro_da_url_ignorado_sem_perfil_url(url_com_perfil, monkeypatch):
+    monkeypatch.setattr(perfilamento, "PERFIL_URL", False)
+    assert not perfilamento.perfilamento_ativado()
+
+
+def test_parametro_da_url_liga_com_perfil_url(url_com_perfil, monkeypatch):
+    monkeypatch.setattr(perfilamento, "PERFIL_URL", True)
+    assert perfilamento.perfilamento_ativado()
+
+
+def test_limpeza_tolera_perfis_apagados_por_outra_sessao(tmp_path, monkeypatch):
+    monkeypatch.setattr(perfilamento, "PERFIS_DIR", str(tmp_path))
+    monkeypatch.setattr(perfilamento, "MAX_PERFIS", 1)
+    for extensao in (".prof", ".json"):
+        (tmp_path / f"00000000-000000-000000_antigo{extensao}").write_bytes(b"")
+
+    remover = os.remove
+
+    def remover_depois_de_outra_sessao(caminho):
+        remover(caminho)  # a outra sessão apaga o arquivo primeiro
+        raise FileNotFoundError(caminho)
+
+    monkeypatch.setattr(perfilamento.os, "remove", remover_depois_de_outra_sessao)
+    perfil = cProfile.Profile()
+    perfil.enable()
+    perfil.disable()
+    arquivo = perfilamento._salvar(perfil, perfilamento.ResultadoPerfil("Página Teste", {}, 1.0))
+
+    base = os.path.basename(arquivo)[:-len(".prof")]
+    assert sorted(os.listdir(tmp_path)) == [base + ".json", base + ".prof"]
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+from backend.ranking import INDICADORES, construir_indice_ranks, ranking_multifatorial, ranking_setorial, selecionar_por_ranks
+
+
+def _universo(n, setores=12, semente=0):
+    """Planilhão sintético com setores aleatórios e alguns valores ausentes."""
+    rng = np.random.default_rng(semente)
+    df = pd.DataFrame({
+        "ticker": [f"T{i}" for i in range(n)],
+        "setor": rng.choice([f"S{k}" for k in range(setores)], n),
+        "data_base": "2024-01-31",
+    })
+    for indicador in INDICADORES:
+        df[indicador] = rng.normal(size=n)
+    df.loc[rng.random(n) < 0.05, "roe"] = np.nan
+    df["volume"] = 1.0
+    return df
+
+
+def test_limite_por_setor_igual_a_laco_por_setor():
+    df = _universo(3000)
+    ranks = construir_indice_ranks(df)
+    resultado = ranking_setorial(df, ranks, "roe", "p_vp", 20, "Limite por setor", 2)
+
+    linhas, _, _ = selecionar_por_ranks(ranks, "roe", "p_vp", len(df))
+    contagem, esperado = {}, []
+    for linha in linhas:
+        setor = df["setor"].iloc[linha]
+        if contagem.get(setor, 0) < 2:
+            esperado.append(df["ticker"].iloc[linha])
+            contagem[setor] = contagem.get(setor, 0) + 1
+    assert resultado["ticker"].tolist() == esperado[:20]
+
+
+def test_zscore_neutro_igual_a_laco_por_setor():
+    df = _universo(3000)
+    resultado = ranking_setorial(df, construir_indice_ranks(df), "roe", "p_vp", 20, "Z-score neutro por setor")
+
+    nota = pd.Series(0.0, index=df.index)
+    for _, grupo in df.groupby("setor"):
+        for indicador, sinal in (("roe", 1), ("p_vp", -1)):
+            valores = grupo[indicador] * sinal
+            nota[grupo.index] += ((valores - valores.mean()) / valores.std(ddof=0)).clip(-3, 3).fillna(-3)
+    esperado = nota.sort_values(ascending=False, kind="stable").index[:20]
+    assert resultado["ticker"].tolist() == df["ticker"][esperado].tolist()
+
+
+def test_ranking_dentro_do_setor_igual_a_laco_por_setor():
+    df = _universo(3000)
+    resultado = ranking_setorial(df, construir_indice_ranks(df), "roe", "p_vp", 20, "Ranking dentro do setor")
+
+    nota = pd.Series(0.0, index=df.index)
+    for _, grupo in df.groupby("setor"):
+        for indicador, sinal in (("roe", 1), ("p_vp", -1)):
+            valores = grupo[indicador] * sinal
+            nota[grupo.index] += ((valores.rank() - 0.5) / valores.count()).fillna(0.0) / 2
+    esperado = nota.sort_values(ascending=False, kind="stable").index[:20]
+    assert resultado["ticker"].tolist() == df["ticker"][esperado].tolist()
+
+
+@pytest.mark.parametrize("modo", ["Ranking dentro do setor", "Z-score neutro por setor"])
+def test_acao_sozinha_no_setor_nao_recebe_a_melhor_nota(modo):
+    df = _universo(400, setores=4)
+    # Uma das piores ações do universo, sozinha em um setor.
+    df.loc[1, "setor"] = "Único"
+    df.loc[1, ["roe", "p_vp"]] = [df["roe"].min() + 1e-6, df["p_vp"].max() - 1e-6]
+
+    resultado = ranking_setorial(df, construir_indice_ranks(df), "roe", "p_vp", 10, modo)
+    assert "T1" not in resultado["ticker"].tolist()
+
+
+def test_setor_ausente_forma_grupo_proprio_e_valor_ausente_fica_por_ultimo():
+    df = pd.DataFrame({
+        "ticker": ["A", "B", "C", "D", "E"],
+        "setor": ["X", "X", "X", "Y", None],
+        "data_base": "2024-01-31",
+    })
+    for indicador in INDICADORES:
+        df[indicador] = [0.3, 0.2, 0.1, 0.0, 0.05]
+    df.loc[2, "roe"] = np.nan
+    ranks = construir_indice_ranks(df)
+
+    resultado = ranking_setorial(df, ranks, "roe", "earning_yield", 5, "Ranking dentro do setor")
+    assert resultado["ticker"].tolist() == ["A", "D", "E", "B", "C"]
+    assert resultado.set_index("ticker").loc["C", "pct_setor_roe"] == 0.0
+
+    limitado = ranking_setorial(df, ranks, "roe", "earning_yield", 5, "Limite por setor", 1)
+    assert sorted(limitado["ticker"]) == ["A", "D", "E"]
+
+
+def test_empates_no_corte_seguem_a_ordem_do_planilhao():
+    df = _universo(500)
+    for indicador in INDICADORES:
+        df[indicador] = np.round(df[indicador], 1)
+    df.loc[df.sample(frac=0.2, random_state=1).index, "roe"] = df["roe"].max()
+    fatores = [("roe", "maior", 1.0)]
+
+    resultado = ranking_multifatorial(df, fatores, 30)
+
+    esperado = df.sort_values("roe", ascending=False, kind="stable")["ticker"][:30]
+    assert resultado["ticker"].tolist() == esperado.tolist()
+
+
+def test_filtros_nao_alteram_os_percentis_do_universo():
+    df = _universo(500)
+    df["volume"] = np.arange(len(df), dtype=float)
+    fatores = [("roe", "maior", 2.0), ("p_vp", "menor", 1.0)]
+
+    completo = ranking_multifatorial(df, fatores, len(df))
+    filtrado = ranking_multifatorial(df, fatores, 20, setores=["S0", "S1"], volume_minimo=df["volume"].median())
+
+    elegiveis = completo[completo["setor"].isin(["S0", "S1"]) & (completo["volume"] >= df["volume"].median())]
+    pd.testing.assert_frame_equal(filtrado, elegiveis.head(20).reset_index(drop=True).set_axis(range(1, 21)))